@@ -0,0 +1,943 @@
+// Native game engine: the rules of MoveGen in C++, exposed to Python with pybind11.
+//
+// Build in place with `python setup.py build_ext --inplace` (see setup.py), then
+//
+//     import engine
+//     board = engine.Board.load("../graph.json")
+//     eng = engine.Engine(board, [engine.Agent.random(board) for _ in range(6)])
+//     results = eng.run_random_batch(100000, threads=0, seed=1)  # NumPy structured array
+//
+// run_batch(), run_random_batch(), run_games() and play() release the GIL;
+// agents written in Python take it back only for the duration of their own call.
+
+#include "engine.hpp"
+
+#include <algorithm>
+#include <atomic>
+#include <cctype>
+#include <exception>
+#include <fstream>
+#include <mutex>
+#include <sstream>
+#include <thread>
+
+#include <pybind11/numpy.h>
+#include <pybind11/operators.h>
+#include <pybind11/stl.h>
+
+// ---------------- TICKETS AND STATES ---------------- //
+
+int& PlayerCards::ticket(TransportType type) {
+    switch (type) {
+        case TransportType::Taxi: return taxi;
+        case TransportType::Bus:  return bus;
+        case TransportType::Tube: return tube;
+        case TransportType::Boat:
+        case TransportType::Black: return black;
+        default: throw std::invalid_argument("no ticket for a pass");
+    }
+}
+
+int PlayerCards::ticket(TransportType type) const {
+    return const_cast<PlayerCards*>(this)->ticket(type);
+}
+
+PlayerCards PlayerCards::start(int index, int number_of_players) {
+    if (index == 0) {
+        // Mr X gets 4 taxi, 3 bus, 3 tube, one black ticket per detective and two double turns
+        return PlayerCards{4, 3, 3, number_of_players - 1, 2};
+    }
+    // detectives get 10 taxi, 8 bus and 4 tube tickets
+    return PlayerCards{10, 8, 4, 0, 0};
+}
+
+static bool same_cards(const PlayerCards& a, const PlayerCards& b) {
+    return a.taxi == b.taxi && a.bus == b.bus && a.tube == b.tube && a.black == b.black && a.x2 == b.x2;
+}
+
+GameState GameState::initial(std::vector<int> player_locs) {
+    const int players = static_cast<int>(player_locs.size());
+    std::vector<PlayerCards> cards;
+    cards.reserve(players);
+    for (int i = 0; i < players; ++i) {
+        cards.push_back(PlayerCards::start(i, players));
+    }
+    return GameState(0, std::move(player_locs), std::move(cards), MR_X, false);
+}
+
+bool GameState::operator==(const GameState& other) const noexcept {
+    if (turn_ != other.turn_ || player_locs_ != other.player_locs_ || current_player_ != other.current_player_
+        || victory_flag_ != other.victory_flag_ || player_cards_.size() != other.player_cards_.size()) {
+        return false;
+    }
+    for (std::size_t i = 0; i < player_cards_.size(); ++i) {
+        if (!same_cards(player_cards_[i], other.player_cards_[i])) {
+            return false;
+        }
+    }
+    return true;
+}
+
+// ---------------- BOARD ---------------- //
+
+Board::Board(const std::vector<std::tuple<int, int, int>>& edges) {
+    int size = 0;
+    for (const auto& [station, neighbour, mask] : edges) {
+        if (station < 0 || neighbour < 0) {
+            throw std::invalid_argument("station ids must be non-negative");
+        }
+        size = std::max(size, std::max(station, neighbour) + 1);
+    }
+    adjacency_.resize(size);
+
+    auto connect = [this](int a, int b, int mask) {
+        for (Edge& edge : adjacency_[a]) {
+            if (edge.to == b) {
+                edge.mask |= static_cast<std::uint8_t>(mask);
+                return;
+            }
+        }
+        adjacency_[a].push_back(Edge{b, static_cast<std::uint8_t>(mask)});
+    };
+    for (const auto& [station, neighbour, mask] : edges) {
+        if (station == neighbour) {
+            anomalies_.push_back("station " + std::to_string(station) + ": self-loop dropped");
+            continue;
+        }
+        connect(station, neighbour, mask);
+        connect(neighbour, station, mask);
+    }
+
+    for (int station = 0; station < size; ++station) {
+        auto& targets = adjacency_[station];
+        std::sort(targets.begin(), targets.end(), [](const Edge& a, const Edge& b) { return a.to < b.to; });
+        if (!targets.empty()) {
+            stations_.push_back(station);
+        }
+    }
+}
+
+namespace {
+
+// Just enough JSON for graph.json: objects, strings, numbers and skipping anything else.
+class JsonReader {
+public:
+    explicit JsonReader(std::string text) : text_(std::move(text)) {}
+
+    void skip_ws() {
+        while (pos_ < text_.size() && std::isspace(static_cast<unsigned char>(text_[pos_]))) {
+            ++pos_;
+        }
+    }
+
+    char peek() {
+        skip_ws();
+        if (pos_ >= text_.size()) {
+            fail("unexpected end of input");
+        }
+        return text_[pos_];
+    }
+
+    void expect(char c) {
+        if (peek() != c) {
+            fail(std::string("expected '") + c + "'");
+        }
+        ++pos_;
+    }
+
+    // Consume ',' between members; false at the closing '}'
+    bool next_member(bool first) {
+        if (peek() == '}') {
+            ++pos_;
+            return false;
+        }
+        if (!first) {
+            expect(',');
+        }
+        return true;
+    }
+
+    std::string string() {
+        expect('"');
+        std::string out;
+        while (true) {
+            if (pos_ >= text_.size()) {
+                fail("unterminated string");
+            }
+            char c = text_[pos_++];
+            if (c == '"') {
+                return out;
+            }
+            if (c == '\\') {
+                if (pos_ >= text_.size()) {
+                    fail("unterminated string");
+                }
+                char escaped = text_[pos_++];
+                if (escaped == 'u') {
+                    pos_ += 4;  // station keys never need \u escapes
+                    out += '?';
+                    continue;
+                }
+                out += escaped == 'n' ? '\n' : escaped == 't' ? '\t' : escaped;
+                continue;
+            }
+            out += c;
+        }
+    }
+
+    // A JSON number; `integral` is false for fractions and exponents
+    double number(bool& integral) {
+        skip_ws();
+        std::size_t start = pos_;
+        integral = true;
+        while (pos_ < text_.size()) {
+            char c = text_[pos_];
+            if (c == '.' || c == 'e' || c == 'E') {
+                integral = false;
+            } else if (!(std::isdigit(static_cast<unsigned char>(c)) || c == '-' || c == '+')) {
+                break;
+            }
+            ++pos_;
+        }
+        if (start == pos_) {
+            fail("expected a number");
+        }
+        return std::stod(text_.substr(start, pos_ - start));
+    }
+
+    void skip_value() {
+        char c = peek();
+        if (c == '"') {
+            string();
+        } else if (c == '{' || c == '[') {
+            char close = c == '{' ? '}' : ']';
+            ++pos_;
+            bool first = true;
+            while (peek() != close) {
+                if (!first) {
+                    expect(',');
+                }
+                if (c == '{') {
+                    string();
+                    expect(':');
+                }
+                skip_value();
+                first = false;
+            }
+            ++pos_;
+        } else if (c == '-' || std::isdigit(static_cast<unsigned char>(c))) {
+            bool integral;
+            number(integral);
+        } else {
+            for (const char* word : {"true", "false", "null"}) {
+                if (text_.compare(pos_, std::char_traits<char>::length(word), word) == 0) {
+                    pos_ += std::char_traits<char>::length(word);
+                    return;
+                }
+            }
+            fail("unexpected value");
+        }
+    }
+
+    [[noreturn]] void fail(const std::string& message) {
+        throw std::runtime_error("graph.json: " + message + " at byte " + std::to_string(pos_));
+    }
+
+private:
+    std::string text_;
+    std::size_t pos_ = 0;
+};
+
+bool is_digits(const std::string& text) {
+    return !text.empty() && std::all_of(text.begin(), text.end(),
+                                        [](unsigned char c) { return std::isdigit(c); });
+}
+
+}  // namespace
+
+Board Board::load(const std::string& path) {
+    std::ifstream file(path, std::ios::binary);
+    if (!file) {
+        throw std::runtime_error("cannot open " + path);
+    }
+    std::stringstream buffer;
+    buffer << file.rdbuf();
+
+    JsonReader json(buffer.str());
+    std::vector<std::tuple<int, int, int>> edges;
+    std::vector<std::string> anomalies;
+
+    json.expect('{');
+    for (bool first = true; json.next_member(first); first = false) {
+        std::string key = json.string();
+        json.expect(':');
+        if (key == "_comment") {
+            if (json.peek() != '"') {
+                anomalies.push_back("_comment must be a string");
+            }
+            json.skip_value();
+            continue;
+        }
+        if (!is_digits(key) || json.peek() != '{') {
+            anomalies.push_back("invalid station entry '" + key + "'");
+            json.skip_value();
+            continue;
+        }
+        const int station = std::stoi(key);
+        json.expect('{');
+        for (bool first_target = true; json.next_member(first_target); first_target = false) {
+            std::string target = json.string();
+            json.expect(':');
+            const std::string where = "station " + std::to_string(station);
+            if (!is_digits(target)) {
+                anomalies.push_back(where + ": invalid neighbour '" + target + "'");
+                json.skip_value();
+                continue;
+            }
+            const int neighbour = std::stoi(target);
+            char c = json.peek();
+            if (!(c == '-' || std::isdigit(static_cast<unsigned char>(c)))) {
+                anomalies.push_back(where + " -> " + target + ": unknown weight code");
+                json.skip_value();
+                continue;
+            }
+            bool integral;
+            double code = json.number(integral);
+            // Weight codes are the TAXI/BUS/TUBE bits added together, 1 through 6
+            if (!integral || code < 1 || code > 6) {
+                std::ostringstream text;
+                text << where << " -> " << neighbour << ": unknown weight code " << code;
+                anomalies.push_back(text.str());
+                continue;
+            }
+            edges.emplace_back(station, neighbour, static_cast<int>(code));
+        }
+    }
+
+    Board board(edges);
+    anomalies.insert(anomalies.end(), board.anomalies_.begin(), board.anomalies_.end());
+    board.anomalies_ = std::move(anomalies);
+    return board;
+}
+
+// ---------------- RULES ---------------- //
+
+namespace {
+
+constexpr std::array<std::pair<TransportType, std::uint8_t>, 3> TICKET_TRANSPORTS{{
+    {TransportType::Taxi, TAXI_BIT},
+    {TransportType::Bus, BUS_BIT},
+    {TransportType::Tube, TUBE_BIT},
+}};
+
+bool held_by_detective(const std::vector<int>& locs, int station) {
+    for (std::size_t i = 1; i < locs.size(); ++i) {
+        if (locs[i] == station) {
+            return true;
+        }
+    }
+    return false;
+}
+
+void single_moves(const Board& board, int player, int station, const PlayerCards& cards,
+                  const std::vector<int>& locs, std::vector<Move>& out) {
+    const auto& targets = board.neighbours(station);
+    for (const auto& [type, bit] : TICKET_TRANSPORTS) {
+        if (cards.ticket(type) <= 0) {
+            continue;
+        }
+        for (const Edge& edge : targets) {
+            if ((edge.mask & bit) && !held_by_detective(locs, edge.to)) {
+                out.emplace_back(player, station, edge.to, type);
+            }
+        }
+    }
+    if (player == MR_X && cards.black > 0) {
+        for (const Edge& edge : targets) {
+            if (!held_by_detective(locs, edge.to)) {
+                out.emplace_back(player, station, edge.to, TransportType::Black);
+            }
+        }
+    }
+}
+
+}  // namespace
+
+std::vector<Move> legal_moves(const Board& board, const GameState& state) {
+    std::vector<Move> moves;
+    if (state.victory_flag()) {
+        return moves;
+    }
+    const int player = state.current_player();
+    const auto& locs = state.player_locs();
+    const PlayerCards& cards = state.player_cards()[player];
+
+    single_moves(board, player, locs[player], cards, locs, moves);
+    // Both legs of a double move have to fit in the last round
+    if (player == MR_X && cards.x2 > 0 && state.turn() + 2 <= MAX_TURNS) {
+        const std::size_t singles = moves.size();
+        std::vector<Move> seconds;
+        for (std::size_t i = 0; i < singles; ++i) {
+            const Move first = moves[i];
+            PlayerCards left = cards;
+            left.ticket(first.type()) -= 1;
+            seconds.clear();
+            single_moves(board, MR_X, first.to_station(), left, locs, seconds);
+            for (const Move& second : seconds) {
+                moves.push_back(Move::double_move(first, second));
+            }
+        }
+    }
+    return moves;
+}
+
+bool is_caught(const GameState& state) {
+    return held_by_detective(state.player_locs(), state.player_locs()[MR_X]);
+}
+
+int winner(const GameState& state) {
+    if (!state.victory_flag()) {
+        return NO_WINNER;
+    }
+    if (is_caught(state)) {
+        return DETECTIVES;
+    }
+    // Game ended on Mr X's move before the time ran out: he had nowhere to go
+    if (state.current_player() == MR_X && state.turn() < MAX_TURNS) {
+        return DETECTIVES;
+    }
+    return MR_X;
+}
+
+GameState apply_move(const GameState& state, const Move& move) {
+    const int player = state.current_player();
+    std::vector<int> locs = state.player_locs();
+    std::vector<PlayerCards> cards = state.player_cards();
+    int turn = state.turn();
+
+    if (move.is_pass()) {
+        if (player == MR_X) {
+            return GameState(turn, std::move(locs), std::move(cards), MR_X, true);
+        }
+    } else {
+        const Move legs[2] = {move.first(), move.second()};
+        const int count = move.is_double() ? 2 : 1;
+        if (move.is_double()) {
+            cards[MR_X].x2 -= 1;
+        }
+        for (int i = 0; i < count; ++i) {
+            const Move& leg = legs[i];
+            locs[player] = leg.to_station();
+            cards[player].ticket(leg.type()) -= 1;
+            if (player == MR_X) {
+                ++turn;
+            } else {
+                // tickets a detective spends go to Mr X
+                cards[MR_X].ticket(leg.type()) += 1;
+            }
+        }
+    }
+
+    const int next_player = (player + 1) % static_cast<int>(locs.size());
+    const bool over = held_by_detective(locs, locs[MR_X]) || (next_player == MR_X && turn >= MAX_TURNS);
+    return GameState(turn, std::move(locs), std::move(cards), next_player, over);
+}
+
+// ---------------- RANDOM STREAMS ---------------- //
+
+namespace {
+
+std::uint64_t splitmix64(std::uint64_t x) {
+    x += 0x9E3779B97F4A7C15ull;
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9ull;
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EBull;
+    return x ^ (x >> 31);
+}
+
+thread_local std::mt19937_64 current_rng;
+
+std::uint64_t seed_for(std::uint64_t seed, std::uint64_t game) {
+    return splitmix64(seed ^ splitmix64(game));
+}
+
+// Salt for the streams that draw starting positions
+constexpr std::uint64_t START_STREAM = 0x5354415254ull;
+
+}  // namespace
+
+std::mt19937_64& game_rng() {
+    return current_rng;
+}
+
+void seed_game_rng(std::uint64_t seed, std::uint64_t game) {
+    current_rng.seed(seed_for(seed, game));
+}
+
+// ---------------- PYTHON CONVERSION ---------------- //
+
+namespace {
+
+const char* const TICKET_NAMES[] = {"taxi", "bus", "tube", "black", "x2"};
+
+int* card_field(PlayerCards& cards, const std::string& name) {
+    if (name == "taxi") return &cards.taxi;
+    if (name == "bus") return &cards.bus;
+    if (name == "tube") return &cards.tube;
+    if (name == "black") return &cards.black;
+    if (name == "x2") return &cards.x2;
+    return nullptr;
+}
+
+// Controll.GameState (or anything shaped like it) -> GameState
+GameState state_from_python(const py::handle& obj) {
+    if (py::isinstance<GameState>(obj)) {
+        return obj.cast<GameState>();
+    }
+    std::vector<PlayerCards> cards;
+    for (const py::handle& row : obj.attr("player_cards")) {
+        PlayerCards player;
+        for (const py::handle& pair : row) {
+            auto [name, count] = pair.cast<std::pair<std::string, int>>();
+            if (int* field = card_field(player, name)) {
+                *field = count;
+            }
+        }
+        cards.push_back(player);
+    }
+    return GameState(obj.attr("turn").cast<int>(),
+                     obj.attr("player_locs").cast<std::vector<int>>(),
+                     std::move(cards),
+                     obj.attr("current_player").cast<int>(),
+                     obj.attr("victory_flag").cast<bool>());
+}
+
+py::object state_to_python(const GameState& state) {
+    py::module_ controll = py::module_::import("Controll");
+    py::list cards;
+    for (const PlayerCards& player : state.player_cards()) {
+        const int counts[] = {player.taxi, player.bus, player.tube, player.black, player.x2};
+        py::list row;
+        for (int i = 0; i < 5; ++i) {
+            row.append(py::make_tuple(TICKET_NAMES[i], counts[i]));
+        }
+        cards.append(py::tuple(row));
+    }
+    return controll.attr("GameState")(
+        py::arg("turn") = state.turn(),
+        py::arg("player_locs") = py::tuple(py::cast(state.player_locs())),
+        py::arg("player_cards") = py::tuple(cards),
+        py::arg("current_player") = state.current_player(),
+        py::arg("victory_flag") = state.victory_flag());
+}
+
+TransportType transport_from_python(const py::handle& obj) {
+    if (py::hasattr(obj, "value")) {
+        return static_cast<TransportType>(obj.attr("value").cast<int>());
+    }
+    return obj.cast<TransportType>();
+}
+
+Move single_from_python(const py::handle& obj) {
+    return Move(obj.attr("player").cast<int>(), obj.attr("from_station").cast<int>(),
+                obj.attr("to_station").cast<int>(), transport_from_python(obj.attr("type")));
+}
+
+// None (a pass), a native Move, or a Controll.Move / DoubleMove -> Move
+Move move_from_python(const py::handle& obj, const GameState& state) {
+    if (obj.is_none()) {
+        const int player = state.current_player();
+        return Move::pass(player, state.player_locs()[player]);
+    }
+    if (py::isinstance<Move>(obj)) {
+        return obj.cast<Move>();
+    }
+    if (py::hasattr(obj, "first")) {
+        return Move::double_move(single_from_python(obj.attr("first")), single_from_python(obj.attr("second")));
+    }
+    return single_from_python(obj);
+}
+
+py::object move_to_python(const Move& move) {
+    if (move.is_pass()) {
+        return py::none();
+    }
+    py::module_ controll = py::module_::import("Controll");
+    py::object transport = controll.attr("TransportType");
+    auto single = [&](const Move& leg) {
+        return controll.attr("Move")(leg.player(), leg.from_station(), leg.to_station(),
+                                     transport(static_cast<int>(leg.type())));
+    };
+    if (move.is_double()) {
+        return controll.attr("DoubleMove")(single(move.first()), single(move.second()));
+    }
+    return single(move);
+}
+
+std::string transport_name(TransportType type) {
+    switch (type) {
+        case TransportType::Pass: return "Pass";
+        case TransportType::Taxi: return "Taxi";
+        case TransportType::Bus: return "Bus";
+        case TransportType::Tube: return "Tube";
+        case TransportType::Boat: return "Boat";
+        case TransportType::Black: return "Black";
+    }
+    return "?";
+}
+
+}  // namespace
+
+// ---------------- AGENTS ---------------- //
+
+Agent Agent::random(const Board& board) {
+    auto shared = std::make_shared<const Board>(board);
+    return Agent(CppCb([shared](const GameState& state) {
+        std::vector<Move> moves = legal_moves(*shared, state);
+        const int player = state.current_player();
+        if (moves.empty()) {
+            return Move::pass(player, state.player_locs()[player]);
+        }
+        std::uniform_int_distribution<std::size_t> pick(0, moves.size() - 1);
+        return moves[pick(game_rng())];
+    }));
+}
+
+Move Agent::operator()(const GameState& state) const {
+    return std::visit([&](auto const& f) -> Move {
+        using T = std::decay_t<decltype(f)>;
+
+        if constexpr (std::is_same_v<T, std::monostate>) {
+            throw std::runtime_error("Callback not set");
+        } else if constexpr (std::is_same_v<T, CppCb>) {
+            return f(state); // no GIL
+        } else { // PyCb
+            py::gil_scoped_acquire gil;
+            py::object result = python_types ? f(state_to_python(state)) : f(state);
+            return move_from_python(result, state);
+        }
+    }, cb);
+}
+
+// ---------------- ENGINE ---------------- //
+
+Engine::Engine(Board board, std::vector<Agent> agents)
+    : board(std::move(board)),
+      agents(std::move(agents)),
+      currentState(0, {}, {}, MR_X, true) {}
+
+void Engine::reset(GameState state) {
+    if (state.player_count() != agents.size()) {
+        throw std::invalid_argument("the engine has " + std::to_string(agents.size()) + " agents but the state has "
+                                    + std::to_string(state.player_count()) + " players");
+    }
+    currentState = std::move(state);
+}
+
+std::vector<Move> Engine::legal_moves() const {
+    return ::legal_moves(board, currentState);
+}
+
+const GameState& Engine::apply(const Move& move) {
+    currentState = apply_move(currentState, move);
+    return currentState;
+}
+
+Move Engine::step() {
+    if (currentState.victory_flag()) {
+        throw std::runtime_error("the game is over");
+    }
+    Move move = agents.at(currentState.current_player())(currentState);
+    apply(move);
+    return move;
+}
+
+bool Engine::native() const noexcept {
+    return std::all_of(agents.begin(), agents.end(), [](const Agent& agent) { return agent.is_native(); });
+}
+
+GameResult Engine::play(GameState state, std::uint64_t seed, std::uint64_t game) const {
+    if (state.player_count() != agents.size()) {
+        throw std::invalid_argument("one agent per player is needed");
+    }
+    seed_game_rng(seed, game);
+    int plies = 0;
+    while (!state.victory_flag() && plies < MAX_PLIES) {
+        Move move = agents[state.current_player()](state);
+        state = apply_move(state, move);
+        ++plies;
+    }
+    const int result = winner(state);
+    const int turns = state.turn();
+    return GameResult{result == NO_WINNER ? MR_X : result, turns, plies, std::move(state)};
+}
+
+GameState Engine::random_start(std::uint64_t seed, std::uint64_t game) const {
+    const auto& stations = board.stations();
+    const std::size_t players = agents.size();
+    if (players < 2 || players > stations.size()) {
+        throw std::invalid_argument("cannot start a game with " + std::to_string(players) + " players");
+    }
+    // a stream of its own, so the start does not replay the first draws of the game
+    std::mt19937_64 rng(seed_for(seed ^ START_STREAM, game));
+    std::vector<int> pool = stations;
+    for (std::size_t i = 0; i < players; ++i) {
+        std::uniform_int_distribution<std::size_t> pick(i, pool.size() - 1);
+        std::swap(pool[i], pool[pick(rng)]);
+    }
+    return GameState::initial(std::vector<int>(pool.begin(), pool.begin() + players));
+}
+
+std::vector<GameResult> Engine::run_games(int n_games, std::uint64_t seed) const {
+    std::vector<GameResult> results;
+    results.reserve(std::max(0, n_games));
+    for (int game = 0; game < n_games; ++game) {
+        results.push_back(play(random_start(seed, game), seed, game));
+    }
+    return results;
+}
+
+namespace {
+
+// Run fn(i) for every i < count on `threads` threads pulling indices from a shared counter.
+// The first exception stops the remaining work and is rethrown once every thread has joined.
+template <typename Fn>
+void parallel_for(std::size_t count, int threads, Fn fn) {
+    if (threads <= 0) {
+        threads = static_cast<int>(std::max(1u, std::thread::hardware_concurrency()));
+    }
+    threads = static_cast<int>(std::min<std::size_t>(threads, std::max<std::size_t>(count, 1)));
+
+    std::atomic<std::size_t> next{0};
+    std::atomic<bool> failed{false};
+    std::exception_ptr error;
+    std::mutex error_lock;
+
+    auto worker = [&]() {
+        while (!failed.load(std::memory_order_relaxed)) {
+            const std::size_t i = next.fetch_add(1, std::memory_order_relaxed);
+            if (i >= count) {
+                return;
+            }
+            try {
+                fn(i);
+            } catch (...) {
+                std::lock_guard<std::mutex> guard(error_lock);
+                if (!error) {
+                    error = std::current_exception();
+                }
+                failed = true;
+            }
+        }
+    };
+
+    if (threads == 1) {
+        worker();
+    } else {
+        std::vector<std::thread> pool;
+        pool.reserve(threads);
+        for (int t = 0; t < threads; ++t) {
+            pool.emplace_back(worker);
+        }
+        for (std::thread& thread : pool) {
+            thread.join();
+        }
+    }
+    if (error) {
+        std::rethrow_exception(error);
+    }
+}
+
+BatchResult summarise(std::uint64_t game, const GameResult& result) {
+    return BatchResult{
+        static_cast<std::uint32_t>(game),
+        static_cast<std::int8_t>(result.winner),
+        static_cast<std::uint8_t>(result.turns),
+        static_cast<std::uint16_t>(result.plies),
+        static_cast<std::uint16_t>(result.final_state.player_locs()[MR_X]),
+        is_caught(result.final_state),
+    };
+}
+
+}  // namespace
+
+std::vector<BatchResult> Engine::run_batch(const std::vector<GameState>& starts, int threads,
+                                           std::uint64_t seed) const {
+    for (const GameState& state : starts) {
+        if (state.player_count() != agents.size()) {
+            throw std::invalid_argument("one agent per player is needed");
+        }
+    }
+    std::vector<BatchResult> results(starts.size());
+    parallel_for(starts.size(), threads, [&](std::size_t game) {
+        results[game] = summarise(game, play(starts[game], seed, game));
+    });
+    return results;
+}
+
+std::vector<BatchResult> Engine::run_random_batch(std::uint64_t n_games, int threads, std::uint64_t seed) const {
+    std::vector<BatchResult> results(n_games);
+    parallel_for(n_games, threads, [&](std::size_t game) {
+        results[game] = summarise(game, play(random_start(seed, game), seed, game));
+    });
+    return results;
+}
+
+namespace {
+
+py::array_t<BatchResult> to_numpy(std::vector<BatchResult>&& rows) {
+    auto* owned = new std::vector<BatchResult>(std::move(rows));
+    py::capsule free_rows(owned, [](void* p) { delete static_cast<std::vector<BatchResult>*>(p); });
+    return py::array_t<BatchResult>(owned->size(), owned->data(), free_rows);
+}
+
+}  // namespace
+
+// ---------------- BINDINGS ---------------- //
+
+PYBIND11_MODULE(engine, m) {
+    m.doc() = "Native Scotland Yard engine: board, rules and batch self-play";
+
+    PYBIND11_NUMPY_DTYPE(BatchResult, game, winner, turns, plies, mrx_station, caught);
+
+    py::enum_<TransportType>(m, "TransportType")
+        .value("Pass", TransportType::Pass)
+        .value("Taxi", TransportType::Taxi)
+        .value("Bus", TransportType::Bus)
+        .value("Tube", TransportType::Tube)
+        .value("Boat", TransportType::Boat)
+        .value("Black", TransportType::Black);
+
+    m.attr("MAX_TURNS") = MAX_TURNS;
+    m.attr("MR_X") = MR_X;
+    m.attr("DETECTIVES") = DETECTIVES;
+
+    py::class_<Move>(m, "Move")
+        .def(py::init<int, int, int, TransportType>(),
+             py::arg("player"), py::arg("from_station"), py::arg("to_station"), py::arg("type"))
+        .def_static("double_move", &Move::double_move, py::arg("first"), py::arg("second"))
+        .def_static("pass_move", &Move::pass, py::arg("player"), py::arg("station"))
+        .def_property_readonly("player", &Move::player)
+        .def_property_readonly("from_station", &Move::from_station)
+        .def_property_readonly("to_station", &Move::to_station)
+        .def_property_readonly("type", &Move::type)
+        .def_property_readonly("is_pass", &Move::is_pass)
+        .def_property_readonly("is_double", &Move::is_double)
+        .def_property_readonly("first", &Move::first)
+        .def_property_readonly("second", &Move::second)
+        .def_static("from_python", [](const py::handle& obj, const GameState& state) {
+            return move_from_python(obj, state);
+        }, py::arg("move"), py::arg("state"), "Convert None / Controll.Move / Controll.DoubleMove")
+        .def("to_python", &move_to_python, "Controll.Move, Controll.DoubleMove or None for a pass")
+        .def(py::self == py::self)
+        .def("__repr__", [](const Move& move) {
+            std::string text = "Move(player=" + std::to_string(move.player()) + ", "
+                + std::to_string(move.from_station()) + " -> ";
+            if (move.is_double()) {
+                text += std::to_string(move.via_station()) + " " + transport_name(move.type()) + " -> ";
+                return text + std::to_string(move.to_station()) + " " + transport_name(move.second_type()) + ")";
+            }
+            return text + std::to_string(move.to_station()) + " " + transport_name(move.type()) + ")";
+        });
+
+    py::class_<PlayerCards>(m, "PlayerCards")
+        .def(py::init<int, int, int, int, int>(),
+             py::arg("taxi") = 0, py::arg("bus") = 0, py::arg("tube") = 0, py::arg("black") = 0, py::arg("x2") = 0)
+        .def_static("start", &PlayerCards::start, py::arg("index"), py::arg("number_of_players"))
+        .def_readwrite("taxi", &PlayerCards::taxi)
+        .def_readwrite("bus", &PlayerCards::bus)
+        .def_readwrite("tube", &PlayerCards::tube)
+        .def_readwrite("black", &PlayerCards::black)
+        .def_readwrite("x2", &PlayerCards::x2);
+
+    py::class_<GameState>(m, "GameState")
+        .def(py::init<int, std::vector<int>, std::vector<PlayerCards>, int, bool>(),
+             py::arg("turn"), py::arg("player_locs"), py::arg("player_cards"),
+             py::arg("current_player"), py::arg("victory_flag"))
+        .def_static("initial", &GameState::initial, py::arg("player_locs"))
+        .def_static("from_python", &state_from_python, py::arg("state"),
+                    "Convert a Controll.GameState (or anything with the same fields)")
+        .def("to_python", &state_to_python, "Controll.GameState with the same contents; needs GUI/ on sys.path")
+        .def_property_readonly("turn", &GameState::turn)
+        .def_property_readonly("player_locs", &GameState::player_locs)
+        .def_property_readonly("player_cards", &GameState::player_cards)
+        .def_property_readonly("current_player", &GameState::current_player)
+        .def_property_readonly("victory_flag", &GameState::victory_flag)
+        .def_property_readonly("player_count", &GameState::player_count)
+        .def(py::self == py::self);
+
+    py::class_<Board>(m, "Board")
+        .def(py::init<const std::vector<std::tuple<int, int, int>>&>(), py::arg("edges"))
+        .def_static("load", &Board::load, py::arg("path"))
+        .def_property_readonly("size", &Board::size)
+        .def_property_readonly("stations", &Board::stations)
+        .def_property_readonly("anomalies", &Board::anomalies)
+        .def("neighbours", [](const Board& board, int station) {
+            std::vector<std::pair<int, int>> out;
+            for (const Edge& edge : board.neighbours(station)) {
+                out.emplace_back(edge.to, edge.mask);
+            }
+            return out;
+        }, py::arg("station"), "(neighbour, transport mask) pairs")
+        .def("legal_moves", [](const Board& board, const GameState& state) { return legal_moves(board, state); },
+             py::arg("state"));
+
+    m.def("legal_moves", [](const Board& board, const GameState& state) { return legal_moves(board, state); },
+          py::arg("board"), py::arg("state"));
+    m.def("apply", &apply_move, py::arg("state"), py::arg("move"));
+    m.def("winner", [](const GameState& state) -> py::object {
+        const int result = winner(state);
+        return result == NO_WINNER ? py::none() : py::cast(result);
+    }, py::arg("state"), "MR_X, DETECTIVES, or None while the game is still running");
+    m.def("is_caught", &is_caught, py::arg("state"));
+
+    py::class_<Agent>(m, "Agent")
+        .def(py::init<py::function, bool>(), py::arg("callback"), py::arg("python_types") = false,
+             "Agent calling back into Python. With python_types the callback gets a Controll.GameState "
+             "and may return Controll moves or None.")
+        .def_static("random", &Agent::random, py::arg("board"), "Uniformly random legal moves, native")
+        .def_property_readonly("is_native", &Agent::is_native)
+        .def("__call__", [](const Agent& agent, const GameState& state) { return agent(state); });
+
+    py::class_<GameResult>(m, "GameResult")
+        .def_readonly("winner", &GameResult::winner)
+        .def_readonly("turns", &GameResult::turns)
+        .def_readonly("plies", &GameResult::plies)
+        .def_readonly("final_state", &GameResult::final_state);
+
+    py::class_<Engine>(m, "Engine")
+        .def(py::init<Board, std::vector<Agent>>(), py::arg("board"), py::arg("agents"))
+        .def_property_readonly("board", &Engine::get_board)
+        .def_property_readonly("state", &Engine::state)
+        .def_property_readonly("native", &Engine::native)
+        .def("reset", &Engine::reset, py::arg("state"))
+        .def("legal_moves", &Engine::legal_moves)
+        .def("apply", &Engine::apply, py::arg("move"))
+        .def("step", &Engine::step)
+        .def("play", &Engine::play, py::arg("state"), py::arg("seed") = 0, py::arg("game") = 0,
+             py::call_guard<py::gil_scoped_release>())
+        .def("run_games", &Engine::run_games, py::arg("n_games"), py::arg("seed") = 0,
+             py::call_guard<py::gil_scoped_release>())
+        .def("random_start", &Engine::random_start, py::arg("seed"), py::arg("game"))
+        .def("run_batch", [](const Engine& engine, const py::iterable& states, int threads, std::uint64_t seed) {
+            std::vector<GameState> starts;
+            for (const py::handle& state : states) {
+                starts.push_back(state_from_python(state));
+            }
+            std::vector<BatchResult> rows;
+            {
+                py::gil_scoped_release release;
+                rows = engine.run_batch(starts, threads, seed);
+            }
+            return to_numpy(std::move(rows));
+        }, py::arg("states"), py::arg("threads") = 0, py::arg("seed") = 0,
+           "Play every starting state (engine or Controll GameStates) to the end on native threads; "
+           "returns a structured array with one row per game")
+        .def("run_random_batch", [](const Engine& engine, std::uint64_t n_games, int threads, std::uint64_t seed) {
+            std::vector<BatchResult> rows;
+            {
+                py::gil_scoped_release release;
+                rows = engine.run_random_batch(n_games, threads, seed);
+            }
+            return to_numpy(std::move(rows));
+        }, py::arg("n_games"), py::arg("threads") = 0, py::arg("seed") = 0);
+}
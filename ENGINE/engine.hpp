@@ -1,8 +1,10 @@
-
 #pragma once
 
+#include <array>
 #include <tuple>
+#include <string>
 #include <vector>
+#include <random>
 #include <cstddef>
 #include <cstdint>
 #include <functional>
@@ -12,16 +14,30 @@
 
 namespace py = pybind11;
 
-// You likely already have this in C++.
-// Placeholder example:
+// Same values as Controll.TransportType; Pass stands in for Python's `None` move.
 enum class TransportType : std::uint8_t {
-    Taxi,
-    Bus,
-    Tube,
-    Black,
-    Double
+    Pass  = 0,
+    Taxi  = 1,
+    Bus   = 2,
+    Tube  = 3,
+    Boat  = 4,
+    Black = 5
 };
 
+// Bits of the per-edge transport masks, as Board.TRANSPORT_BITS
+constexpr std::uint8_t TAXI_BIT = 1;
+constexpr std::uint8_t BUS_BIT  = 2;
+constexpr std::uint8_t TUBE_BIT = 4;
+constexpr std::uint8_t BOAT_BIT = 8;
+
+// Game rules, as in MoveGen
+constexpr int MAX_TURNS = 24;
+constexpr int MR_X = 0;
+constexpr int DETECTIVES = 1;
+constexpr int NO_WINNER = -1;
+// Hard stop for games that somehow never end, as Simulator.MAX_PLIES
+constexpr int MAX_PLIES = 1000;
+
 class Move {
 public:
 
@@ -34,18 +50,51 @@ public:
           to_station_(to_station),
           type_(type) {}
 
+    // Mr X spending an x2 card: from -> via by `type`, then via -> to by `second_type`
+    static constexpr Move double_move(const Move& first, const Move& second) noexcept {
+        Move move(first.player_, first.from_station_, second.to_station_, first.type_);
+        move.via_station_ = first.to_station_;
+        move.second_type_ = second.type_;
+        return move;
+    }
+
+    // The player has no legal move and has to pass
+    static constexpr Move pass(int player, int station) noexcept {
+        return Move(player, station, station, TransportType::Pass);
+    }
+
     // Getters
     constexpr int player() const noexcept { return player_; }
     constexpr int from_station() const noexcept { return from_station_; }
     constexpr int to_station() const noexcept { return to_station_; }
     constexpr TransportType type() const noexcept { return type_; }
 
+    constexpr bool is_pass() const noexcept { return type_ == TransportType::Pass; }
+    constexpr bool is_double() const noexcept { return second_type_ != TransportType::Pass; }
+    constexpr int via_station() const noexcept { return via_station_; }
+    constexpr TransportType second_type() const noexcept { return second_type_; }
+
+    // The two legs of a double move (first() is the move itself otherwise)
+    constexpr Move first() const noexcept {
+        return Move(player_, from_station_, is_double() ? via_station_ : to_station_, type_);
+    }
+    constexpr Move second() const noexcept {
+        return Move(player_, via_station_, to_station_, second_type_);
+    }
+
+    constexpr bool operator==(const Move& other) const noexcept {
+        return player_ == other.player_ && from_station_ == other.from_station_
+            && to_station_ == other.to_station_ && type_ == other.type_
+            && via_station_ == other.via_station_ && second_type_ == other.second_type_;
+    }
 
 private:
     int player_;
     int from_station_;
     int to_station_;
     TransportType type_;
+    int via_station_ = 0;
+    TransportType second_type_ = TransportType::Pass;
 };
 
 struct PlayerCards {
@@ -54,6 +103,13 @@ struct PlayerCards {
     int tube  = 0;
     int black = 0;
     int x2    = 0;
+
+    // Ticket spent to travel by `type`; boats can only be paid with a black ticket
+    int& ticket(TransportType type);
+    int ticket(TransportType type) const;
+
+    // Standard starting tickets, as Controll.start_cards
+    static PlayerCards start(int index, int number_of_players);
 };
 
 class GameState {
@@ -77,6 +133,9 @@ public:
           current_player_(current_player),
           victory_flag_(victory_flag) {}
 
+    // Turn-0 state with the standard starting tickets, as Controll.initial_state
+    static GameState initial(std::vector<int> player_locs);
+
     // Getters
     int turn() const noexcept { return turn_; }
 
@@ -92,41 +151,120 @@ public:
 
     std::size_t player_count() const noexcept { return player_locs_.size(); }
 
+    bool operator==(const GameState& other) const noexcept;
+};
 
+struct Edge {
+    int to;
+    std::uint8_t mask;  // TAXI_BIT | BUS_BIT | TUBE_BIT | BOAT_BIT
 };
 
+class Board {
+public:
+    // (station, neighbour, mask) triples; made symmetric, self-loops dropped
+    explicit Board(const std::vector<std::tuple<int, int, int>>& edges);
+
+    // Parse graph.json with the same rules as Board.parse_graph (non-strict)
+    static Board load(const std::string& path);
+
+    int size() const noexcept { return static_cast<int>(adjacency_.size()); }
+    const std::vector<Edge>& neighbours(int station) const { return adjacency_.at(station); }
+    // Stations with at least one connection
+    const std::vector<int>& stations() const noexcept { return stations_; }
+    // Entries of graph.json that were skipped while loading
+    const std::vector<std::string>& anomalies() const noexcept { return anomalies_; }
+
+private:
+    std::vector<std::vector<Edge>> adjacency_;  // sorted by neighbour id
+    std::vector<int> stations_;
+    std::vector<std::string> anomalies_;
+};
+
+// Every legal move for state.current_player(), in the same order as MoveGen.legal_moves.
+// Empty means the player has to pass.
+std::vector<Move> legal_moves(const Board& board, const GameState& state);
+GameState apply_move(const GameState& state, const Move& move);
+bool is_caught(const GameState& state);
+// MR_X, DETECTIVES, or NO_WINNER while the game is still running
+int winner(const GameState& state);
+
+// Random stream of the game being played on this thread. The engine reseeds
+// it at the start of every game, so C++ agents can draw from it without any
+// state of their own.
+std::mt19937_64& game_rng();
+void seed_game_rng(std::uint64_t seed, std::uint64_t game);
+
 class Agent {
 public:
     using CppCb = std::function<Move(const GameState&)>;
     using PyCb  = py::function;
     using Callback = std::variant<std::monostate, CppCb, PyCb>;
-    std::variant<std::function<Move(const GameState&)>,  callback;
-
-    Move operator()(const GameState& state) const {
-    return std::visit([&](auto const& f) -> Move {
-        using T = std::decay_t<decltype(f)>;
-
-        if constexpr (std::is_same_v<T, std::monostate>) {
-            throw std::runtime_error("Callback not set");
-        } else if constexpr (std::is_same_v<T, CppCb>) {
-            return f(state); // no GIL
-        } else { // PyCb
-            py::gil_scoped_acquire gil;
-            return f(state).cast<Move>();
-        }
-    }, cb);
-}
+
+    Agent() = default;
+    explicit Agent(CppCb cb) : cb(std::move(cb)) {}
+    // `python_types`: call with a Controll.GameState and accept Controll moves / None back
+    explicit Agent(PyCb cb, bool python_types = false) : cb(std::move(cb)), python_types(python_types) {}
+
+    // Uniformly random legal move, drawn from game_rng()
+    static Agent random(const Board& board);
+
+    bool is_native() const noexcept { return std::holds_alternative<CppCb>(cb); }
+
+    Move operator()(const GameState& state) const;
 
 private:
     Callback cb{std::monostate{}};
+    bool python_types = false;
 };
 
+struct GameResult {
+    int winner;
+    int turns;
+    int plies;
+    GameState final_state;
+};
 
-
+// One row of Engine::run_batch()'s result; a NumPy structured dtype on the Python side
+struct BatchResult {
+    std::uint32_t game;
+    std::int8_t winner;
+    std::uint8_t turns;
+    std::uint16_t plies;
+    std::uint16_t mrx_station;
+    bool caught;
+};
 
 class Engine {
     private:
-        std::vector<Agent> agnets;
+        Board board;
+        std::vector<Agent> agents;
         GameState currentState;
     public:
-};
\ No newline at end of file
+        Engine(Board board, std::vector<Agent> agents);
+
+        const Board& get_board() const noexcept { return board; }
+        const GameState& state() const noexcept { return currentState; }
+        void reset(GameState state);
+
+        // Step the stored game: legal moves for, or a move by, the current player
+        std::vector<Move> legal_moves() const;
+        const GameState& apply(const Move& move);
+        Move step();
+
+        // Play `state` to the end; game_rng() is seeded from (seed, game)
+        GameResult play(GameState state, std::uint64_t seed, std::uint64_t game = 0) const;
+        // Play `n_games` games from random starts, one player per agent
+        std::vector<GameResult> run_games(int n_games, std::uint64_t seed) const;
+
+        // Random starting positions for game `game`, drawn from its own stream
+        GameState random_start(std::uint64_t seed, std::uint64_t game) const;
+        // Play every state in `starts` to the end on `threads` native threads
+        // (0: one per core). Game i is seeded from (seed, i), so the results do
+        // not depend on the thread count. Call without holding the GIL.
+        std::vector<BatchResult> run_batch(const std::vector<GameState>& starts, int threads,
+                                           std::uint64_t seed) const;
+        std::vector<BatchResult> run_random_batch(std::uint64_t n_games, int threads, std::uint64_t seed) const;
+
+        // True when no agent needs the GIL
+        bool native() const noexcept;
+};
@@ -0,0 +1,21 @@
+"""
+Build the native engine next to this file:
+
+    python setup.py build_ext --inplace
+"""
+from pybind11.setup_helpers import Pybind11Extension, build_ext
+from setuptools import setup
+
+setup(
+    name="engine",
+    ext_modules=[
+        Pybind11Extension(
+            "engine",
+            ["engine.cpp"],
+            depends=["engine.hpp"],
+            cxx_std=17,
+            extra_compile_args=["-O3"],
+        )
+    ],
+    cmdclass={"build_ext": build_ext},
+)
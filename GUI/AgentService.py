@@ -0,0 +1,165 @@
+"""
+Runs agent decide() calls on worker threads.
+
+A request that runs past its timeout, or is cancelled, gets the agent's
+stop_event set; agents that support it (MCTSAgent) then return their best
+move so far. An agent that does not stop within the grace period, or that
+raises, is replaced by a fallback move so the game always goes on: the best
+move the agent has published so far, or else a random legal one. Such an
+agent is not used again (no decide(), no observe()) until the stray
+decide() has returned; see wait_idle().
+"""
+import random
+import threading
+import time
+
+from Instrumentation import count, span
+from MoveGen import default_generator
+
+DEFAULT_TIMEOUT = 10.0
+STOP_GRACE = 0.5
+
+
+class MoveRequest:
+    """One decide() call: its state, progress and outcome."""
+    def __init__(self, agent, state):
+        self.agent = agent
+        self.state = state
+        self.player = state.current_player
+        self.stop_event = threading.Event()
+        self.done = threading.Event()
+        self.started = time.perf_counter()
+        self.elapsed = None
+
+        self.result = None  # what decide() returned, set by the worker
+        self.error = None
+        self.move = None  # the move actually played
+        self.fallback = False
+        self.cancelled = False
+        self.timed_out = False
+
+    def progress(self):
+        """Fraction of its budget the agent has used, None if it does not report one."""
+        return getattr(self.agent, "progress", None)
+
+    def best_so_far(self):
+        """Best move the running decide() has published, None if it does not publish one."""
+        return getattr(self.agent, "best_so_far", None)
+
+    def cancel(self):
+        self.cancelled = True
+        self.stop_event.set()
+
+
+class AgentService:
+    def __init__(self, timeout=DEFAULT_TIMEOUT, grace=STOP_GRACE, generator=None, seed=None):
+        self.timeout = timeout
+        self.grace = grace
+        self.generator = generator or default_generator()
+        self.rng = random.Random(seed)
+        self.current = None  # MoveRequest being computed, polled by the UI
+        self._unfinished = {}  # agent -> MoveRequest that was given up on but is still running
+
+    def submit(self, agent, state):
+        """Start `agent.decide(state)` on a worker thread and return its MoveRequest."""
+        if not self.is_idle(agent):
+            raise RuntimeError(f"agent of player {state.current_player} is still running a previous decide()")
+        request = MoveRequest(agent, state)
+        agent.stop_event = request.stop_event
+        agent.best_so_far = None
+        self.current = request
+        worker = threading.Thread(target=self._work, args=(request,),
+                                  name=f"agent-{request.player}", daemon=True)
+        worker.start()
+        return request
+
+    def _work(self, request):
+        try:
+            request.result = request.agent.decide(request.state)
+        except Exception as exc:
+            request.error = exc
+        finally:
+            request.elapsed = time.perf_counter() - request.started
+            request.done.set()
+
+    @span("agent.request")
+    def run(self, agent, state, stop=None):
+        """
+        Blocking decide() with timeout and cancellation (when `stop` is set).
+        Returns the finished MoveRequest; request.move is the move to play.
+        """
+        if not self.wait_idle(agent, stop):
+            request = MoveRequest(agent, state)
+            request.cancel()
+            request.done.set()
+            return request
+        request = self.submit(agent, state)
+        deadline = None if self.timeout is None else request.started + self.timeout
+        while not request.done.wait(0.05):
+            if stop is not None and stop.is_set():
+                request.cancel()
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                request.timed_out = True
+                request.cancel()
+                break
+
+        if not request.done.is_set():
+            # a stopped agent hands back its best move so far; give it a moment
+            request.done.wait(self.grace)
+        if request.done.is_set() and request.error is None:
+            request.move = request.result
+        else:
+            request.move = self.fallback(request)
+            request.fallback = True
+            count("agent.fallback")
+            if not request.done.is_set():
+                self._unfinished[agent] = request
+        if self.current is request:
+            self.current = None
+        return request
+
+    def is_idle(self, agent):
+        """False while a decide() this service gave up on is still running on `agent`."""
+        request = self._unfinished.get(agent)
+        if request is None:
+            return True
+        if request.done.is_set():
+            del self._unfinished[agent]
+            return True
+        return False
+
+    def wait_idle(self, agent, stop=None):
+        """
+        Block until `agent` is idle, so it is never used by two threads at once.
+        Returns False if `stop` was set first.
+        """
+        while not self.is_idle(agent):
+            if stop is not None and stop.is_set():
+                return False
+            self._unfinished[agent].done.wait(0.05)
+        return True
+
+    def fallback(self, request):
+        """
+        The best move the agent published before it was given up on, its
+        best_move() when it has finished (by raising), otherwise any legal move.
+        """
+        moves = self.generator.legal_moves(request.state)
+        if not moves:
+            return None
+        best = request.best_so_far()
+        if best is not None and best in moves:
+            return best
+        best_move = getattr(request.agent, "best_move", None)
+        if best_move is not None and request.done.is_set():
+            try:
+                return best_move(request.state, moves)
+            except Exception:
+                pass
+        return self.rng.choice(moves)
+
+    def cancel_current(self):
+        request = self.current
+        if request is not None:
+            request.cancel()
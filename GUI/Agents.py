@@ -0,0 +1,357 @@
+import math
+import random
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from Belief import MrXTracker
+from Controll import DoubleMove, GameState
+from Distances import load_distances
+from Instrumentation import span
+from MoveGen import DETECTIVES, MR_X, default_generator, winner
+from StateCodec import pack
+
+# MCTS iterations between updates of the published best_so_far move
+PUBLISH_INTERVAL = 32
+
+
+def side_of(player):
+    return MR_X if player == 0 else DETECTIVES
+
+
+def move_key(move):
+    """Hashable identity of a move (Move/DoubleMove are mutable dataclasses)."""
+    if move is None:
+        return None
+    if isinstance(move, DoubleMove):
+        return (move_key(move.first), move_key(move.second))
+    return (move.player, move.from_station, move.to_station, move.type)
+
+
+def observed_key(move):
+    """What the detectives see of a move: Mr X only shows his tickets."""
+    if move is None or move.player != 0:
+        return move_key(move)
+    if isinstance(move, DoubleMove):
+        return (0, move.first.type, move.second.type)
+    return (0, move.type)
+
+
+class Agent(ABC):
+    """
+    A player controller. The game loop calls reset() once with the starting
+    state, observe() after every move anyone plays, and decide() when it is
+    this agent's player's turn. decide() returns a Move, a DoubleMove, or None
+    to pass when there are no legal moves; subclasses must implement it.
+    """
+    name = "Agent"
+
+    def __init__(self, player, seed=None, generator=None):
+        self.player = player
+        self.rng = random.Random(seed)
+        self.generator = generator or default_generator()
+        self.last_stats = {}
+        # Set by AgentService: decide() should wrap up when this event is set
+        self.stop_event = None
+        # Fraction of the thinking budget used by the running decide(), None if unknown
+        self.progress = None
+        # Best move the running decide() has found so far, played if it is given up on
+        self.best_so_far = None
+
+    def reset(self, state):
+        pass
+
+    def observe(self, move, state):
+        pass
+
+    @abstractmethod
+    def decide(self, state):
+        """The move this agent's player makes in `state`."""
+
+
+class RandomAgent(Agent):
+    name = "Random"
+
+    @span("agent.random.decide")
+    def decide(self, state):
+        moves = self.generator.legal_moves(state)
+        return self.rng.choice(moves) if moves else None
+
+
+class GreedyAgent(Agent):
+    """
+    One-ply distance heuristic. Mr X moves to the station furthest from the
+    nearest detective; detectives minimise the expected distance to Mr X
+    under their belief about where he is.
+    """
+    name = "Greedy"
+
+    def __init__(self, player, seed=None, generator=None, distances=None):
+        super().__init__(player, seed, generator)
+        self.distances = distances or load_distances(self.generator.board)
+        self.tracker = MrXTracker(self.generator.board) if player != 0 else None
+
+    def reset(self, state):
+        if self.tracker is not None:
+            self.tracker.reset(excluded=state.player_locs[1:])
+
+    def observe(self, move, state):
+        if self.tracker is not None:
+            self.tracker.observe(move, state)
+
+    @span("agent.greedy.decide")
+    def decide(self, state):
+        moves = self.generator.legal_moves(state)
+        if not moves:
+            return None
+        table = self.distances.table()
+
+        if self.player == 0:
+            detectives = list(state.player_locs[1:])
+            def score(m):
+                # prefer plain moves over spending black/x2 tickets on equal distance
+                return (int(table[detectives, m.to_station].min()), not isinstance(m, DoubleMove))
+            best = max(score(m) for m in moves)
+            return self.rng.choice([m for m in moves if score(m) == best])
+
+        candidates = self.tracker.candidates()
+        probs = self.tracker.probs[candidates]
+        if len(candidates) == 0:
+            return self.rng.choice(moves)
+        def cost(m):
+            return float(table[m.to_station, candidates].astype(np.float64) @ probs)
+        best = min(cost(m) for m in moves)
+        return self.rng.choice([m for m in moves if cost(m) == best])
+
+
+class _Node:
+    __slots__ = ("children", "visits", "wins", "avail")
+
+    def __init__(self):
+        self.children = {}  # key -> _Node
+        self.visits = 0
+        self.wins = 0.0
+        self.avail = 0
+
+    def size(self):
+        count = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children.values())
+        return count
+
+
+class MCTSAgent(Agent):
+    """
+    UCT Monte Carlo Tree Search with a wall-clock and/or iteration budget.
+
+    Mr X searches the true state. Detectives cannot see Mr X, so every
+    iteration starts from a determinisation that puts him on a station
+    sampled from their MrXTracker belief, and Mr X's moves in their tree are
+    keyed by the tickets he shows (information-set MCTS with availability
+    counts). The subtree under the moves actually played is kept between
+    turns. `last_stats` reports iterations, iterations per second and how
+    many nodes were reused.
+    """
+    name = "MCTS"
+
+    def __init__(self, player, seed=None, generator=None, time_budget=1.0, iterations=None,
+                 exploration=0.7, rollout_depth=120, widening=2.0):
+        super().__init__(player, seed, generator)
+        if time_budget is None and iterations is None:
+            raise ValueError("MCTSAgent needs a time_budget or an iteration limit")
+        self.time_budget = time_budget
+        self.iterations = iterations
+        self.exploration = exploration
+        self.rollout_depth = rollout_depth
+        self.widening = widening
+        self.np_rng = np.random.default_rng(seed)
+        self.tracker = MrXTracker(self.generator.board) if player != 0 else None
+        self.key = move_key if player == 0 else observed_key
+        self.root = None
+        self.root_state = None
+
+    def reset(self, state):
+        self.root = None
+        self.root_state = None
+        if self.tracker is not None:
+            self.tracker.reset(excluded=state.player_locs[1:])
+
+    def observe(self, move, state):
+        if self.tracker is not None:
+            self.tracker.observe(move, state)
+        if self.root is not None:
+            self.root = self.root.children.get(self.key(move))
+            self.root_state = pack(state)
+
+    # ---------------- SEARCH ---------------- #
+
+    def _determinise(self, state):
+        if self.tracker is None:
+            return state
+        if not self.tracker.probs.any():
+            self.tracker.reset(excluded=state.player_locs[1:])
+        mr_x = int(self.tracker.sample(self.np_rng)[0])
+        return GameState(state.turn, (mr_x,) + state.player_locs[1:], state.player_cards,
+                         state.current_player, state.victory_flag)
+
+    def _select(self, node, moves):
+        """UCB over the distinct keys of `moves`; returns (key, moves with that key, newly expanded)."""
+        groups = {}
+        for m in moves:
+            groups.setdefault(self.key(m), []).append(m)
+
+        children = node.children
+        untried = []
+        tried = []
+        for k in groups:
+            child = children.get(k)
+            if child is None:
+                untried.append(k)
+            else:
+                child.avail += 1
+                tried.append(k)
+
+        # Progressive widening: Mr X's x2 moves alone give hundreds of options,
+        # so only grow a node's children as it gathers visits.
+        if untried and (not tried or len(children) < self.widening * math.sqrt(node.visits + 1)):
+            k = self.rng.choice(untried)
+            return k, groups[k], True
+
+        c = self.exploration
+        best_key, best_value = None, -1.0
+        for k in tried:
+            child = children[k]
+            value = child.wins / child.visits + c * math.sqrt(math.log(max(child.avail, 1)) / child.visits)
+            if value > best_value:
+                best_key, best_value = k, value
+        return best_key, groups[best_key], False
+
+    def _rollout(self, state):
+        gen = self.generator
+        rng = self.rng
+        for _ in range(self.rollout_depth):
+            if state.victory_flag:
+                break
+            moves = gen.legal_moves(state)
+            state = gen.apply(state, rng.choice(moves) if moves else None)
+        result = winner(state)
+        # Out of rollout depth without a capture counts for Mr X
+        return MR_X if result is None else result
+
+    def _iterate(self, root_state):
+        gen = self.generator
+        state = self._determinise(root_state)
+        node = self.root
+        path = [(node, None)]
+
+        while not state.victory_flag:
+            moves = gen.legal_moves(state) or [None]
+            key, options, expand = self._select(node, moves)
+            mover = side_of(state.current_player)
+            state = gen.apply(state, self.rng.choice(options))
+            if expand:
+                child = _Node()
+                child.avail = 1
+                node.children[key] = child
+                path.append((child, mover))
+                break
+            node = node.children[key]
+            path.append((node, mover))
+
+        result = self._rollout(state)
+        for node, mover in path:
+            node.visits += 1
+            if mover == result:
+                node.wins += 1.0
+
+    @span("agent.mcts.decide")
+    def decide(self, state):
+        start = time.perf_counter()
+        packed = pack(state)
+        if self.root is None or self.root_state != packed:
+            self.root = _Node()
+        self.root_state = packed
+        reused = self.root.size() - 1
+
+        moves = self.generator.legal_moves(state)
+        if not moves:
+            self.last_stats = {"iterations": 0, "elapsed": 0.0, "iterations_per_second": 0.0,
+                               "reused_nodes": reused, "tree_nodes": reused + 1}
+            return None
+
+        deadline = None if self.time_budget is None else start + self.time_budget
+        iterations = 0
+        stop = self.stop_event
+        self.progress = 0.0
+        self.best_so_far = None
+        while True:
+            if stop is not None and stop.is_set():
+                break
+            if self.iterations is not None and iterations >= self.iterations:
+                break
+            if deadline is not None:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                self.progress = (now - start) / self.time_budget
+            else:
+                self.progress = iterations / self.iterations
+            self._iterate(state)
+            iterations += 1
+            if iterations % PUBLISH_INTERVAL == 0:
+                self.best_so_far = self._most_visited(moves)
+        self.progress = 1.0
+
+        best = self.best_move(state, moves)
+        self.best_so_far = best
+        elapsed = time.perf_counter() - start
+        self.last_stats = {
+            "iterations": iterations,
+            "elapsed": elapsed,
+            "iterations_per_second": iterations / elapsed if elapsed > 0 else 0.0,
+            "reused_nodes": reused,
+            "tree_nodes": self.root.size(),
+            "stopped": stop is not None and stop.is_set(),
+        }
+        return best
+
+    def best_move(self, state, moves=None):
+        """Most visited legal move at the root so far (random if nothing was searched)."""
+        moves = moves if moves is not None else self.generator.legal_moves(state)
+        if not moves:
+            return None
+        best = self._most_visited(moves)
+        return best if best is not None else self.rng.choice(moves)
+
+    def _most_visited(self, moves):
+        """Legal move whose root child has the most visits, None before any were expanded."""
+        best, best_visits = None, -1
+        if self.root is not None:
+            for m in moves:
+                child = self.root.children.get(self.key(m))
+                if child is not None and child.visits > best_visits:
+                    best, best_visits = m, child.visits
+        return best
+
+
+# Combobox entries in PlayerHandler.create_player_panel -> agent class (None: human input)
+AGENT_CHOICES = {
+    "Manual X": None,
+    "X Type1": MCTSAgent,
+    "X Type2": GreedyAgent,
+    "Manual": None,
+    "Type 1": MCTSAgent,
+    "Type 2": GreedyAgent,
+}
+
+
+def create_agent(choice, player, **kwargs):
+    """Instantiate the agent behind a combobox entry, or None for manual players."""
+    if choice not in AGENT_CHOICES:
+        raise ValueError(f"unknown agent choice {choice!r}")
+    agent_cls = AGENT_CHOICES[choice]
+    return agent_cls(player, **kwargs) if agent_cls is not None else None
@@ -0,0 +1,307 @@
+"""
+Vectorised game environment: B games stepped at once with NumPy.
+
+Every game is a row of plain arrays,
+
+    locs     (B, P)     station of every player
+    tickets  (B, P, 5)  ticket counts in TICKET_NAMES order
+    turn     (B,)       Mr X moves so far (a double move counts twice)
+    current  (B,)       player to move
+    done     (B,)       GameState.victory_flag
+    winner   (B,)       MR_X, DETECTIVES, or NO_WINNER while running
+
+and follows MoveGen's rules exactly; from_states() / to_state() convert
+to and from Controll.GameState.
+
+A move is an action index into a (2, 4, board.size) grid: plane 0 is a
+plain move, plane 1 the first leg of a double move (it spends the x2
+card), then the kind of ticket (KINDS) and the destination station. Mr X's
+double move is played as two steps: after a plane-1 action the game is
+`pending` and Mr X moves again, with plain moves only. A double first leg
+is only legal when a second leg exists from there, so the double moves the
+environment allows are exactly MoveGen's DoubleMoves. PASS is the action
+for a player without legal moves.
+
+    env = BatchEnv.random(1024, seed=0)
+    while not env.done.all():
+        env.step(env.random_actions(rng))
+"""
+import numpy as np
+
+from Board import TICKET_TRANSPORTS, TRANSPORT_BITS, load_board
+from Controll import TICKET_FOR_TRANSPORT, TICKET_NAMES, DoubleMove, GameState, Move, TransportType, start_cards
+from MoveGen import DETECTIVES, MAX_TURNS, MR_X
+
+NO_WINNER = -1
+PASS = -1
+
+# Ticket kinds of the action grid, the first four columns of `tickets`
+KINDS = TICKET_TRANSPORTS + (TransportType.BLACK,)
+BLACK_KIND = 3
+X2 = TICKET_NAMES.index("x2")
+PLAIN, DOUBLE = 0, 1
+
+
+class BatchEnv:
+    def __init__(self, locs, tickets, turn, current, done, board=None):
+        """Wrap already built arrays; see from_states() and random() for the usual constructors."""
+        self.board = board or load_board()
+        self.locs = np.array(locs, dtype=np.int16)
+        self.tickets = np.array(tickets, dtype=np.int16)
+        self.turn = np.array(turn, dtype=np.int16)
+        self.current = np.array(current, dtype=np.int8)
+        self.done = np.array(done, dtype=bool)
+        self.pending = np.zeros(len(self.locs), dtype=bool)  # Mr X is between the legs of a double move
+
+        batch, players = self.locs.shape
+        if self.tickets.shape != (batch, players, len(TICKET_NAMES)):
+            raise ValueError(f"tickets must be {(batch, players, len(TICKET_NAMES))}, got {self.tickets.shape}")
+        if players < 2:
+            raise ValueError("a game needs Mr X and at least one detective")
+
+        self.size = self.board.size
+        self.n_actions = 2 * self.size * len(KINDS)
+        self.adjacency, self.neighbours = _tables(self.board)
+        self._adjacency_f32 = self.adjacency.astype(np.float32)
+        self.winner = np.full(batch, NO_WINNER, dtype=np.int8)
+        self._update_winner()
+
+    @property
+    def batch_size(self):
+        return len(self.locs)
+
+    @property
+    def players(self):
+        return self.locs.shape[1]
+
+    # ---------------- CONVERSION ---------------- #
+
+    @classmethod
+    def from_states(cls, states, board=None):
+        """Batch of Controll.GameStates; every state needs the same number of players."""
+        states = list(states)
+        if not states:
+            raise ValueError("no states")
+        players = len(states[0].player_locs)
+        if any(len(state.player_locs) != players for state in states):
+            raise ValueError("every state needs the same number of players")
+        tickets = [[[dict(row)[name] for name in TICKET_NAMES] for row in state.player_cards] for state in states]
+        return cls(
+            [state.player_locs for state in states],
+            tickets,
+            [state.turn for state in states],
+            [state.current_player for state in states],
+            [state.victory_flag for state in states],
+            board,
+        )
+
+    @classmethod
+    def random(cls, batch_size, players=6, seed=None, board=None):
+        """`batch_size` fresh games, everyone on a different random station, standard tickets."""
+        board = board or load_board()
+        rng = np.random.default_rng(seed)
+        stations = np.array(board.stations, dtype=np.int16)
+        order = np.argsort(rng.random((batch_size, len(stations))), axis=1)[:, :players]
+        cards = [[count for _, count in start_cards(i, players)] for i in range(players)]
+        return cls(
+            stations[order],
+            np.broadcast_to(np.array(cards, dtype=np.int16), (batch_size, players, len(TICKET_NAMES))),
+            np.zeros(batch_size),
+            np.zeros(batch_size),
+            np.zeros(batch_size, dtype=bool),
+            board,
+        )
+
+    def to_state(self, game):
+        """Game `game` as a Controll.GameState (not possible halfway through a double move)."""
+        if self.pending[game]:
+            raise ValueError(f"game {game} is between the two legs of a double move")
+        return GameState(
+            turn=int(self.turn[game]),
+            player_locs=tuple(int(loc) for loc in self.locs[game]),
+            player_cards=tuple(
+                tuple((name, int(count)) for name, count in zip(TICKET_NAMES, row))
+                for row in self.tickets[game]
+            ),
+            current_player=int(self.current[game]),
+            victory_flag=bool(self.done[game]),
+        )
+
+    def to_states(self):
+        return [self.to_state(game) for game in range(self.batch_size)]
+
+    def action(self, station, kind, double=False):
+        return ((DOUBLE if double else PLAIN) * len(KINDS) + kind) * self.size + station
+
+    def encode(self, move):
+        """Actions playing a Controll Move / DoubleMove (two actions) / None (pass)."""
+        if move is None:
+            return [PASS]
+        if isinstance(move, DoubleMove):
+            return [self.action(move.first.to_station, _kind(move.first.type), double=True),
+                    self.action(move.second.to_station, _kind(move.second.type))]
+        return [self.action(move.to_station, _kind(move.type))]
+
+    def decode(self, game, action):
+        """The Controll Move `action` plays in game `game` (None for PASS); doubles decode leg by leg."""
+        if action == PASS:
+            return None
+        player = int(self.current[game])
+        kind = (action // self.size) % len(KINDS)
+        return Move(player, int(self.locs[game, player]), int(action % self.size), KINDS[kind])
+
+    # ---------------- RULES ---------------- #
+
+    def _free(self):
+        """(B, size) True where no detective stands."""
+        free = np.ones((self.batch_size, self.size), dtype=bool)
+        rows = np.repeat(np.arange(self.batch_size), self.players - 1)
+        free[rows, self.locs[:, 1:].ravel()] = False
+        return free
+
+    def legal_mask(self):
+        """(B, n_actions) bool; a row without any True has to PASS (or is already done)."""
+        batch = self.batch_size
+        rows = np.arange(batch)
+        player = self.current.astype(np.intp)
+        station = self.locs[rows, player]
+        counts = self.tickets[rows, player, :len(KINDS)]  # (B, 4)
+        free = self._free()
+
+        usable = counts > 0
+        usable[:, BLACK_KIND] &= player == MR_X  # detectives never hold black tickets anyway
+        usable[self.done] = False
+
+        mask = np.zeros((batch, 2, len(KINDS), self.size), dtype=bool)
+        plain = mask[:, PLAIN]
+        # gather each game's rows of the board, every ticket kind at once: (B, 4, size)
+        np.logical_and(self.adjacency[station], free[:, None, :], out=plain)
+        plain &= usable[:, :, None]
+
+        can_double = (~self.done & ~self.pending & (player == MR_X)
+                      & (self.tickets[rows, MR_X, X2] > 0) & (self.turn + 2 <= MAX_TURNS))
+        if can_double.any():
+            mask[can_double, DOUBLE] = plain[can_double] & self._second_leg_exists(free[can_double], counts[can_double])
+
+        return mask.reshape(batch, self.n_actions)
+
+    def _second_leg_exists(self, free, counts):
+        """
+        (n, 4, size): Mr X, having reached station d with a ticket of kind k,
+        can still make a move from d with the tickets he has left.
+        """
+        # moves[b, k2, d]: some free neighbour of d is reachable by kind k2
+        free = free.astype(np.float32)
+        moves = np.stack([free @ self._adjacency_f32[:, k].T for k in range(len(KINDS))], axis=1) > 0
+        # left[b, k, k2]: a kind-k2 ticket is left after spending one of kind k
+        left = (counts[:, None, :] - np.eye(len(KINDS), dtype=counts.dtype)[None]) > 0
+        # exists[b, k, d] = any over k2 of left[b, k, k2] and moves[b, k2, d]
+        return left.astype(np.float32) @ moves.astype(np.float32) > 0
+
+    def step(self, actions, validate=True):
+        """
+        Play one action per game (PASS for players without moves; finished games
+        ignore theirs). Returns (done, winner). With `validate`, an illegal action
+        raises ValueError before anything is changed.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.shape != (self.batch_size,):
+            raise ValueError(f"expected {self.batch_size} actions, got shape {actions.shape}")
+        active = ~self.done
+        passes = active & (actions == PASS)
+        moves = active & ~passes
+
+        if validate:
+            mask = self.legal_mask()
+            has_moves = mask.any(axis=1)
+            in_range = np.flatnonzero(moves & (actions >= 0) & (actions < self.n_actions))
+            legal = np.zeros(self.batch_size, dtype=bool)
+            legal[in_range] = mask[in_range, actions[in_range]]
+            bad = (moves & ~legal) | (passes & has_moves)
+            if bad.any():
+                game = int(np.flatnonzero(bad)[0])
+                raise ValueError(f"illegal action {int(actions[game])} in game {game}")
+
+        rows = np.flatnonzero(moves)
+        player = self.current[rows].astype(np.intp)
+        station = actions[rows] % self.size
+        kind = (actions[rows] // self.size) % len(KINDS)
+        double = actions[rows] // (len(KINDS) * self.size) == DOUBLE
+
+        self.locs[rows, player] = station
+        np.subtract.at(self.tickets, (rows, player, kind), 1)
+        mrx = player == MR_X
+        self.turn[rows[mrx]] += 1
+        # tickets the detectives spend go to Mr X
+        np.add.at(self.tickets, (rows[~mrx], MR_X, kind[~mrx]), 1)
+        self.tickets[rows[double], MR_X, X2] -= 1
+        self.pending[rows[double]] = True
+
+        # Mr X passing means he is stuck: the game ends with him still to move
+        stuck = passes & (self.current == MR_X)
+        self.done |= stuck
+
+        finished = np.zeros(self.batch_size, dtype=bool)
+        finished[rows[~double]] = True
+        finished |= passes & ~stuck
+        self.pending[finished] = False
+        self.current[finished] = (self.current[finished] + 1) % self.players
+        caught = (self.locs[:, 1:] == self.locs[:, :1]).any(axis=1)
+        self.done |= finished & (caught | ((self.current == MR_X) & (self.turn >= MAX_TURNS)))
+
+        self._update_winner()
+        return self.done, self.winner
+
+    def _update_winner(self):
+        caught = (self.locs[:, 1:] == self.locs[:, :1]).any(axis=1)
+        stuck = (self.current == MR_X) & (self.turn < MAX_TURNS)
+        self.winner[:] = np.where(~self.done, NO_WINNER, np.where(caught | stuck, DETECTIVES, MR_X))
+
+    def random_actions(self, rng, mask=None):
+        """A uniformly random legal action per game (PASS when there is none); `rng` is a numpy Generator."""
+        mask = self.legal_mask() if mask is None else mask
+        batch = self.batch_size
+        rows = np.arange(batch)
+        # Every move goes to a neighbour of the mover's station, so only those
+        # columns of the mask need looking at: (B, 2 * 4, max degree)
+        columns = self.neighbours[self.locs[rows, self.current.astype(np.intp)]]
+        grid = mask.reshape(batch, 2 * len(KINDS), self.size)
+        candidates = np.take_along_axis(grid, columns[:, None, :], axis=2)
+
+        scores = np.where(candidates, rng.random(candidates.shape, dtype=np.float32), -1.0)
+        flat = scores.reshape(batch, -1).argmax(axis=1)
+        plane_kind, slot = np.divmod(flat, columns.shape[1])
+        actions = plane_kind * self.size + columns[rows, slot]
+        return np.where(candidates.reshape(batch, -1).any(axis=1), actions, PASS)
+
+
+def _kind(transport):
+    if TICKET_FOR_TRANSPORT[transport] == "black":
+        return BLACK_KIND
+    return KINDS.index(transport)
+
+
+_tables_cache = {}  # Board -> (adjacency, neighbours)
+
+
+def _tables(board):
+    """
+    adjacency: (size, 4, size) bool, [a, k, b] when a ticket of kind k takes you from a to b.
+    neighbours: (size, max degree) neighbour ids of every station, padded with the unused station 0.
+    """
+    tables = _tables_cache.get(board)
+    if tables is None:
+        adjacency = np.zeros((board.size, len(KINDS), board.size), dtype=bool)
+        degree = max((len(row) for row in board.adjacency), default=0)
+        neighbours = np.zeros((board.size, max(1, degree)), dtype=np.intp)
+        for station in range(board.size):
+            for n, (neighbour, mask) in enumerate(board.adjacency[station]):
+                for k, transport in enumerate(TICKET_TRANSPORTS):
+                    if mask & TRANSPORT_BITS[transport]:
+                        adjacency[station, k, neighbour] = True
+                adjacency[station, BLACK_KIND, neighbour] = True
+                neighbours[station, n] = neighbour
+        adjacency.flags.writeable = False
+        neighbours.flags.writeable = False
+        tables = _tables_cache[board] = (adjacency, neighbours)
+    return tables
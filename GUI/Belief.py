@@ -0,0 +1,132 @@
+import numpy as np
+
+from Board import TICKET_TRANSPORTS, TRANSPORT_BITS, load_board
+from Controll import DoubleMove, TransportType
+from MoveGen import REVEAL_TURNS
+
+
+def transition_matrices(board):
+    """Row-normalised adjacency matrix per transport, built once per board and shared."""
+    transitions = _transitions.get(board)
+    if transitions is not None:
+        return transitions
+
+    size = board.size
+    adjacency = {t: np.zeros((size, size), dtype=np.float64) for t in TICKET_TRANSPORTS}
+    adjacency[TransportType.BLACK] = np.zeros((size, size), dtype=np.float64)
+    for station in range(size):
+        for neighbour, mask in board.adjacency[station]:
+            adjacency[TransportType.BLACK][station, neighbour] = 1.0
+            for transport in TICKET_TRANSPORTS:
+                if mask & TRANSPORT_BITS[transport]:
+                    adjacency[transport][station, neighbour] = 1.0
+
+    transitions = {}
+    for transport, matrix in adjacency.items():
+        degree = matrix.sum(axis=1, keepdims=True)
+        np.divide(matrix, degree, out=matrix, where=degree > 0)
+        matrix.flags.writeable = False
+        transitions[transport] = matrix
+    # Boat edges can only be taken with a black ticket
+    transitions[TransportType.BOAT] = transitions[TransportType.BLACK]
+
+    _transitions[board] = transitions
+    return transitions
+
+
+_transitions = {}  # Board -> {TransportType: matrix}, keyed on the board itself rather than its id()
+
+
+class MrXTracker:
+    """
+    The detectives' belief about where Mr X is.
+
+    `probs` is a probability vector over station ids. Each Mr X move is one
+    vector-matrix product with the row-normalised adjacency of the transport
+    he used (he is assumed to pick uniformly among the matching edges), after
+    which stations held by detectives are zeroed and the vector renormalised.
+    `possible` is the boolean support of `probs`.
+    """
+    def __init__(self, board=None):
+        self.board = board or load_board()
+        size = self.board.size
+        self.transitions = transition_matrices(self.board)
+
+        self._stations = np.zeros(size, dtype=bool)
+        self._stations[self.board.stations] = True
+        self.probs = np.zeros(size, dtype=np.float64)
+        self.reset()
+
+    # ---------------- STATE ---------------- #
+
+    @property
+    def possible(self):
+        return self.probs > 0
+
+    def candidates(self):
+        """Station ids Mr X may be on."""
+        return np.flatnonzero(self.probs)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.probs))
+
+    def reset(self, station=None, excluded=()):
+        """
+        Start over: Mr X is known to be on `station` (reveal turn), or, when
+        `station` is None, anywhere except the `excluded` stations.
+        """
+        self.probs[:] = 0.0
+        if station is not None:
+            self.probs[station] = 1.0
+            return
+        self.probs[self._stations] = 1.0
+        self.remove(excluded)
+
+    def remove(self, stations):
+        """Rule out `stations`, e.g. the ones detectives are standing on."""
+        stations = list(stations)
+        if stations:
+            self.probs[stations] = 0.0
+        self._normalise()
+
+    def _normalise(self):
+        total = self.probs.sum()
+        if total > 0:
+            self.probs /= total
+
+    # ---------------- UPDATES ---------------- #
+
+    def advance(self, transport, detective_locs=()):
+        """Propagate the belief along one Mr X move made with `transport`."""
+        self.probs = self.probs @ self.transitions[transport]
+        self.remove(detective_locs)
+
+    def observe(self, move, state):
+        """
+        Feed one played move and the state after it into the tracker.
+
+        Mr X's moves advance the belief by their transport (both legs of a
+        double move) and collapse it to his station on reveal turns.
+        A detective's move removes the station they moved to.
+        """
+        detectives = state.player_locs[1:]
+        if move is None:
+            return
+        if move.player != 0:
+            self.remove((move.to_station,))
+            return
+
+        legs = (move.first, move.second) if isinstance(move, DoubleMove) else (move,)
+        turn = state.turn - len(legs)
+        for leg in legs:
+            turn += 1
+            if turn in REVEAL_TURNS:
+                self.reset(leg.to_station)
+            else:
+                self.advance(leg.type, detectives)
+
+    def sample(self, rng, k=1):
+        """Draw `k` stations from the belief, using a numpy Generator."""
+        if not self.probs.any():
+            return np.zeros(0, dtype=np.int64)
+        return rng.choice(self.probs.size, size=k, p=self.probs)
@@ -0,0 +1,521 @@
+"""
+Benchmark suite for the board, move generation, agents and GUI redraws.
+
+    python Benchmarks.py                                   # run all, write ../bench_output.txt
+    python Benchmarks.py --only movegen --quick
+    python Benchmarks.py --baseline baseline.json          # compare, exit 1 on regressions
+    xvfb-run -a python Benchmarks.py --only gui            # GUI timings need a display
+
+Results are JSON: run metadata plus per benchmark the median / min / mean
+seconds per call and calls per second. With --baseline every benchmark is
+compared on its median, and anything slower than the tolerance is reported.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, os.pardir, "bench_output.txt")
+RESULTS_VERSION = 1
+DEFAULT_TOLERANCE = 0.2
+
+_benchmarks = {}
+_teardowns = []
+
+
+class Skip(Exception):
+    """Raised by a benchmark's setup when it cannot run here (no display, no native engine...)."""
+
+
+def benchmark(name, number=None):
+    """
+    Register `setup` as benchmark `name`. The setup does the untimed
+    preparation and returns the zero-argument callable that is timed.
+    `number` fixes the calls per repeat instead of calibrating it.
+    """
+    def register(setup):
+        _benchmarks[name] = (setup, number)
+        return setup
+    return register
+
+
+def teardown(fn):
+    """Have the runner call `fn` once the benchmark being set up has been measured (or skipped)."""
+    _teardowns.append(fn)
+    return fn
+
+
+def measure(fn, number=None, repeat=5, min_time=0.2):
+    """Time `fn` in `repeat` batches of `number` calls; seconds per call statistics."""
+    if number is None:
+        # calibrate so that one batch runs for at least min_time / repeat
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            if time.perf_counter() - start >= min_time / repeat or number >= 1 << 20:
+                break
+            number *= 2
+
+    per_call = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - start) / number)
+
+    median = statistics.median(per_call)
+    return {
+        "median_s": median,
+        "min_s": min(per_call),
+        "mean_s": statistics.fmean(per_call),
+        "stdev_s": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        "ops_per_s": 1.0 / median if median > 0 else float("inf"),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+# ---------------- SHARED FIXTURES ---------------- #
+
+def _positions(count, seed=0):
+    """Game states sampled from random games, for move generation benchmarks."""
+    import Controll
+    from Board import load_board
+    from MoveGen import default_generator
+
+    generator = default_generator()
+    stations = load_board().stations
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = Controll.initial_state(rng.sample(stations, 6))
+        while not state.victory_flag and len(positions) < count:
+            positions.append(state)
+            moves = generator.legal_moves(state)
+            state = generator.apply(state, rng.choice(moves) if moves else None)
+    return positions
+
+
+def _cycle(items):
+    """Zero-argument callable returning the items round-robin."""
+    index = [0]
+
+    def next_item():
+        item = items[index[0]]
+        index[0] = (index[0] + 1) % len(items)
+        return item
+    return next_item
+
+
+# ---------------- BOARD & STATIONS ---------------- #
+
+@benchmark("stations.read_stops")
+def bench_read_stops():
+    import Controll
+    path = os.path.join(HERE, "station_locations.json")
+    return lambda: Controll.ReadStops(path)
+
+
+@benchmark("stations.select_station")
+def bench_select_station():
+    controller = _controller()
+    clicks = _cycle([(node.x + dx, node.y + dy) for node in controller.stopList for dx, dy in ((0, 0), (9, -7))])
+
+    def run():
+        x, y = clicks()
+        controller.select_station(x, y)
+    return run
+
+
+@benchmark("stations.nearest_station")
+def bench_nearest_station():
+    controller = _controller()
+    clicks = _cycle([(node.x + 5, node.y - 5) for node in controller.stopList])
+
+    def run():
+        x, y = clicks()
+        controller.nearest_station(x, y)
+    return run
+
+
+@benchmark("stations.get_station_coords")
+def bench_get_station_coords():
+    controller = _controller()
+    ids = _cycle([node.id for node in controller.stopList])
+    return lambda: controller.get_station_coords(ids())
+
+
+@benchmark("stations.get_canvas_coords_6")
+def bench_get_canvas_coords():
+    controller = _controller()
+    stations = [node.id for node in controller.stopList]
+    groups = _cycle([stations[i:i + 6] for i in range(0, len(stations) - 6, 6)])
+    return lambda: controller.get_canvas_coords(groups(), 0.43, 0.43, 12, 8)
+
+
+@benchmark("board.load_graph")
+def bench_load_graph():
+    from Board import GRAPH_PATH, Board, parse_graph
+    with open(GRAPH_PATH, "rb") as f:
+        data = f.read()
+
+    def run():
+        edges, anomalies = parse_graph(json.loads(data))
+        Board(edges, "", anomalies)
+    return run
+
+
+@benchmark("board.load_cached")
+def bench_load_cached():
+    import Board
+    Board.load_board()  # make sure the cache file exists
+
+    def run():
+        Board._boards.clear()
+        Board.load_board()
+    return run
+
+
+@benchmark("board.distance_tables_build", number=1)
+def bench_distance_tables():
+    from Board import load_board
+    from Distances import build_tables
+    board = load_board()
+    return lambda: build_tables(board)
+
+
+_controllers = []
+
+
+def _controller():
+    if not _controllers:
+        import Controll
+        _controllers.append(Controll.GameControll())
+    return _controllers[0]
+
+
+# ---------------- MOVE GENERATION ---------------- #
+
+@benchmark("movegen.legal_moves")
+def bench_legal_moves():
+    from MoveGen import default_generator
+    generator = default_generator()
+    states = _cycle(_positions(2000))
+    return lambda: generator.legal_moves(states())
+
+
+@benchmark("movegen.apply")
+def bench_apply():
+    from MoveGen import default_generator
+    generator = default_generator()
+    pairs = []
+    for state in _positions(2000, seed=1):
+        moves = generator.legal_moves(state)
+        pairs.append((state, moves[0] if moves else None))
+    pairs = _cycle(pairs)
+
+    def run():
+        state, move = pairs()
+        generator.apply(state, move)
+    return run
+
+
+@benchmark("movegen.board_legal_moves")
+def bench_board_legal_moves():
+    from Board import load_board
+    board = load_board()
+    states = _cycle(_positions(2000, seed=2))
+
+    def run():
+        state = states()
+        board.legal_moves(state.player_locs[state.current_player], state.player_cards[state.current_player],
+                          blocked=state.player_locs[1:])
+    return run
+
+
+@benchmark("statecodec.pack_unpack")
+def bench_pack_unpack():
+    from StateCodec import pack, unpack
+    states = _cycle(_positions(2000, seed=3))
+    return lambda: unpack(pack(states()))
+
+
+# ---------------- GAMES & AGENTS ---------------- #
+
+def _game_runner(mrx, detectives, seed=0):
+    import Simulator
+    from Board import load_board
+    board = load_board()
+    rng = random.Random(seed)
+
+    def run():
+        game_seed = rng.randrange(1 << 30)
+        agents = Simulator.make_agents(mrx, detectives, 6, game_seed)
+        Simulator.play_game(agents, Simulator.random_start(6, random.Random(game_seed), board))
+    return run
+
+
+@benchmark("games.random_vs_random")
+def bench_random_games():
+    return _game_runner(("random", {}), ("random", {}))
+
+
+@benchmark("games.greedy_vs_greedy")
+def bench_greedy_games():
+    return _game_runner(("greedy", {}), ("greedy", {}))
+
+
+@benchmark("agents.mcts_decide_50_iterations", number=4)
+def bench_mcts_decide():
+    import Agents
+    states = _cycle(_positions(64, seed=4))
+
+    def run():
+        state = states()
+        agent = Agents.MCTSAgent(state.current_player, seed=0, time_budget=None, iterations=50)
+        agent.reset(state)
+        agent.decide(state)
+    return run
+
+
+@benchmark("batchenv.random_games_1024", number=1)
+def bench_batch_env():
+    import numpy as np
+    from BatchEnv import BatchEnv
+    rng = np.random.default_rng(0)
+
+    def run():
+        env = BatchEnv.random(1024, seed=int(rng.integers(1 << 30)))
+        while not env.done.all():
+            env.step(env.random_actions(rng), validate=False)
+    return run
+
+
+@benchmark("batchenv.legal_mask_1024")
+def bench_batch_legal_mask():
+    import numpy as np
+    from BatchEnv import BatchEnv
+    env = BatchEnv.random(1024, seed=0)
+    rng = np.random.default_rng(0)
+    for _ in range(9):  # into the game, with detectives and Mr X to move across the batch
+        env.step(env.random_actions(rng))
+    return env.legal_mask
+
+
+@benchmark("native.random_games")
+def bench_native_games():
+    engine_dir = os.path.join(HERE, os.pardir, "ENGINE")
+    if engine_dir not in sys.path:
+        sys.path.insert(0, engine_dir)
+    try:
+        import engine
+    except ImportError:
+        raise Skip("native engine not built (cd ENGINE && python setup.py build_ext --inplace)")
+    board = engine.Board.load(os.path.join(HERE, os.pardir, "graph.json"))
+    native = engine.Engine(board, [engine.Agent.random(board) for _ in range(6)])
+    seeds = _cycle(list(range(1000)))
+    return lambda: native.play(native.random_start(7, seeds()), 7)
+
+
+# ---------------- STARTUP ---------------- #
+
+def _import_in_subprocess(module):
+    """Fresh interpreter importing `module`: module import cost plus interpreter start."""
+    command = [sys.executable, "-c", f"import {module}"]
+
+    def run():
+        subprocess.run(command, cwd=HERE, check=True)
+    return run
+
+
+@benchmark("startup.import_gui", number=3)
+def bench_import_gui():
+    return _import_in_subprocess("Graphics")
+
+
+@benchmark("startup.import_headless", number=3)
+def bench_import_headless():
+    return _import_in_subprocess("Simulator")
+
+
+# ---------------- GUI ---------------- #
+
+def _map_window():
+    """Tk root with a ClickableMap, or Skip when there is no display."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as exc:
+        raise Skip(f"no display ({exc.__class__.__name__}); run under xvfb-run")
+    # a root left alive would keep its canvas and images around for the benchmarks after it
+    teardown(root.destroy)
+    root.geometry("1200x900")
+
+    from PIL import Image
+    import Graphics
+
+    controller = _controller()
+    map_path = os.path.join(HERE, "map.png")
+    if not os.path.exists(map_path):
+        # stand-in of the same extent as the station coordinates
+        width = max(node.x for node in controller.stopList) + 50
+        height = max(node.y for node in controller.stopList) + 50
+        map_path = os.path.join(HERE, os.pardir, ".bench_map.png")
+        Image.new("RGB", (width, height), "white").save(map_path)
+
+    if controller.state is None:
+        for _ in range(6):
+            controller.add_player()
+    map_obj = Graphics.ClickableMap(root, map_path, controller)
+    root.update()
+    return root, map_obj, controller
+
+
+class _Event:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+
+@benchmark("gui.on_resize", number=20)
+def bench_on_resize():
+    root, map_obj, _ = _map_window()
+    sizes = _cycle([_Event(900 + 7 * i, 700 + 5 * i) for i in range(40)])
+
+    def run():
+        map_obj.on_resize(sizes())
+        root.update_idletasks()
+    return run
+
+
+@benchmark("gui.finish_resize", number=5)
+def bench_finish_resize():
+    root, map_obj, _ = _map_window()
+    sizes = _cycle([_Event(900 + 11 * i, 700 + 9 * i) for i in range(40)])
+
+    def run():
+        map_obj.on_resize(sizes())
+        map_obj._finish_resize()
+        root.update_idletasks()
+    return run
+
+
+@benchmark("gui.draw_full_state", number=50)
+def bench_draw_full_state():
+    root, map_obj, _ = _map_window()
+    map_obj.on_resize(_Event(1100, 800))
+    states = _cycle(_positions(200, seed=5))
+
+    def run():
+        map_obj.draw_full_state(states(), animate=False)
+        root.update_idletasks()
+    return run
+
+
+# ---------------- RUNNER ---------------- #
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(patterns=None, repeat=5, min_time=0.2):
+    results = {}
+    skipped = {}
+    for name, (setup, number) in _benchmarks.items():
+        if patterns and not any(fnmatch.fnmatch(name, p) or name.startswith(p) for p in patterns):
+            continue
+        try:
+            results[name] = measure(setup(), number=number, repeat=repeat, min_time=min_time)
+        except Skip as reason:
+            skipped[name] = str(reason)
+        finally:
+            while _teardowns:
+                _teardowns.pop()()
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "benchmarks": results,
+        "skipped": skipped,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Per benchmark in both runs: (name, baseline median, current median, ratio, regressed)."""
+    rows = []
+    previous = baseline.get("benchmarks", {})
+    for name, current in results["benchmarks"].items():
+        if name not in previous:
+            continue
+        before = previous[name]["median_s"]
+        ratio = current["median_s"] / before if before > 0 else float("inf")
+        rows.append((name, before, current["median_s"], ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def _format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e3), ("us", 1e6)):
+        if seconds * scale >= 1:
+            return f"{seconds * scale:8.2f} {unit}"
+    return f"{seconds * 1e9:8.1f} ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--only", nargs="+", metavar="PATTERN", help="benchmark names or prefixes/globs")
+    parser.add_argument("--out", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown before a benchmark counts as regressed (0.2 = 20%%)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="shorter timing runs")
+    parser.add_argument("--list", action="store_true", help="list benchmark names")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(_benchmarks))
+        return 0
+
+    results = run_benchmarks(args.only, repeat=3 if args.quick else args.repeat,
+                             min_time=0.05 if args.quick else 0.2)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for name, stats in results["benchmarks"].items():
+        print(f"{name:40s} {_format_time(stats['median_s'])}/call  {stats['ops_per_s']:12.1f}/s")
+    for name, reason in results["skipped"].items():
+        print(f"{name:40s} skipped: {reason}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    regressions = 0
+    print(f"\ncompared with {args.baseline} (commit {baseline.get('meta', {}).get('commit')}):")
+    for name, before, after, ratio, regressed in compare(results, baseline, args.tolerance):
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:40s} {_format_time(before)} -> {_format_time(after)}  x{ratio:5.2f}{flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from Controll import TICKET_FOR_TRANSPORT, TransportType
+
+GRAPH_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "graph.json")
+CACHE_PATH = os.path.join(os.path.dirname(GRAPH_PATH), "graph.board.bin")
+
+# Bumped whenever parse_graph's rules change, so caches built from an older
+# parse of the same graph.json are rebuilt
+PARSER_VERSION = 2
+
+CACHE_MAGIC = b"SYBOARD\0"
+CACHE_VERSION = 2
+# magic, version, PARSER_VERSION, station count, edge count, sha256(graph.json); padded
+# to 64 bytes, then offsets (int32), neighbours (int32), transports (uint8) and the
+# anomalies as JSON
+_CACHE_HEADER = struct.Struct("<8sIIII32s")
+CACHE_HEADER_SIZE = 64
+
+# Bit of each transport in the per-edge / per-station masks
+TRANSPORT_BITS = {
+    TransportType.TAXI: 1,
+    TransportType.BUS: 2,
+    TransportType.TUBE: 4,
+    TransportType.BOAT: 8,
+}
+
+# graph.json weight code -> transports that run along that edge.
+# The codes are the TAXI/BUS/TUBE bits above added together.
+WEIGHT_CODES = {
+    1: (TransportType.TAXI,),
+    2: (TransportType.BUS,),
+    3: (TransportType.TAXI, TransportType.BUS),
+    4: (TransportType.TUBE,),
+    5: (TransportType.TAXI, TransportType.TUBE),
+    6: (TransportType.BUS, TransportType.TUBE),
+}
+
+# Transports a normal ticket can pay for, in ticket order
+TICKET_TRANSPORTS = (TransportType.TAXI, TransportType.BUS, TransportType.TUBE)
+
+
+def mask_of(transports):
+    mask = 0
+    for transport in transports:
+        mask |= TRANSPORT_BITS[transport]
+    return mask
+
+
+def transports_of(mask):
+    return tuple(t for t, bit in TRANSPORT_BITS.items() if mask & bit)
+
+
+class Board:
+    """
+    The board graph compiled into CSR arrays.
+
+    Station `s` connects to `neighbours[offsets[s]:offsets[s + 1]]`, and
+    `transports` holds the TRANSPORT_BITS mask of each of those edges.
+    `station_mask[s]` is the OR of every edge mask leaving `s`. Arrays are
+    indexed directly by station id (index 0 is an empty, unused station).
+    """
+    def __init__(self, edges, graph_hash="", anomalies=()):
+        """`edges` maps station id -> {neighbour id: transport mask}."""
+        size = max(
+            [s for s in edges] + [n for targets in edges.values() for n in targets],
+            default=0,
+        ) + 1
+
+        offsets = np.zeros(size + 1, dtype=np.int32)
+        neighbours = []
+        transports = []
+        for station in range(size):
+            targets = edges.get(station, {})
+            for neighbour in sorted(targets):
+                neighbours.append(neighbour)
+                transports.append(targets[neighbour])
+            offsets[station + 1] = len(neighbours)
+
+        self._set_csr(offsets, np.array(neighbours, dtype=np.int32),
+                      np.array(transports, dtype=np.uint8), graph_hash, anomalies)
+
+    @classmethod
+    def from_csr(cls, offsets, neighbours, transports, graph_hash="", anomalies=()):
+        """Board from already compiled CSR arrays, as stored in the board cache."""
+        board = cls.__new__(cls)
+        board._set_csr(offsets, neighbours, transports, graph_hash, anomalies)
+        return board
+
+    def _set_csr(self, offsets, neighbours, transports, graph_hash, anomalies):
+        size = len(offsets) - 1
+        offset_list = offsets.tolist()
+        neighbour_list = neighbours.tolist()
+        transport_list = transports.tolist()
+
+        station_mask = np.zeros(size, dtype=np.uint8)
+        for station in range(size):
+            for mask in transport_list[offset_list[station]:offset_list[station + 1]]:
+                station_mask[station] |= mask
+
+        self.size = size
+        self.offsets = offsets
+        self.neighbours = neighbours
+        self.transports = transports
+        self.station_mask = station_mask
+        self.graph_hash = graph_hash
+        self.anomalies = list(anomalies)
+
+        for arr in (self.offsets, self.neighbours, self.transports, self.station_mask):
+            arr.flags.writeable = False
+
+        # Plain-Python mirror of the CSR rows: iterating tuples beats indexing numpy scalars
+        self.adjacency = tuple(
+            tuple(zip(neighbour_list[offset_list[s]:offset_list[s + 1]],
+                      transport_list[offset_list[s]:offset_list[s + 1]]))
+            for s in range(size)
+        )
+
+    @property
+    def stations(self):
+        return [s for s in range(self.size) if self.offsets[s] != self.offsets[s + 1]]
+
+    @property
+    def edge_count(self):
+        return len(self.neighbours)
+
+    def neighbours_of(self, station, transport=None):
+        """Neighbour ids of `station`, optionally only those served by `transport`."""
+        if not 0 <= station < self.size:
+            return []
+        if transport is None:
+            return [n for n, _ in self.adjacency[station]]
+        bit = TRANSPORT_BITS[transport]
+        return [n for n, mask in self.adjacency[station] if mask & bit]
+
+    def offers(self, station, transport):
+        return 0 <= station < self.size and bool(self.station_mask[station] & TRANSPORT_BITS[transport])
+
+    def legal_moves(self, station, tickets, blocked=()):
+        """
+        Every (to_station, TransportType) a player on `station` can pay for.
+
+        `tickets` is either a {name: count} dict or the ((name, count), ...)
+        pairs stored in GameState.player_cards. A black ticket pays for any
+        edge, boat included, and is reported as TransportType.BLACK.
+        Destinations in `blocked` are skipped.
+        """
+        if not 0 <= station < self.size:
+            return []
+        counts = dict(tickets)
+        usable = 0
+        for transport in TICKET_TRANSPORTS:
+            if counts.get(TICKET_FOR_TRANSPORT[transport], 0) > 0:
+                usable |= TRANSPORT_BITS[transport]
+        black = counts.get(TICKET_FOR_TRANSPORT[TransportType.BLACK], 0) > 0
+
+        moves = []
+        for neighbour, mask in self.adjacency[station]:
+            if neighbour in blocked:
+                continue
+            hit = mask & usable
+            if hit:
+                for transport in TICKET_TRANSPORTS:
+                    if hit & TRANSPORT_BITS[transport]:
+                        moves.append((neighbour, transport))
+            if black:
+                moves.append((neighbour, TransportType.BLACK))
+        return moves
+
+
+def parse_graph(raw, strict=False):
+    """
+    Validate the decoded graph.json dict and return ({station: {neighbour: mask}}, anomalies).
+
+    The `_comment` key is ignored, self-loops and unknown weight codes are
+    dropped (or raise ValueError when `strict`), and every edge is made
+    symmetric since movement on the board is undirected. An edge whose
+    reverse direction is missing or has another weight code is still merged
+    into the union of both codes, but is reported (or rejected when `strict`).
+    """
+    edges = {}
+    anomalies = []
+    declared = {}  # (station, neighbour) -> weight code as listed in the file
+
+    def reject(message):
+        if strict:
+            raise ValueError(message)
+        anomalies.append(message)
+
+    for key, targets in raw.items():
+        if key == "_comment":
+            if not isinstance(targets, str):
+                reject("_comment must be a string")
+            continue
+        if not key.isdigit() or not isinstance(targets, dict):
+            reject(f"invalid station entry {key!r}")
+            continue
+        station = int(key)
+        edges.setdefault(station, {})
+        for neighbour_key, code in targets.items():
+            if not str(neighbour_key).isdigit():
+                reject(f"station {station}: invalid neighbour {neighbour_key!r}")
+                continue
+            neighbour = int(neighbour_key)
+            if neighbour == station:
+                reject(f"station {station}: self-loop dropped")
+                continue
+            if code not in WEIGHT_CODES:
+                reject(f"station {station} -> {neighbour}: unknown weight code {code!r}")
+                continue
+            declared[station, neighbour] = code
+            mask = mask_of(WEIGHT_CODES[code])
+            edges[station][neighbour] = edges[station].get(neighbour, 0) | mask
+            edges.setdefault(neighbour, {})
+            edges[neighbour][station] = edges[neighbour].get(station, 0) | mask
+
+    for (station, neighbour), code in declared.items():
+        reverse = declared.get((neighbour, station))
+        if reverse is None:
+            reject(f"station {station} -> {neighbour}: weight code {code}, but {neighbour} -> {station} is not listed")
+        elif reverse != code:
+            reject(f"station {station} -> {neighbour}: weight code {code}, but {neighbour} -> {station} has {reverse}")
+
+    return edges, anomalies
+
+
+def _read_cache(path, graph_digest):
+    """Board stored at `path`, or None when it is missing, stale, corrupt or from another format or parser version."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < CACHE_HEADER_SIZE:
+        return None
+    magic, version, parser_version, size, edge_count, digest = _CACHE_HEADER.unpack_from(data)
+    if (magic != CACHE_MAGIC or version != CACHE_VERSION or parser_version != PARSER_VERSION
+            or digest != graph_digest):
+        return None
+    offsets_end = CACHE_HEADER_SIZE + 4 * (size + 1)
+    neighbours_end = offsets_end + 4 * edge_count
+    transports_end = neighbours_end + edge_count
+    if len(data) < transports_end:
+        return None
+    offsets = np.frombuffer(data, dtype="<i4", count=size + 1, offset=CACHE_HEADER_SIZE).astype(np.int32)
+    neighbours = np.frombuffer(data, dtype="<i4", count=edge_count, offset=offsets_end).astype(np.int32)
+    transports = np.frombuffer(data, dtype=np.uint8, count=edge_count, offset=neighbours_end).copy()
+    try:
+        anomalies = json.loads(data[transports_end:].decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        return None  # truncated or corrupt tail: parse graph.json again
+    if not isinstance(anomalies, list):
+        return None
+    return Board.from_csr(offsets, neighbours, transports, digest.hex(), anomalies)
+
+
+def _write_cache(path, board):
+    header = _CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, PARSER_VERSION, board.size, board.edge_count,
+                                bytes.fromhex(board.graph_hash))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(header.ljust(CACHE_HEADER_SIZE, b"\0"))
+            f.write(board.offsets.astype("<i4").tobytes())
+            f.write(board.neighbours.astype("<i4").tobytes())
+            f.write(board.transports.tobytes())
+            f.write(json.dumps(board.anomalies).encode("utf-8"))
+        os.replace(tmp_path, path)
+    finally:
+        # Only still there when writing failed
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def load_board(path=GRAPH_PATH, strict=False, cache_path=CACHE_PATH):
+    """
+    Compile graph.json into a Board. Boards are cached per file, so every caller shares one.
+
+    The compiled arrays are also kept in `cache_path` next to graph.json, keyed
+    on the file's sha256 and PARSER_VERSION, so later runs skip parsing the
+    JSON; it is rebuilt whenever graph.json or the parsing rules change. Pass
+    cache_path=None to always parse.
+    """
+    key = (os.path.abspath(path), strict)
+    board = _boards.get(key)
+    if board is None:
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).digest()
+        board = _read_cache(cache_path, digest) if cache_path else None
+        if board is not None and strict and board.anomalies:
+            raise ValueError(board.anomalies[0])
+        if board is None:
+            edges, anomalies = parse_graph(json.loads(data), strict=strict)
+            board = Board(edges, digest.hex(), anomalies)
+            if cache_path:
+                try:
+                    _write_cache(cache_path, board)
+                except OSError:
+                    pass  # read-only checkout: parse again next time
+        _boards[key] = board
+    return board
+
+
+_boards = {}
@@ -1,15 +1,204 @@
+"""
+Pipe between a running game engine and the Tk UI.
+
+The engine runs on its own thread and publish()es every GameState it
+reaches onto a bounded queue. publish() never blocks: when the queue is full
+the two oldest updates are merged into one, keeping the newer state and every
+move. The Tk side drains the queue from a root.after poll and only draws the
+newest state, so a slow display never holds up the engine and a fast engine
+never floods Tk.
+"""
+import queue
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+from AgentService import AgentService
+from Instrumentation import span
+from MoveGen import default_generator
+
+
+@dataclass
+class StateUpdate:
+    state: object
+    moves: tuple = ()  # every move played since the previous update
+    finished: bool = False
+
+
 class Connector:
-    def __init__(sel):
-            
-        pass
-    def load_engine(self):
-        pass
-    def draw_state(self, state):
-        pass
-    def subscribe_to_engine(self):
-        pass
+    def __init__(self, controller=None, maxsize=32, poll_ms=16):
+        self.controller = controller
+        self.maxsize = maxsize
+        self.poll_ms = poll_ms
+        self.generator = None
+        self.state = None
+        self.service = AgentService()
+        self.last_request = None  # AgentService.MoveRequest of the last agent move
+
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._manual_moves = queue.Queue(maxsize=1)
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._root = None
+        self._callback = None
+        self._poll_job = None
+
+        # published: updates handed in by the engine, coalesced: merged away
+        # because the queue was full, drawn: updates that reached the callback
+        self.stats = {"published": 0, "coalesced": 0, "drawn": 0}
+
+    def load_engine(self, generator=None):
+        """Rules used to validate and apply moves (MoveGen's by default)."""
+        self.generator = generator or default_generator()
+        return self.generator
+
+    # ---------------- ENGINE SIDE ---------------- #
+
+    def publish(self, state, moves=(), finished=False, stop=None):
+        """
+        Hand a new state to the UI. Safe from any thread, never blocks.
+        Dropped when `stop` (the publishing run's stop event) is already set.
+        """
+        update = StateUpdate(state, tuple(moves), finished)
+        with self._lock:
+            if stop is not None and stop.is_set():
+                return
+            self.state = state
+            self._events.append(update)
+            self.stats["published"] += 1
+            while len(self._events) > self.maxsize:
+                older = self._events.popleft()
+                newer = self._events[0]
+                self._events[0] = StateUpdate(newer.state, older.moves + newer.moves,
+                                              older.finished or newer.finished)
+                self.stats["coalesced"] += 1
+
+    def play(self, agents, state):
+        """
+        Play `state` to the end on a background thread. `agents` holds one
+        Agents.Agent per player; None players wait for process_move().
+        """
+        self.stop()
+        self.load_engine(self.generator)
+        # Every run gets its own stop event, so a thread still finishing a
+        # move of the previous game can never publish into this one
+        self._stop = threading.Event()
+        self._drain_manual_moves()
+        self.state = state
+        self._thread = threading.Thread(target=self._run, args=(agents, state, self._stop),
+                                        name="game-engine", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _run(self, agents, state, stop):
+        self.publish(state, stop=stop)
+        while not state.victory_flag and not stop.is_set():
+            agent = agents[state.current_player]
+            if agent is None:
+                move = self._wait_for_manual_move(stop)
+            else:
+                self.last_request = self.service.run(agent, state, stop)
+                move = self.last_request.move
+            if stop.is_set():
+                return
+            state = self.generator.apply(state, move)
+            for other in agents:
+                if other is not None:
+                    # A decide() that timed out may still be using the agent's tree and belief
+                    if not self.service.wait_idle(other, stop):
+                        return
+                    other.observe(move, state)
+            self.publish(state, (move,), finished=state.victory_flag, stop=stop)
+
+    def _wait_for_manual_move(self, stop):
+        while not stop.is_set():
+            try:
+                return self._manual_moves.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _drain_manual_moves(self):
+        try:
+            while True:
+                self._manual_moves.get_nowait()
+        except queue.Empty:
+            pass
+
+    def stop(self, timeout=1.0):
+        """Stop the engine thread, cancelling a running agent, and drop pending updates."""
+        self._stop.set()
+        self.service.cancel_current()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+        with self._lock:
+            self._events.clear()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
     def is_legal_move(self, move):
-        pass
+        """True when `move` (None: pass) is legal for the player to move in the latest state."""
+        if self.state is None or self.state.victory_flag:
+            return False
+        moves = (self.generator or self.load_engine()).legal_moves(self.state)
+        if move is None:
+            return not moves
+        return move in moves
+
     def process_move(self, move):
-        pass
+        """Submit a manual player's move to the engine thread; False if it is not legal."""
+        if not self.is_legal_move(move):
+            return False
+        try:
+            self._manual_moves.put_nowait(move)
+        except queue.Full:
+            return False  # the previous manual move has not been picked up yet
+        return True
+
+    # ---------------- UI SIDE ---------------- #
+
+    def subscribe_to_engine(self, root, callback):
+        """
+        Call callback(state, moves, finished) on the Tk thread with the newest
+        state whenever the engine has published something since the last poll.
+        """
+        self.unsubscribe()
+        self._root = root
+        self._callback = callback
+        self._poll_job = root.after(self.poll_ms, self._poll)
+
+    def unsubscribe(self):
+        if self._poll_job is not None and self._root is not None:
+            self._root.after_cancel(self._poll_job)
+        self._poll_job = None
+        self._callback = None
+
+    def drain(self):
+        """Take every pending update and coalesce them into one (None if there are none)."""
+        with self._lock:
+            if not self._events:
+                return None
+            events = list(self._events)
+            self._events.clear()
+            self.stats["coalesced"] += len(events) - 1
+        moves = tuple(move for event in events for move in event.moves)
+        return StateUpdate(events[-1].state, moves, any(event.finished for event in events))
+
+    def _poll(self):
+        self._poll_job = None
+        update = self.drain()
+        if update is not None:
+            self.draw_state(update)
+        if self._callback is not None:
+            self._poll_job = self._root.after(self.poll_ms, self._poll)
 
+    @span("connector.draw_state")
+    def draw_state(self, update):
+        self.stats["drawn"] += 1
+        if self._callback is not None:
+            self._callback(update.state, update.moves, update.finished)
@@ -6,12 +6,31 @@ import random
 
 from enum import Enum
 
+from Instrumentation import span
+
+# Half the marker diameter in original map pixels; a click this close selects the station.
+SELECT_RADIUS = 23
+# Saves with this suffix use the binary GameLog format instead of JSON
+GAME_LOG_SUFFIX = ".sylog"
+
 class TransportType(Enum):
     TAXI = 1
     BUS = 2
     TUBE = 3
     BOAT = 4
+    BLACK = 5
 
+# Order of the (name, count) pairs in GameState.player_cards
+TICKET_NAMES = ("taxi", "bus", "tube", "black", "x2")
+
+# Ticket spent to travel by each transport; boats can only be paid with a black ticket
+TICKET_FOR_TRANSPORT = {
+    TransportType.TAXI: "taxi",
+    TransportType.BUS: "bus",
+    TransportType.TUBE: "tube",
+    TransportType.BOAT: "black",
+    TransportType.BLACK: "black",
+}
 
 @dataclass(slots=True)
 class Node:
@@ -26,6 +45,24 @@ class Move:
     to_station: int
     type: TransportType
 
+@dataclass(slots=True)
+class DoubleMove:
+    """Mr X spending an x2 card: two moves played back to back."""
+    first: Move
+    second: Move
+
+    @property
+    def player(self):
+        return self.first.player
+
+    @property
+    def from_station(self):
+        return self.first.from_station
+
+    @property
+    def to_station(self):
+        return self.second.to_station
+
 @dataclass(frozen=True)
 class GameState:
     turn: int
@@ -38,28 +75,52 @@ class GameState:
 
 class GameControll:
     def __init__(self):
+        # Imported here so that importing Controll (and the GUI) doesn't pull in numpy
+        from SpatialIndex import StationCoords, StationGrid
         self.stopList = ReadStops('station_locations.json')
+        self.station_grid = StationGrid(self.stopList)
+        self.station_coords = StationCoords(self.stopList)
+
+        # Imported here because Board builds on the types defined in this module
+        from Board import load_board
+        self.board = load_board()
 
         self.state = None
 
         self.players = []
         self.random_locs = []
+        self.agent_choices = []  # combobox entry per player, see Agents.AGENT_CHOICES
+        self.agents = []
+        self.record = None  # Replay.GameRecord of the game being played or replayed
+        self.replay = None
+
+        from ConnectionLayer import Connector
+        self.connector = Connector(self)
+        self.awaiting_input = None  # manual player the engine is waiting for
 
+    @span("controller.select_station")
     def select_station(self, x, y):
-        x_low, x_high = x - 23, x + 23
-        y_low, y_high = y - 23, y + 23
+        """Compatibility wrapper: every station in the +-23 px box, ordered by y like stopList."""
+        match = self.station_grid.in_box(x, y, SELECT_RADIUS)
+        match.sort(key=lambda n: n.y)
+        return match
 
-        # Filter stations within bounding box
-        match = [
-            node for node in self.stopList
-            if x_low <= node.x <= x_high and y_low <= node.y <= y_high
-        ]
+    @span("controller.nearest_station")
+    def nearest_station(self, x, y, radius=SELECT_RADIUS):
+        """Closest station to (x, y) within `radius` original-image pixels, or None."""
+        return self.station_grid.nearest(x, y, radius)
 
-        return match
+    @span("controller.k_nearest_stations")
+    def k_nearest_stations(self, x, y, k, radius=None):
+        return self.station_grid.k_nearest(x, y, k, radius)
 
     def get_station_coords(self, station_id):
-        node = next((n for n in self.stopList if n.id == station_id), None)
-        return (node.x, node.y) if node is not None else None
+        return self.station_coords.get(station_id)
+
+    @span("controller.get_canvas_coords")
+    def get_canvas_coords(self, station_ids, scale_x, scale_y, offset_x=0, offset_y=0):
+        """Batched original-map -> canvas transform for a sequence of station ids."""
+        return self.station_coords.to_canvas(station_ids, scale_x, scale_y, offset_x, offset_y)
 
     def add_player(self):
         number_of_players = len(self.players)
@@ -75,6 +136,7 @@ class GameControll:
 
         self.players.append((player_name, rand))
         self.random_locs.append(rand)
+        self.agent_choices.append("Manual X" if number_of_players == 0 else "Manual")
 
         player_locs = tuple(player[1] for player in self.players)
         player_cards = tuple(self.get_startCards(i) for i in range(len(self.players)))
@@ -98,29 +160,123 @@ class GameControll:
             return
         self.players.pop()
         self.random_locs.pop()
+        self.agent_choices.pop()
         player_locs = tuple(player[1] for player in self.players)
         player_cards = tuple(self.get_startCards(i) for i in range(len(self.players)))
         self.state = GameState(turn= 0, player_locs= player_locs, player_cards= player_cards, current_player= 0, victory_flag= False)
 
-    def start_game(with_UI = True):
-        pass
+    def set_agent(self, index, choice):
+        """Remember which agent (a PlayerHandler combobox entry) controls player `index`."""
+        self.agent_choices[index] = choice
+
+    def create_agents(self, **kwargs):
+        """One Agents.Agent per player, None for manually controlled players."""
+        import Agents
+        return [Agents.create_agent(choice, i, **kwargs) for i, choice in enumerate(self.agent_choices)]
+
+    @span("controller.start_game")
+    def start_game(self, with_UI = True):
+        """
+        Create the agents for the current setup. Without a UI the game is
+        played out right away and the Simulator.GameResult is returned.
+        """
+        import Replay
+        self.connector.stop()
+        self.awaiting_input = None
+        self.replay = None
+        self.record = Replay.GameRecord(self.state)
+        self.agents = self.create_agents()
+        for agent in self.agents:
+            if agent is not None:
+                agent.reset(self.state)
+        if with_UI:
+            return None
+        if None in self.agents:
+            raise ValueError("a headless game needs an agent for every player")
+
+        import Simulator
+        result = Simulator.play_game(self.agents, self.state, record_moves=True)
+        for move in result.moves:
+            self.record.append(move)
+        self.state = result.final_state
+        return result
+
+    @span("controller.record_move")
+    def record_move(self, move):
+        """Play `move` on the current state and append it to the game record."""
+        self.state = self.record.append(move)
+        return self.state
+
+    def save_game(self, path):
+        """Save the current game to `path`, replacing it: a .sylog path as a binary GameLog, anything else as JSON."""
+        if self.record is None:
+            return False
+        if path.endswith(GAME_LOG_SUFFIX):
+            from GameLog import GameLogWriter
+            from MoveGen import winner
+            final = self.record.final_state
+            with GameLogWriter(path, self.board.graph_hash, append=False) as log:
+                log.write_game(self.record.initial_state, self.record.moves, winner(final), final.turn)
+        else:
+            self.record.save(path)
+        return True
 
-    def replay_game(log_file):
-        pass
+    def replay_game(self, log_file):
+        """
+        Load a saved game and return a Replay.ReplayPlayer positioned at its start.
+        For a binary GameLog the last complete game in the file is replayed.
+        """
+        import Replay
+        self.connector.stop()
+        if log_file.endswith(GAME_LOG_SUFFIX):
+            import GameLog
+            game = None
+            for game in GameLog.iter_games(log_file, self.board.graph_hash):
+                pass
+            if game is None:
+                raise ValueError(f"{log_file}: no complete game in the log")
+            record = GameLog.record_from_game(game)
+        else:
+            record = Replay.GameRecord.load(log_file)
+        self.record = record
+        self.replay = Replay.ReplayPlayer(record)
+        self.state = record.initial_state
+
+        # Mirror the recorded players so the panels match the replay. The lists
+        # are updated in place because the PlayerHandler shares them.
+        locs = record.initial_state.player_locs
+        self.players[:] = [("Mister X" if i == 0 else f"Player: {i}", loc) for i, loc in enumerate(locs)]
+        self.random_locs[:] = locs
+        self.agent_choices[:] = ["Manual X" if i == 0 else "Manual" for i in range(len(locs))]
+        return self.replay
 
     def handle_map_redraw_event(wait_for_input):
         pass
 
-    def handle_manual_input():
-        pass
+    @span("controller.handle_manual_input")
+    def handle_manual_input(self, station_id):
+        """
+        Move the manual player the engine is waiting for to `station_id`.
+
+        When several tickets reach the station the cheapest one is used
+        (taxi, bus, tube, then black); Mr X's double moves cannot be entered
+        by clicking. Returns the move handed to the engine, or None when no
+        legal move goes there.
+        """
+        player = self.awaiting_input
+        state = self.connector.state
+        if player is None or state is None or state.current_player != player:
+            return None
+        for move in self.connector.generator.legal_moves(state):
+            if not isinstance(move, DoubleMove) and move.to_station == station_id:
+                if self.connector.process_move(move):
+                    self.awaiting_input = None
+                    return move
+                return None
+        return None
+
     def get_startCards(self, index):
-        if index == 0:
-            n = len(self.players) - 1
-            #mr X get 4 taxi, 3 bus, 3 tube, n black tickets and two double turns
-            return (("taxi", 4), ("bus", 3), ("tube", 3), ("black", n), ("x2" ,2))
-        else:
-            #detectives get 10 taxi, 8 bus and 4 tube tickets
-            return (("taxi", 10), ("bus", 8), ("tube", 4), ("black", 0), ("x2" ,0))
+        return start_cards(index, len(self.players))
         
         
 
@@ -133,6 +289,23 @@ class GameControll:
 
 
 
+def start_cards(index, number_of_players):
+    if index == 0:
+        n = number_of_players - 1
+        #mr X get 4 taxi, 3 bus, 3 tube, n black tickets and two double turns
+        return (("taxi", 4), ("bus", 3), ("tube", 3), ("black", n), ("x2" ,2))
+    else:
+        #detectives get 10 taxi, 8 bus and 4 tube tickets
+        return (("taxi", 10), ("bus", 8), ("tube", 4), ("black", 0), ("x2" ,0))
+
+
+def initial_state(player_locs):
+    """Turn-0 GameState with the standard starting tickets for `player_locs`."""
+    player_locs = tuple(player_locs)
+    player_cards = tuple(start_cards(i, len(player_locs)) for i in range(len(player_locs)))
+    return GameState(turn= 0, player_locs= player_locs, player_cards= player_cards, current_player= 0, victory_flag= False)
+
+
 def ReadStops(path):
     with open(path, 'r') as f:
         stops =  json.load(f)
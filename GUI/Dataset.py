@@ -0,0 +1,333 @@
+"""
+Columnar game dataset for analytics over many logged games.
+
+export_dataset() turns binary GameLogs into a directory of .npy columns,
+one table with a row per move (every leg of a double move is its own row)
+and one with a row per game:
+
+    dataset/
+        meta.json
+        games/<column>.npy
+        moves/<column>.npy
+
+GameDataset opens the columns with mmap_mode="r", so queries only touch the
+pages of the columns they use and run as plain NumPy reductions.
+
+    python Dataset.py export games.ds selfplay.sylog
+    python Dataset.py summary games.ds
+"""
+import json
+import os
+import shutil
+from array import array
+
+import numpy as np
+
+import GameLog
+from Board import load_board
+from Controll import DoubleMove
+from Distances import UNREACHABLE, load_distances
+from MoveGen import DETECTIVES, MR_X
+
+DATASET_VERSION = 1
+MAX_PLAYERS = GameLog.MAX_PLAYERS
+
+# Column name -> (array typecode used while exporting, numpy dtype on disk)
+GAME_COLUMNS = {
+    "players": ("B", np.uint8),
+    "winner": ("B", np.uint8),
+    "turns": ("B", np.uint8),
+    "mrx_start": ("B", np.uint8),
+    "first_move": ("Q", np.uint64),  # row of the game's first move in the moves table
+    "move_count": ("I", np.uint32),
+    "end_distance": ("f", np.float32),  # mean detective distance to Mr X when the game ended
+}
+MOVE_COLUMNS = {
+    "game": ("I", np.uint32),
+    "ply": ("H", np.uint16),
+    "turn": ("B", np.uint8),  # turn after the move
+    "player": ("B", np.uint8),
+    "from_station": ("B", np.uint8),
+    "to_station": ("B", np.uint8),
+    "transport": ("B", np.uint8),  # TransportType value, 0 for a pass
+    "double": ("B", np.uint8),  # 0 single move, 1/2 first/second leg of an x2 move
+    "mrx_station": ("B", np.uint8),  # Mr X's true station after the move
+    "mrx_distance": ("B", np.uint8),  # detective: own distance to Mr X, Mr X: nearest detective
+}
+# Station of every player after the move, 0 for players not in the game
+LOCS_COLUMN = "locs"
+
+# Rows buffered in memory before they are appended to the column files
+FLUSH_ROWS = 1 << 20
+
+
+class _ColumnFile:
+    """Raw column appended to in chunks and turned into an .npy file on close()."""
+    def __init__(self, path, dtype, width=None):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.width = width
+        self.rows = 0
+        self._raw = open(path + ".part", "wb")
+
+    def append(self, values):
+        values = np.asarray(values, dtype=self.dtype)
+        self._raw.write(values.tobytes())
+        self.rows += len(values)
+
+    def close(self):
+        self._raw.close()
+        shape = (self.rows,) if self.width is None else (self.rows, self.width)
+        header = {"descr": np.lib.format.dtype_to_descr(self.dtype), "fortran_order": False, "shape": shape}
+        with open(self.path, "wb") as out, open(self.path + ".part", "rb") as raw:
+            np.lib.format.write_array_header_1_0(out, header)
+            shutil.copyfileobj(raw, out, 1 << 20)
+        os.remove(self.path + ".part")
+
+
+class _Exporter:
+    def __init__(self, out_dir, distances):
+        self.out_dir = out_dir
+        self.table = np.asarray(distances.table())
+        for table in ("games", "moves"):
+            os.makedirs(os.path.join(out_dir, table), exist_ok=True)
+
+        self.game_files = {name: _ColumnFile(self._path("games", name), dtype)
+                           for name, (_, dtype) in GAME_COLUMNS.items()}
+        self.move_files = {name: _ColumnFile(self._path("moves", name), dtype)
+                           for name, (_, dtype) in MOVE_COLUMNS.items()}
+        self.move_files[LOCS_COLUMN] = _ColumnFile(self._path("moves", LOCS_COLUMN), np.uint8, MAX_PLAYERS)
+
+        self.games = 0
+        self.moves = 0
+        self._reset_buffers()
+
+    def _path(self, table, name):
+        return os.path.join(self.out_dir, table, name + ".npy")
+
+    def _reset_buffers(self):
+        self.game_rows = {name: array(code) for name, (code, _) in GAME_COLUMNS.items()}
+        self.move_rows = {name: array(code) for name, (code, _) in MOVE_COLUMNS.items()
+                          if name != "mrx_distance"}
+        self.locs_rows = array("B")
+
+    def add_game(self, game):
+        n = len(game.player_locs)
+        locs = list(game.player_locs) + [0] * (MAX_PLAYERS - n)
+        rows = self.move_rows
+        turn = 0
+        player = MR_X
+        ply = 0
+        first_move = self.moves
+
+        for move in game.moves:
+            if move is None:
+                legs = ((player, locs[player], locs[player], 0, 0),)
+            elif isinstance(move, DoubleMove):
+                legs = tuple((leg.player, leg.from_station, leg.to_station, leg.type.value, i + 1)
+                             for i, leg in enumerate((move.first, move.second)))
+            else:
+                legs = ((move.player, move.from_station, move.to_station, move.type.value, 0),)
+
+            for mover, from_station, to_station, transport, double in legs:
+                locs[mover] = to_station
+                if mover == MR_X and transport:
+                    turn += 1
+                rows["game"].append(self.games)
+                rows["ply"].append(ply)
+                rows["turn"].append(turn)
+                rows["player"].append(mover)
+                rows["from_station"].append(from_station)
+                rows["to_station"].append(to_station)
+                rows["transport"].append(transport)
+                rows["double"].append(double)
+                rows["mrx_station"].append(locs[0])
+                self.locs_rows.extend(locs)
+                self.moves += 1
+            player = (legs[-1][0] + 1) % n
+            ply += 1
+
+        detectives = locs[1:n]
+        distances = [int(self.table[station, locs[0]]) for station in detectives]
+        reachable = [d for d in distances if d != UNREACHABLE]
+
+        games = self.game_rows
+        games["players"].append(n)
+        games["winner"].append(game.winner)
+        games["turns"].append(game.turns)
+        games["mrx_start"].append(game.player_locs[0])
+        games["first_move"].append(first_move)
+        games["move_count"].append(self.moves - first_move)
+        games["end_distance"].append(sum(reachable) / len(reachable) if reachable else float("nan"))
+        self.games += 1
+
+        if len(rows["game"]) >= FLUSH_ROWS:
+            self.flush()
+
+    def flush(self):
+        for name, values in self.game_rows.items():
+            self.game_files[name].append(values)
+        for name, values in self.move_rows.items():
+            self.move_files[name].append(values)
+
+        locs = np.frombuffer(self.locs_rows, dtype=np.uint8).reshape(-1, MAX_PLAYERS)
+        self.move_files[LOCS_COLUMN].append(locs)
+        self.move_files["mrx_distance"].append(self._mrx_distance(locs))
+        self._reset_buffers()
+
+    def _mrx_distance(self, locs):
+        """Vectorised mrx_distance for a chunk of move rows."""
+        if not len(locs):
+            return np.empty(0, dtype=np.uint8)
+        player = np.frombuffer(self.move_rows["player"], dtype=np.uint8)
+        # every detective's distance to Mr X; absent players sit on station 0
+        per_detective = self.table[locs[:, 1:], locs[:, :1]]
+        per_detective[locs[:, 1:] == 0] = UNREACHABLE
+        rows = np.arange(len(locs))
+        return np.where(player == MR_X,
+                        per_detective.min(axis=1),
+                        per_detective[rows, np.maximum(player, 1) - 1])
+
+    def close(self, sources, graph_hash):
+        self.flush()
+        for column in list(self.game_files.values()) + list(self.move_files.values()):
+            column.close()
+        meta = {
+            "version": DATASET_VERSION,
+            "graph_hash": graph_hash,
+            "games": self.games,
+            "moves": self.moves,
+            "sources": [os.path.abspath(path) for path in sources],
+        }
+        with open(os.path.join(self.out_dir, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        return meta
+
+
+def export_dataset(log_paths, out_dir, board=None):
+    """Convert one or more binary game logs into a columnar dataset in `out_dir`."""
+    if isinstance(log_paths, (str, os.PathLike)):
+        log_paths = [log_paths]
+    board = board or load_board()
+    exporter = _Exporter(out_dir, load_distances(board))
+    for path in log_paths:
+        for game in GameLog.iter_games(path, board.graph_hash):
+            exporter.add_game(game)
+    return exporter.close(log_paths, board.graph_hash)
+
+
+def group_mean(keys, values, mask=None, minlength=0):
+    """(count, mean) of `values` grouped by the small non-negative ints in `keys`."""
+    if mask is not None:
+        keys = keys[mask]
+        values = values[mask]
+    counts = np.bincount(keys, minlength=minlength)
+    sums = np.bincount(keys, weights=values, minlength=minlength)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return counts, sums / counts
+
+
+class GameDataset:
+    """Read-only view of an exported dataset; columns are memory-mapped on first use."""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != DATASET_VERSION:
+            raise ValueError(f"{path}: unsupported dataset version {self.meta.get('version')!r}")
+        self._columns = {}
+
+    def __len__(self):
+        return self.meta["games"]
+
+    def column(self, table, name):
+        key = (table, name)
+        if key not in self._columns:
+            self._columns[key] = np.load(os.path.join(self.path, table, name + ".npy"), mmap_mode="r")
+        return self._columns[key]
+
+    def games(self, name):
+        return self.column("games", name)
+
+    def moves(self, name):
+        return self.column("moves", name)
+
+    # ---------------- QUERIES ---------------- #
+
+    def win_rates(self, players=None):
+        """Mr X and detective win rate over all games (or games with `players` players)."""
+        winner = np.asarray(self.games("winner"))
+        if players is not None:
+            winner = winner[np.asarray(self.games("players")) == players]
+        games = len(winner)
+        mrx = int(np.count_nonzero(winner == MR_X))
+        return {"games": games,
+                "mrx": mrx / games if games else 0.0,
+                "detectives": (games - mrx) / games if games else 0.0}
+
+    def win_rate_by_start(self, min_games=1):
+        """(stations, games, mrx_win_rate) per Mr X starting station."""
+        start = np.asarray(self.games("mrx_start"))
+        mrx_won = (np.asarray(self.games("winner")) == MR_X).astype(np.float64)
+        counts, rate = group_mean(start, mrx_won)
+        stations = np.flatnonzero(counts >= min_games)
+        return stations, counts[stations], rate[stations]
+
+    def distance_at_end(self, winner=None):
+        """Mean detective distance to Mr X at the end of the game, optionally for one winning side."""
+        distance = np.asarray(self.games("end_distance"))
+        mask = ~np.isnan(distance)  # Mr X cut off from every detective on the disconnected graph
+        if winner is not None:
+            mask &= np.asarray(self.games("winner")) == winner
+        distance = distance[mask]
+        return float(distance.mean()) if len(distance) else float("nan")
+
+    def distance_by_turn(self, side=DETECTIVES):
+        """(turns, rows, mean mrx_distance) after each turn, for Mr X's or the detectives' moves."""
+        player = np.asarray(self.moves("player"))
+        mask = player == MR_X if side == MR_X else player != MR_X
+        distance = np.asarray(self.moves("mrx_distance"))
+        mask &= distance != UNREACHABLE
+        counts, mean = group_mean(np.asarray(self.moves("turn")), distance, mask)
+        turns = np.flatnonzero(counts)
+        return turns, counts[turns], mean[turns]
+
+    def transport_usage(self, side=MR_X):
+        """How often each TransportType value (0 = pass) was used by one side."""
+        player = np.asarray(self.moves("player"))
+        mask = player == MR_X if side == MR_X else player != MR_X
+        return np.bincount(np.asarray(self.moves("transport"))[mask], minlength=6)
+
+    def summary(self):
+        win = self.win_rates()
+        usage = self.transport_usage(MR_X)
+        return {
+            "games": len(self),
+            "moves": self.meta["moves"],
+            "mrx_win_rate": win["mrx"],
+            "distance_at_capture": self.distance_at_end(DETECTIVES),
+            "distance_at_escape": self.distance_at_end(MR_X),
+            "mrx_transport_usage": {str(t): int(n) for t, n in enumerate(usage) if n},
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Export and query columnar game datasets")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="build a dataset from binary game logs")
+    export.add_argument("out")
+    export.add_argument("logs", nargs="+")
+    summary = commands.add_parser("summary", help="print aggregate statistics of a dataset")
+    summary.add_argument("dataset")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "export":
+        result = export_dataset(args.logs, args.out)
+    else:
+        result = GameDataset(args.dataset).summary()
+    result["elapsed_s"] = time.perf_counter() - start
+    print(json.dumps(result, indent=2))
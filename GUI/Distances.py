@@ -0,0 +1,148 @@
+import os
+import struct
+
+import numpy as np
+
+from Board import GRAPH_PATH, PARSER_VERSION, load_board, mask_of
+
+CACHE_PATH = os.path.join(os.path.dirname(GRAPH_PATH), "graph.distances.bin")
+
+CACHE_MAGIC = b"SYDIST\0\0"
+CACHE_VERSION = 2
+# magic, version, Board.PARSER_VERSION, station count, layer count, sha256(graph.json);
+# padded to 64 bytes
+_HEADER = struct.Struct("<8sIIII32s")
+HEADER_SIZE = 64
+
+UNREACHABLE = 255
+
+# Layer 0 is unrestricted (any edge, what a black ticket can use);
+# layer m for m in 1..7 only uses edges whose TAXI/BUS/TUBE bits intersect m.
+LAYERS = 8
+ANY = 0
+
+
+def layer_of(transports=None):
+    """Table index for a collection of TransportTypes; None means unrestricted."""
+    if transports is None:
+        return ANY
+    mask = mask_of(transports) & 7
+    if mask == 0:
+        raise ValueError("no ticket transport in the restriction")
+    return mask
+
+
+def bfs_all_pairs(adjacency):
+    """
+    Hop distances between all station pairs over a boolean adjacency matrix.
+    Every source is expanded at once: one matrix product per BFS level.
+    """
+    size = adjacency.shape[0]
+    dist = np.full((size, size), UNREACHABLE, dtype=np.uint8)
+    step = adjacency.astype(np.float32)
+    frontier = np.eye(size, dtype=bool)
+    reached = frontier.copy()
+    dist[frontier] = 0
+
+    depth = 0
+    while frontier.any() and depth < UNREACHABLE - 1:
+        depth += 1
+        frontier = (frontier.astype(np.float32) @ step > 0) & ~reached
+        reached |= frontier
+        dist[frontier] = depth
+    return dist
+
+
+def build_tables(board):
+    size = board.size
+    edge_masks = np.zeros((size, size), dtype=np.uint8)
+    for station in range(size):
+        for neighbour, mask in board.adjacency[station]:
+            edge_masks[station, neighbour] = mask
+
+    tables = np.empty((LAYERS, size, size), dtype=np.uint8)
+    tables[ANY] = bfs_all_pairs(edge_masks != 0)
+    for layer in range(1, LAYERS):
+        tables[layer] = bfs_all_pairs((edge_masks & layer) != 0)
+    return tables
+
+
+class DistanceTables:
+    """
+    All-pairs shortest move counts, one 2D uint8 table per transport layer.
+
+    `tables[layer, a, b]` is the number of moves from a to b, UNREACHABLE if
+    there is no path. When loaded from the cache the array is a read-only
+    memory map, so lookups cost no startup time.
+    """
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, transports=None):
+        return self.tables[layer_of(transports)]
+
+    def distance(self, a, b, transports=None):
+        return int(self.tables[layer_of(transports), a, b])
+
+    def nearest(self, source, targets, transports=None):
+        """Smallest distance from `source` to any of `targets`."""
+        targets = list(targets)
+        if not targets:
+            return UNREACHABLE
+        return int(self.tables[layer_of(transports), source, targets].min())
+
+
+def _read_cache(path, graph_digest):
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+    except OSError:
+        return None
+    if len(header) != HEADER_SIZE:
+        return None
+    magic, version, parser_version, size, layers, digest = _HEADER.unpack_from(header)
+    if (magic != CACHE_MAGIC or version != CACHE_VERSION or parser_version != PARSER_VERSION
+            or layers != LAYERS or digest != graph_digest):
+        return None
+    if os.path.getsize(path) != HEADER_SIZE + layers * size * size:
+        return None
+    return np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER_SIZE, shape=(layers, size, size))
+
+
+def _write_cache(path, graph_digest, tables):
+    header = _HEADER.pack(CACHE_MAGIC, CACHE_VERSION, PARSER_VERSION, tables.shape[1], tables.shape[0],
+                          graph_digest)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            f.write(np.ascontiguousarray(tables).tobytes())
+        os.replace(tmp_path, path)
+    finally:
+        # Only still there when writing failed
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def load_distances(board=None, cache_path=CACHE_PATH):
+    """
+    Distance tables for `board`, memory-mapped from `cache_path`.
+    The cache is rebuilt when missing, from another format version, or built
+    from a different graph.json (it is keyed on the file's sha256) or from an
+    older parse_graph (PARSER_VERSION).
+    """
+    board = board or load_board()
+    digest = bytes.fromhex(board.graph_hash) if board.graph_hash else bytes(32)
+
+    tables = _read_cache(cache_path, digest) if cache_path else None
+    if tables is None:
+        tables = build_tables(board)
+        if cache_path:
+            try:
+                _write_cache(cache_path, digest, tables)
+                mapped = _read_cache(cache_path, digest)
+                if mapped is not None:
+                    tables = mapped
+            except OSError:
+                pass  # read-only checkout: keep the in-memory tables
+    return DistanceTables(tables)
@@ -0,0 +1,241 @@
+"""
+Compact binary game logs.
+
+A log is a 40 byte file header followed by any number of games, every record
+4 bytes wide (the game header takes two), so files can be appended to while
+they are being read and scanned through mmap without parsing ahead:
+
+    file header   b"SYLOG\\0", u16 version, 32 byte sha256 of graph.json
+    game header   0xFE, player count, 6 x start station (unused = 0)
+    move          flags | player, from, to, TransportType value
+    game end      0xFF, winner, turns, 0
+
+Move flags: FLAG_DOUBLE marks the first leg of an x2 move (the next record is
+the second leg), FLAG_PASS a player that had to pass.
+"""
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass, field
+
+from Board import load_board
+from Controll import DoubleMove, Move, TransportType, initial_state
+
+LOG_MAGIC = b"SYLOG\0"
+LOG_VERSION = 1
+_FILE_HEADER = struct.Struct("<6sH32s")
+FILE_HEADER_SIZE = _FILE_HEADER.size  # 40
+
+RECORD_SIZE = 4
+GAME_MARKER = 0xFE
+END_MARKER = 0xFF
+MAX_PLAYERS = 6
+
+PLAYER_MASK = 0x07
+FLAG_DOUBLE = 0x08
+FLAG_PASS = 0x10
+
+NO_WINNER = 0xFF
+
+
+@dataclass
+class LoggedGame:
+    player_locs: tuple
+    moves: list = field(default_factory=list)
+    winner: int = NO_WINNER
+    turns: int = 0
+    offset: int = 0  # byte offset of the game header in the file
+
+    @property
+    def initial_state(self):
+        return initial_state(self.player_locs)
+
+
+def _encode_move(move, player, station):
+    """4 byte records for one move (two for a DoubleMove)."""
+    if move is None:
+        return bytes((FLAG_PASS | player, station, station, 0))
+    if isinstance(move, DoubleMove):
+        return (bytes((FLAG_DOUBLE | player, move.first.from_station, move.first.to_station, move.first.type.value))
+                + _encode_move(move.second, player, station))
+    return bytes((player, move.from_station, move.to_station, move.type.value))
+
+
+class GameLogWriter:
+    """
+    Append-only writer. Games are written as they are played:
+
+        with GameLogWriter("games.sylog") as log:
+            log.begin_game(state)
+            log.write_move(move) ...
+            log.end_game(winner, turns)
+
+    Games are added to an existing log unless `append` is False, in which
+    case the file is replaced.
+    """
+    def __init__(self, path, board_hash=None, append=True):
+        self.path = path
+        digest = bytes.fromhex(board_hash or load_board().graph_hash)
+        self._file = open(path, "ab" if append else "wb")
+        try:
+            if self._file.tell() == 0:
+                self._file.write(_FILE_HEADER.pack(LOG_MAGIC, LOG_VERSION, digest))
+            else:
+                check_header(path, digest)
+        except BaseException:
+            self._file.close()
+            raise
+        self._in_game = False
+        self._locs = None
+        self._player = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def begin_game(self, state):
+        if self._in_game:
+            raise ValueError("previous game was not ended")
+        locs = tuple(state.player_locs)
+        if not 1 <= len(locs) <= MAX_PLAYERS:
+            raise ValueError(f"cannot log a game with {len(locs)} players")
+        padded = locs + (0,) * (MAX_PLAYERS - len(locs))
+        self._file.write(bytes((GAME_MARKER, len(locs))) + bytes(padded))
+        self._in_game = True
+        self._locs = list(locs)
+        self._player = state.current_player
+
+    def write_move(self, move):
+        """Log the move of the player whose turn it is (None: they passed)."""
+        if not self._in_game:
+            raise ValueError("write_move() outside of a game")
+        player = self._player if move is None else move.player
+        self._file.write(_encode_move(move, player, self._locs[player]))
+        if move is not None:
+            self._locs[player] = move.to_station
+        self._player = (player + 1) % len(self._locs)
+
+    def end_game(self, winner=None, turns=0):
+        if not self._in_game:
+            raise ValueError("end_game() outside of a game")
+        self._file.write(bytes((END_MARKER, NO_WINNER if winner is None else winner, min(turns, 255), 0)))
+        self._in_game = False
+
+    def write_game(self, state, moves, winner=None, turns=0):
+        self.begin_game(state)
+        for move in moves:
+            self.write_move(move)
+        self.end_game(winner, turns)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def check_header(path, expect_hash=None):
+    """Validate the file header; returns the board hash (hex) it was written with."""
+    with open(path, "rb") as f:
+        header = f.read(FILE_HEADER_SIZE)
+    if len(header) != FILE_HEADER_SIZE:
+        raise ValueError(f"{path}: truncated game log header")
+    magic, version, digest = _FILE_HEADER.unpack(header)
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        raise ValueError(f"{path}: not a version {LOG_VERSION} game log")
+    if expect_hash is not None:
+        expected = expect_hash if isinstance(expect_hash, bytes) else bytes.fromhex(expect_hash)
+        if digest != expected:
+            raise ValueError(f"{path}: log was written for a different graph.json")
+    return digest.hex()
+
+
+def iter_games(path, expect_hash=None):
+    """
+    Yield every complete LoggedGame in the log, reading through mmap.
+    A game that is still being written (no end record yet) is skipped.
+    """
+    check_header(path, expect_hash)
+    if os.path.getsize(path) == FILE_HEADER_SIZE:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        end = len(data) - len(data) % RECORD_SIZE
+        pos = FILE_HEADER_SIZE
+        game = None
+        pending = None  # first leg of a double move
+        while pos + RECORD_SIZE <= end:
+            b0, b1, b2, b3 = data[pos:pos + RECORD_SIZE]
+            if b0 == GAME_MARKER:
+                if pos + 2 * RECORD_SIZE > end:
+                    break
+                locs = tuple(data[pos + 2:pos + 2 + b1])
+                game = LoggedGame(player_locs=locs, offset=pos)
+                pending = None
+                pos += 2 * RECORD_SIZE
+                continue
+            pos += RECORD_SIZE
+            if game is None:
+                raise ValueError(f"{path}: move record outside of a game at byte {pos - RECORD_SIZE}")
+            if b0 == END_MARKER:
+                game.winner = b1
+                game.turns = b2
+                yield game
+                game = None
+                continue
+
+            player = b0 & PLAYER_MASK
+            if b0 & FLAG_PASS:
+                game.moves.append(None)
+                continue
+            move = Move(player, b1, b2, TransportType(b3))
+            if b0 & FLAG_DOUBLE:
+                pending = move
+            elif pending is not None:
+                game.moves.append(DoubleMove(pending, move))
+                pending = None
+            else:
+                game.moves.append(move)
+
+
+def count_games(path):
+    return sum(1 for _ in iter_games(path))
+
+
+def record_from_game(game, generator=None):
+    """Rebuild a Replay.GameRecord (with keyframes) from a logged game."""
+    import Replay
+    record = Replay.GameRecord(game.initial_state, generator=generator)
+    for move in game.moves:
+        record.append(move)
+    return record
+
+
+def export_json(path, out_path):
+    """Write the log as JSON lines, one game per line, for debugging."""
+    from Replay import move_to_json
+    with open(out_path, "w") as out:
+        for game in iter_games(path):
+            out.write(json.dumps({
+                "player_locs": list(game.player_locs),
+                "winner": None if game.winner == NO_WINNER else game.winner,
+                "turns": game.turns,
+                "moves": [move_to_json(m) for m in game.moves],
+            }))
+            out.write("\n")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect binary game logs")
+    parser.add_argument("log")
+    parser.add_argument("--json", metavar="OUT", help="export the log as JSON lines")
+    args = parser.parse_args()
+    if args.json:
+        export_json(args.log, args.json)
+    else:
+        print(f"{count_games(args.log)} games")
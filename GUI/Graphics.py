@@ -1,10 +1,18 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog, messagebox
 import Controll 
 import StagedProgressBar as StagedProgressBar
+import MapTiles
+import Instrumentation
+from Instrumentation import span
+import threading
 import time
-from PIL import Image, ImageTk
-import uuid
+from collections import OrderedDict
+
+# PIL is imported where images are made, so importing this module (or
+# Controll, MapTiles, ...) for headless work never pays for it.
+
+GAME_FILETYPES = [("Game record", "*.json"), ("Game log", "*" + Controll.GAME_LOG_SUFFIX), ("All files", "*.*")]
 
 
 class GameUI:
@@ -14,8 +22,6 @@ class GameUI:
         self.root.title("Interactive Map")
         self.root.geometry(resolution)
 
-        self.controller = Controll.GameControll()
-
         self.turn_var = tk.StringVar(value="Turn: 0")
         self.turn_label = tk.Label(
             self.root,
@@ -28,25 +34,195 @@ class GameUI:
         )
         self.turn_label.pack(side=tk.TOP, fill=tk.X)
 
-        self.map_obj = ClickableMap(self.root, "./map.png", self.controller)
+        # The window comes up with a placeholder while the controller, board and
+        # map image load on a worker thread; _finish_startup builds the rest.
+        self.controller = None
+        self.map_obj = None
+        self.player_handler = None
+        self.replay_controls = None
+        self._thinking_job = None
+        self._thinking_player = None
+        self.tracker = None
+        self.placeholder = tk.Label(self.root, text="Loading map...", font=("Arial", 14), fg="grey")
+        self.placeholder.pack(fill=tk.BOTH, expand=True)
+
+        self._assets = None
+        self._assets_error = None
+        self._assets_ready = threading.Event()
+        threading.Thread(target=self._load_assets, args=("./map.png",), name="gui-startup", daemon=True).start()
+        self.root.after(20, self._finish_startup)
+
+        self.root.mainloop()
+
+    def _load_assets(self, image_path):
+        """Worker thread: everything slow that needs no Tk calls."""
+        try:
+            self._assets = (Controll.GameControll(), load_map_image(image_path))
+        except Exception as exc:
+            self._assets_error = exc
+        finally:
+            self._assets_ready.set()
+
+    def _finish_startup(self):
+        if not self._assets_ready.is_set():
+            self.root.after(20, self._finish_startup)
+            return
+        if self._assets_error is not None:
+            self.placeholder.config(text=f"Could not load the game: {self._assets_error}", fg="red")
+            return
+        self.controller, (image, preview) = self._assets
+        self._assets = None
+        self.placeholder.destroy()
+
+        self.map_obj = ClickableMap(self.root, "./map.png", self.controller, image=(image, preview))
         self.player_handler =  PlayerHandler(self.root, self.controller, self.map_obj)
         self.map_obj.draw_full_state(self.controller.state)
         self._build_menu(self.root)
 
-        self.root.mainloop()
-    def draw_game_state(self, game_state):
-        self.turn_var.set(f"{self.controller.state.turn}")
+    @span("ui.draw_game_state")
+    def draw_game_state(self, game_state, animate=True):
+        self.turn_var.set(f"Turn: {game_state.turn}")
         self.player_handler.update_tickets(game_state)
-        self.map_obj.draw_full_state(game_state)
+        self.map_obj.draw_full_state(game_state, animate=animate)
 
-    def wait_for_input(player):
-        pass
+    def wait_for_input(self, player):
+        """The engine is waiting for manual player `player`: highlight them and take the next map click."""
+        controller = self.controller
+        if controller.awaiting_input == player:
+            return
+        controller.awaiting_input = player
+        self.player_handler.highlight_panel(player, True)
+        name = controller.players[player][0] if player < len(controller.players) else f"Player: {player}"
+        self.turn_var.set(f"Turn: {controller.connector.state.turn} - {name}, click a station")
+        if not controller.connector.is_legal_move(None):
+            return
+        # no legal moves: the player has to pass
+        controller.awaiting_input = None
+        controller.connector.process_move(None)
 
     def start_game(self):
-        #self.controller.start_game()
+        if self.controller.state is None:
+            return
+        if self.replay_controls is not None:
+            self.replay_controls.destroy()
+            self.replay_controls = None
+        self.controller.start_game()
+        self.player_handler.create_live_game_panles()
+        self.draw_game_state(self.controller.state, animate=False)
+        self.start_tracking(self.controller.state)
+
+        # The game runs on the engine thread; updates come back through the connector
+        connector = self.controller.connector
+        connector.subscribe_to_engine(self.root, self.on_engine_update)
+        connector.play(self.controller.agents, self.controller.state)
+        self._update_thinking()
+
+    @span("ui.on_engine_update")
+    def on_engine_update(self, state, moves, finished):
+        for move in moves:
+            if move is not None:
+                self.player_handler.highlight_panel(move.player, False)
+            played = self.controller.record_move(move)
+            self.tracker.observe(move, played)
+        self.draw_game_state(state)
+        self.map_obj.draw_candidates(self.tracker.candidates())
+        if finished:
+            self.controller.connector.unsubscribe()
+        elif self.controller.agents[state.current_player] is None:
+            self.wait_for_input(state.current_player)
+
+    def start_tracking(self, state):
+        """Shade where Mr X may be: anywhere but on a detective until the first reveal."""
+        # numpy is only needed once a game is played, not to bring the window up
+        from Belief import MrXTracker
+        if self.tracker is None:
+            self.tracker = MrXTracker(self.controller.board)
+        self.tracker.reset(excluded=state.player_locs[1:])
+        self.map_obj.draw_candidates(self.tracker.candidates())
+
+    @span("ui.update_thinking")
+    def _update_thinking(self):
+        """Poll the agent service and show a progress bar in the panel of the agent that is thinking."""
+        self._thinking_job = None
+        connector = self.controller.connector
+        request = connector.service.current
+        player = request.player if request is not None and not request.done.is_set() else None
+        if player != self._thinking_player and self._thinking_player is not None:
+            self.player_handler.hide_thinking(self._thinking_player)
+        self._thinking_player = player
+        if player is not None:
+            self.player_handler.show_thinking(player, request.progress())
+        if connector.running:
+            self._thinking_job = self.root.after(100, self._update_thinking)
+
+
+
+    def save_game(self):
+        if self.controller.record is None:
+            messagebox.showinfo("Save", "There is no game to save yet.")
+            return
+        path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=GAME_FILETYPES,
+        )
+        if path:
+            self.controller.save_game(path)
+
+    def load_game(self):
+        path = filedialog.askopenfilename(filetypes=GAME_FILETYPES)
+        if not path:
+            return
+        replay = self.controller.replay_game(path)
+        self.map_obj.draw_candidates(())
+        self.player_handler.sync_players()
         self.player_handler.create_live_game_panles()
+        if self.replay_controls is not None:
+            self.replay_controls.destroy()
+        self.replay_controls = ReplayControls(self.root, self, replay)
+        self.draw_game_state(replay.state, animate=False)
+
+    # ---------------- INSTRUMENTATION ---------------- #
+
+    def toggle_instrumentation(self):
+        if self.instrument_var.get():
+            Instrumentation.enable()
+        else:
+            Instrumentation.disable()
+
+    def toggle_profile(self):
+        if self.profile_var.get():
+            Instrumentation.start_profile()
+            return
+        path = filedialog.asksaveasfilename(
+            title="Save profile",
+            defaultextension=".prof",
+            filetypes=[("cProfile stats", "*.prof"), ("All files", "*.*")],
+        )
+        self._show_text("cProfile", Instrumentation.stop_profile(path or None))
 
+    def show_timings(self):
+        if not Instrumentation.enabled() and not Instrumentation.snapshot()["spans"]:
+            messagebox.showinfo("Timings", "Turn on Options > Instrumentation to collect timings.")
+            return
+        self._show_text("Timings", Instrumentation.report())
 
+    def export_trace(self):
+        path = filedialog.asksaveasfilename(
+            title="Export trace",
+            defaultextension=".json",
+            filetypes=[("Chrome trace", "*.json"), ("All files", "*.*")],
+        )
+        if path:
+            count = Instrumentation.dump_trace(path)
+            messagebox.showinfo("Export Trace", f"Wrote {count} events to {path}")
+
+    def _show_text(self, title, text):
+        window = tk.Toplevel(self.root)
+        window.title(title)
+        box = tk.Text(window, width=110, height=30, font=("Courier", 9), wrap="none")
+        box.insert("1.0", text)
+        box.config(state="disabled")
+        box.pack(fill=tk.BOTH, expand=True)
 
     def _build_menu(self, root: tk.Tk) -> tk.Menu:
         menubar = tk.Menu(root)
@@ -56,8 +232,8 @@ class GameUI:
         game_menu.add_command(label="New Game", command=lambda: None)
         game_menu.add_command(label="Start Game", command=self.start_game)
         game_menu.add_separator()
-        game_menu.add_command(label="Save", command=lambda: None)
-        game_menu.add_command(label="Load", command=lambda: None)
+        game_menu.add_command(label="Save", command=self.save_game)
+        game_menu.add_command(label="Load", command=self.load_game)
         game_menu.add_separator()
         game_menu.add_command(label="Exit", command=root.destroy)
 
@@ -65,9 +241,18 @@ class GameUI:
 
         # -------- Options --------
         options_menu = tk.Menu(menubar, tearoff=False)
-        options_menu.add_command(label="Reset Zoom", command=lambda: None)
+        options_menu.add_command(label="Reset Zoom", command=self.map_obj.reset_zoom)
         options_menu.add_command(label="Toggle Markers", command=lambda: None)
         options_menu.add_separator()
+        self.instrument_var = tk.BooleanVar(value=Instrumentation.enabled())
+        self.profile_var = tk.BooleanVar(value=Instrumentation.profiling())
+        options_menu.add_checkbutton(label="Instrumentation", variable=self.instrument_var,
+                                     command=self.toggle_instrumentation)
+        options_menu.add_checkbutton(label="cProfile Capture", variable=self.profile_var,
+                                     command=self.toggle_profile)
+        options_menu.add_command(label="Show Timings", command=self.show_timings)
+        options_menu.add_command(label="Export Trace...", command=self.export_trace)
+        options_menu.add_separator()
         options_menu.add_command(label="Settings", command=lambda: None)
 
         menubar.add_cascade(label="Options", menu=options_menu)
@@ -77,17 +262,159 @@ class GameUI:
         
 
 
+class ReplayControls:
+    """Playback bar for a Replay.ReplayPlayer: step, scrub to any ply, and play at a chosen speed."""
+
+    SPEEDS = ["0.5x", "1x", "2x", "5x", "10x", "50x"]
+
+    def __init__(self, root, game_ui, replay, base_interval_ms=800):
+        self.root = root
+        self.game_ui = game_ui
+        self.replay = replay
+        self.base_interval_ms = base_interval_ms
+        self._play_job = None
+        self._seeking = False
+
+        self.frame = tk.Frame(root, bg="#F0F0F0")
+        self.frame.pack(side=tk.BOTTOM, fill=tk.X)
+
+        buttons = [
+            ("\u23ee", lambda: self.seek(0)),
+            ("\u25c0", self.step_back),
+            ("\u25b6", self.toggle_play),
+            ("\u25b6|", self.step_forward),
+            ("\u23ed", lambda: self.seek(len(self.replay))),
+        ]
+        for column, (text, command) in enumerate(buttons):
+            button = tk.Button(self.frame, text=text, width=3, command=command)
+            button.grid(row=0, column=column, padx=2, pady=4)
+            if command == self.toggle_play:
+                self.play_button = button
+
+        self.ply_var = tk.DoubleVar(value=0)
+        self.scale = ttk.Scale(self.frame, from_=0, to=max(1, len(replay)), orient=tk.HORIZONTAL,
+                               variable=self.ply_var, command=self._on_scale)
+        self.scale.grid(row=0, column=len(buttons), sticky="ew", padx=8)
+        self.frame.columnconfigure(len(buttons), weight=1)
+
+        self.speed = ttk.Combobox(self.frame, values=self.SPEEDS, state="readonly", width=5)
+        self.speed.set("1x")
+        self.speed.grid(row=0, column=len(buttons) + 1, padx=4)
+
+        self.position_var = tk.StringVar()
+        tk.Label(self.frame, textvariable=self.position_var, bg="#F0F0F0", width=18).grid(
+            row=0, column=len(buttons) + 2, padx=4)
+        self._update_position()
+
+    def _speed(self):
+        return float(self.speed.get().rstrip("x"))
+
+    def _show(self, animate=False):
+        self.game_ui.controller.state = self.replay.state
+        self.game_ui.draw_game_state(self.replay.state, animate=animate)
+        self._update_position()
+
+    def _update_position(self):
+        self._seeking = True
+        self.ply_var.set(self.replay.ply)
+        self._seeking = False
+        self.position_var.set(f"Turn {self.replay.state.turn}  move {self.replay.ply}/{len(self.replay)}")
+
+    def _on_scale(self, value):
+        if not self._seeking:
+            self.seek(int(float(value)))
+
+    def seek(self, ply):
+        self.replay.seek(ply)
+        self._show()
+
+    def seek_turn(self, turn):
+        self.replay.seek_turn(turn)
+        self._show()
+
+    def step_forward(self):
+        self.replay.step_forward()
+        self._show(animate=True)
+
+    def step_back(self):
+        self.replay.step_back()
+        self._show()
+
+    def toggle_play(self):
+        if self._play_job is not None:
+            self.pause()
+            return
+        if self.replay.at_end:
+            self.replay.seek(0)
+        self.play_button.config(text="\u23f8")
+        self._tick()
+
+    def pause(self):
+        if self._play_job is not None:
+            self.root.after_cancel(self._play_job)
+            self._play_job = None
+        self.play_button.config(text="\u25b6")
+
+    def _tick(self):
+        self._play_job = None
+        if self.replay.at_end:
+            self.pause()
+            return
+        speed = self._speed()
+        self.replay.step_forward()
+        # Sliding markers only makes sense while there is time to watch them
+        self._show(animate=speed <= 2)
+        self._play_job = self.root.after(max(1, int(self.base_interval_ms / speed)), self._tick)
+
+    def destroy(self):
+        self.pause()
+        self.frame.destroy()
+
+
+def load_map_image(image_path, preview_size=(1024, 1024)):
+    """
+    Decode the map and the small copy used for resize previews.
+    Pure PIL work, so it can run off the Tk thread.
+    """
+    from PIL import Image
+
+    image = Image.open(image_path)
+    image.load()
+    preview = image.copy()
+    preview.thumbnail(preview_size, Image.Resampling.BILINEAR)
+    return image, preview
+
+
 class ClickableMap:
-    def __init__(self, root, image_path, controller):
+    def __init__(self, root, image_path, controller, image=None):
+        """`image`: (map, preview) from load_map_image() when already loaded, else read from `image_path`."""
         self.root = root
         self.image_path = image_path
         self.controller = controller
         self.colours = ["black", "red", "blue", "green", "brown", "pink"]
 
-        # Load original image
-        self.img = Image.open(image_path)
+        # Original image, plus a small copy for fast previews while the window is being resized
+        self.img, self._preview_src = image or load_map_image(image_path)
         self.original_width, self.original_height = self.img.size
 
+        self._render_cache = OrderedDict()  # (width, height) -> PhotoImage, least recent first
+        self.render_cache_size = 4
+        self.resize_settle_ms = 150
+        self._resize_job = None
+        self._canvas_size = None
+
+        # Zoom & pan: power-of-two pyramid built in the background, tiles cut from it on demand
+        self.pyramid = MapTiles.ImagePyramid(self.img)
+        self.tile_size = 256
+        self._tile_cache = MapTiles.TileCache(capacity=256)
+        self._tile_items = {}  # (tx, ty) -> (canvas item, PhotoImage)
+        self.zoom = 1.0
+        self.zoom_step = 1.25
+        self.max_zoom = 8.0
+        self.pan_x = 0
+        self.pan_y = 0
+        self._pan_anchor = None
+
         # Canvas fills the window
         self.canvas = tk.Canvas(root, bg="white", cursor="cross")
         self.canvas.pack(fill=tk.BOTH, expand=True)
@@ -103,6 +430,15 @@ class ClickableMap:
         self.scale = 0
         self.original_diameter_of_marker = 45
 
+        # Player markers: one persistent oval per player, moved in place
+        self._marker_items = {}     # player index -> canvas item
+        self._marker_stations = {}  # player index -> station the item is drawn on
+        self._marker_layout = None  # (display w, display h, offset x, offset y) of the drawn markers
+        self._animations = {}       # player index -> pending root.after job
+        self._candidates = ()       # stations shaded by draw_candidates, redrawn on resize/zoom
+        self.animation_ms = 240
+        self.animation_frame_ms = 16
+
         # Coordinate label
         self.coord_label = tk.Label(
             root,
@@ -116,59 +452,201 @@ class ClickableMap:
         # Bind events
         self.canvas.bind("<Button-1>", self.on_map_click)
         self.canvas.bind("<Configure>", self.on_resize)
+        self.canvas.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.canvas.bind("<Button-4>", self.on_mouse_wheel)
+        self.canvas.bind("<Button-5>", self.on_mouse_wheel)
+        self.canvas.bind("<ButtonPress-3>", self.on_pan_start)
+        self.canvas.bind("<B3-Motion>", self.on_pan_drag)
 
     # ---------------- RESIZE & DRAW ---------------- #
 
+    @span("ui.on_resize")
     def on_resize(self, event):
-        canvas_w = event.width
-        canvas_h = event.height
+        self._canvas_size = (event.width, event.height)
+        self.redraw_view()
 
-        # Keep aspect ratio
+    def _update_layout(self):
+        canvas_w, canvas_h = self._canvas_size
+
+        # Keep aspect ratio; zoom is relative to fitting the whole map
         self.scale = min(
             canvas_w / self.original_width,
             canvas_h / self.original_height,
-        )
+        ) * self.zoom
 
-        self.display_width = int(self.original_width * self.scale)
-        self.display_height = int(self.original_height * self.scale)
+        self.display_width = max(1, int(self.original_width * self.scale))
+        self.display_height = max(1, int(self.original_height * self.scale))
 
-        resized = self.img.resize(
-            (self.display_width, self.display_height),
-            Image.Resampling.LANCZOS,
-        )
-        self.imgobj = ImageTk.PhotoImage(resized)
+        # Center offsets, shifted by the pan but never dragging the map off screen
+        center_x = (canvas_w - self.display_width) // 2
+        center_y = (canvas_h - self.display_height) // 2
+        if self.display_width > canvas_w:
+            self.offset_x = min(0, max(canvas_w - self.display_width, center_x + self.pan_x))
+        else:
+            self.offset_x = center_x
+        if self.display_height > canvas_h:
+            self.offset_y = min(0, max(canvas_h - self.display_height, center_y + self.pan_y))
+        else:
+            self.offset_y = center_y
+        self.pan_x = self.offset_x - center_x
+        self.pan_y = self.offset_y - center_y
+
+    @span("ui.redraw_view")
+    def redraw_view(self):
+        """Lay out and draw the map for the current canvas size, zoom and pan."""
+        if self._canvas_size is None:
+            return
+        self._update_layout()
 
-        # Center offsets
-        self.offset_x = (canvas_w - self.display_width) // 2
-        self.offset_y = (canvas_h - self.display_height) // 2
+        if self.zoom == 1.0:
+            self.canvas.itemconfigure('tile', state='hidden')
+            self._draw_fitted()
+        else:
+            if self.image_id is not None:
+                self.canvas.itemconfigure(self.image_id, state='hidden')
+            self._draw_tiles()
 
+        self.draw_full_state(self.controller.state)
+        if self._candidates:
+            self.draw_candidates(self._candidates)
+
+    @span("ui.draw_fitted")
+    def _draw_fitted(self):
+        size = (self.display_width, self.display_height)
+
+        # Dragging the window fires <Configure> many times a second: show a cached
+        # render or a cheap preview now, and do the LANCZOS pass once it settles.
+        cached = self._cached_render(size)
+        if self._resize_job is not None:
+            self.root.after_cancel(self._resize_job)
+            self._resize_job = None
+        if cached is not None:
+            self._show_image(cached)
+        else:
+            from PIL import Image, ImageTk
+            preview = self._preview_src.resize(size, Image.Resampling.BILINEAR)
+            self._show_image(ImageTk.PhotoImage(preview))
+            self._resize_job = self.root.after(self.resize_settle_ms, self._finish_resize)
+
+    @span("ui.finish_resize")
+    def _finish_resize(self):
+        """High quality render for the size the window settled on."""
+        self._resize_job = None
+        if self.zoom != 1.0:
+            return
+        size = (self.display_width, self.display_height)
+        rendered = self._cached_render(size)
+        if rendered is None:
+            from PIL import ImageTk
+            resized = self.pyramid.render_region(
+                0, 0, self.original_width, self.original_height, size,
+            )
+            rendered = ImageTk.PhotoImage(resized)
+            self._render_cache[size] = rendered
+            while len(self._render_cache) > self.render_cache_size:
+                self._render_cache.popitem(last=False)
+        self._show_image(rendered)
+
+    def _cached_render(self, size):
+        rendered = self._render_cache.get(size)
+        if rendered is not None:
+            self._render_cache.move_to_end(size)
+        return rendered
+
+    def _show_image(self, photo):
+        self.imgobj = photo
         # Draw or update image
         if self.image_id is None:
             self.image_id = self.canvas.create_image(
-                canvas_w // 2,
-                canvas_h // 2,
+                self.offset_x,
+                self.offset_y,
                 image=self.imgobj,
-                anchor="center",
+                anchor="nw",
             )
+            self.canvas.tag_lower(self.image_id)
         else:
-            self.canvas.itemconfig(self.image_id, image=self.imgobj)
-            self.canvas.coords(
-                self.image_id,
-                canvas_w // 2,
-                canvas_h // 2,
-            )
-        self.clear_markers()
-        # Redraw existing markers after resize
-        for coord in self.click_coordinates:
-            try:
-                x, y = coord
-            except Exception:
-                continue
-            #self.draw_marker(x, y)
-        self.draw_full_state(self.controller.state)
+            self.canvas.itemconfigure(self.image_id, image=self.imgobj, state='normal')
+            self.canvas.coords(self.image_id, self.offset_x, self.offset_y)
+
+    @span("ui.draw_tiles")
+    def _draw_tiles(self):
+        """Blit only the tiles of the zoomed map that intersect the canvas."""
+        from PIL import ImageTk
+
+        display_size = (self.display_width, self.display_height)
+        tile_size = self.tile_size
+        shown = {}
+        for tx, ty in MapTiles.visible_tiles(display_size, (self.offset_x, self.offset_y),
+                                             self._canvas_size, tile_size):
+            key = (display_size, tx, ty)
+            photo = self._tile_cache.get(key)
+            if photo is None:
+                box, size = MapTiles.tile_box(tx, ty, tile_size, display_size, self.scale)
+                photo = ImageTk.PhotoImage(self.pyramid.render_region(*box, size))
+                self._tile_cache.put(key, photo)
+                Instrumentation.count("ui.tile_renders")
+
+            x = self.offset_x + tx * tile_size
+            y = self.offset_y + ty * tile_size
+            item = self._tile_items.pop((tx, ty), (None, None))[0]
+            if item is None:
+                item = self.canvas.create_image(x, y, image=photo, anchor="nw", tags=('tile',))
+            else:
+                self.canvas.itemconfigure(item, image=photo, state='normal')
+                self.canvas.coords(item, x, y)
+            # keep the PhotoImage referenced while it is on screen, even if the cache drops it
+            shown[(tx, ty)] = (item, photo)
+
+        for item, _ in self._tile_items.values():
+            self.canvas.delete(item)
+        self._tile_items = shown
+        self.canvas.tag_lower('tile')
+
+    # ---------------- ZOOM & PAN ---------------- #
+
+    def zoom_at(self, factor, canvas_x, canvas_y):
+        """Zoom by `factor`, keeping the map point under (canvas_x, canvas_y) in place."""
+        if self._canvas_size is None:
+            return
+        new_zoom = min(self.max_zoom, max(1.0, self.zoom * factor))
+        if abs(new_zoom - self.zoom) < 1e-9:
+            return
+
+        original_x = (canvas_x - self.offset_x) / self.scale
+        original_y = (canvas_y - self.offset_y) / self.scale
+        self.zoom = 1.0 if new_zoom < 1.0 + 1e-6 else new_zoom
+
+        canvas_w, canvas_h = self._canvas_size
+        scale = min(canvas_w / self.original_width, canvas_h / self.original_height) * self.zoom
+        self.pan_x = int(canvas_x - original_x * scale) - (canvas_w - int(self.original_width * scale)) // 2
+        self.pan_y = int(canvas_y - original_y * scale) - (canvas_h - int(self.original_height * scale)) // 2
+        self.redraw_view()
+
+    def reset_zoom(self):
+        self.zoom = 1.0
+        self.pan_x = 0
+        self.pan_y = 0
+        self.redraw_view()
+
+    def on_mouse_wheel(self, event):
+        # <MouseWheel> carries delta (Windows/macOS), X11 sends Button-4/5 instead
+        zoom_in = getattr(event, "delta", 0) > 0 or getattr(event, "num", None) == 4
+        self.zoom_at(self.zoom_step if zoom_in else 1.0 / self.zoom_step, event.x, event.y)
+
+    def on_pan_start(self, event):
+        self._pan_anchor = (event.x, event.y)
+
+    def on_pan_drag(self, event):
+        if self._pan_anchor is None or self.zoom == 1.0:
+            return
+        self.pan_x += event.x - self._pan_anchor[0]
+        self.pan_y += event.y - self._pan_anchor[1]
+        self._pan_anchor = (event.x, event.y)
+        self.redraw_view()
 
     # ---------------- CLICK HANDLING ---------------- #
 
+    @span("ui.on_map_click")
     def on_map_click(self, event):
         cx, cy = event.x, event.y
 
@@ -189,24 +667,122 @@ class ClickableMap:
 
         self.click_coordinates.append((original_x, original_y))
 
-        clicked_station = self.controller.select_station(original_x, original_y)
-        if len(clicked_station) != 0:
-            self.coord_label.config(text=f"Clicked on station: {clicked_station[0].id}")
+        clicked_station = self.controller.nearest_station(original_x, original_y)
+        if clicked_station is not None:
+            self.coord_label.config(text=f"Clicked on station: {clicked_station.id}")
+            if self.controller.awaiting_input is not None:
+                if self.controller.handle_manual_input(clicked_station.id) is None:
+                    self.coord_label.config(text=f"No legal move to station {clicked_station.id}")
 
 
         #self.draw_marker(original_x, original_y)
 
     # ---------------- MARKERS ---------------- #
 
-    def draw_full_state(self, state):
-        self.clear_markers()
-        players = state.player_locs
-        for index in range(len(players)):
-            self.draw_marker_on_station(players[index], self.colours[index])
-            
+    @span("ui.draw_full_state")
+    def draw_full_state(self, state, animate=False):
+        """
+        Bring the player markers in line with `state`.
+
+        Each player keeps one oval on the canvas. Only players whose station
+        changed are touched (all of them after a resize/zoom), and with
+        `animate` they slide to their new station instead of jumping.
+        """
+        if self.display_width is None or self.display_height is None or state is None:
+            return
+
+        layout = (self.display_width, self.display_height, self.offset_x, self.offset_y)
+        relayout = layout != self._marker_layout
+        self._marker_layout = layout
+        locs = state.player_locs
+
+        # Players removed since the last state
+        for index in [i for i in self._marker_items if i >= len(locs)]:
+            self._stop_animation(index)
+            self.canvas.delete(self._marker_items.pop(index))
+            self._marker_stations.pop(index, None)
+
+        changed = [
+            index for index, station in enumerate(locs)
+            if relayout or index not in self._marker_items or self._marker_stations.get(index) != station
+        ]
+        if not changed:
+            return
+
+        # One batched transform for the changed players instead of a lookup per marker
+        canvas_coords = self.controller.get_canvas_coords(
+            [locs[i] for i in changed],
+            self.display_width / float(self.original_width),
+            self.display_height / float(self.original_height),
+            self.offset_x,
+            self.offset_y,
+        )
+        radius = self._marker_radius()
+        created = False
+        for index, coords in zip(changed, canvas_coords):
+            self._marker_stations[index] = locs[index]
+            item = self._marker_items.get(index)
+            if coords is None:
+                if item is not None:
+                    self.canvas.itemconfigure(item, state='hidden')
+                continue
+
+            if item is None:
+                self._marker_items[index] = self.draw_canvas_marker(coords[0], coords[1], self.colours[index])
+                created = True
+                continue
+
+            self.canvas.itemconfigure(item, state='normal')
+            if relayout:
+                self._stop_animation(index)
+                self.canvas.itemconfigure(item, width=max(1, int(2 * self.scale)))
+                self._set_marker_center(item, coords[0], coords[1], radius)
+            elif animate and self.animation_ms > 0:
+                self._animate_marker(index, coords)
+            else:
+                self._stop_animation(index)
+                self._set_marker_center(item, coords[0], coords[1], radius)
+
+        if created:
+            # ensure markers stay above the map
+            self.canvas.tag_raise('marker')
+
+    def _marker_radius(self):
+        return max(3, int((self.original_diameter_of_marker * self.scale) / 2))
+
+    def _set_marker_center(self, item, canvas_x, canvas_y, radius):
+        self.canvas.coords(item, canvas_x - radius, canvas_y - radius, canvas_x + radius, canvas_y + radius)
+
+    def _animate_marker(self, index, target):
+        """Slide a marker to `target` over animation_ms using root.after frames."""
+        self._stop_animation(index)
+        item = self._marker_items[index]
+        x0, y0, x1, y1 = self.canvas.coords(item)
+        start = ((x0 + x1) / 2, (y0 + y1) / 2)
+        frames = max(1, self.animation_ms // self.animation_frame_ms)
+        radius = self._marker_radius()
+
+        def step(frame=1):
+            t = frame / frames
+            x = start[0] + (target[0] - start[0]) * t
+            y = start[1] + (target[1] - start[1]) * t
+            self._set_marker_center(item, x, y, radius)
+            if frame < frames:
+                self._animations[index] = self.root.after(self.animation_frame_ms, step, frame + 1)
+            else:
+                self._animations.pop(index, None)
+
+        step()
+
+    def _stop_animation(self, index):
+        job = self._animations.pop(index, None)
+        if job is not None:
+            self.root.after_cancel(job)
 
     def draw_marker_on_station(self, station_number, colour):
         coords = self.controller.get_station_coords(station_number)
+        if coords is None:
+            return
         self.draw_marker(coords[0], coords[1], colour)
 
     def draw_marker(self, x, y, color="red"):
@@ -217,7 +793,9 @@ class ClickableMap:
         # fractional mapping to avoid integer-division errors
         canvas_x = int(self.offset_x + (x / float(self.original_width)) * self.display_width)
         canvas_y = int(self.offset_y + (y / float(self.original_height)) * self.display_height)
+        return self.draw_canvas_marker(canvas_x, canvas_y, color)
 
+    def draw_canvas_marker(self, canvas_x, canvas_y, color="red"):
         # scale marker size with current display scale
         try:
             radius = max(3, int((self.original_diameter_of_marker * self.scale) / 2))
@@ -240,16 +818,52 @@ class ClickableMap:
             pass
         return oval_id
 
+    def draw_candidates(self, station_ids, colour="orange"):
+        """Shade the stations Mr X could be on (e.g. MrXTracker.candidates())."""
+        self._candidates = [int(s) for s in station_ids]
+        self.canvas.delete('belief')
+        if self.display_width is None or self.display_height is None:
+            return
+
+        canvas_coords = self.controller.get_canvas_coords(
+            self._candidates,
+            self.display_width / float(self.original_width),
+            self.display_height / float(self.original_height),
+            self.offset_x,
+            self.offset_y,
+        )
+        radius = max(3, int((self.original_diameter_of_marker * self.scale) / 2))
+        for coords in canvas_coords:
+            if coords is None:
+                continue
+            self.canvas.create_oval(
+                coords[0] - radius,
+                coords[1] - radius,
+                coords[0] + radius,
+                coords[1] + radius,
+                outline=colour,
+                width=max(2, int(4 * self.scale)), tags=('belief'))
+        # keep player markers on top of the shading
+        self.canvas.tag_raise('marker')
+
     # ---------------- UTILS ---------------- #
 
     def clear_markers(self):
+        for index in list(self._animations):
+            self._stop_animation(index)
         self.canvas.delete('marker')
+        self._marker_items = {}
+        self._marker_stations = {}
 
     def get_all_coordinates(self):
         return self.click_coordinates
     
 class PlayerHandler:
 
+    # (ticket, bar title, bar colour) of the info panels; Mr X also shows black and x2
+    DETECTIVE_TICKETS = (("taxi", "Taxi", "yellow"), ("bus", "Bus", "green"), ("tube", "Tube", "red"))
+    MISTER_X_TICKETS = DETECTIVE_TICKETS + (("black", "Black ticket", "black"), ("x2", "X2", "orange"))
+
     def __init__(self, root, controller, map_obj):
         self.controller = controller
         self.players = controller.players
@@ -267,157 +881,88 @@ class PlayerHandler:
         for i in range(6):
             self.frame.columnconfigure(i, weight=1, uniform="equal")
 
+        # Panel pool: every slot keeps its subframe, and each kind of panel
+        # ("player", "add", "blank", "info") is built once on first use and
+        # then only shown/hidden and refreshed, never destroyed.
+        self.subframes = []
+        self.comboboxes = [None] * self.max_players
+        self.player_widgets = [{} for _ in range(self.max_players)]
+        self._views = [{} for _ in range(self.max_players)]  # slot -> {kind: tk.Frame}
+        self._shown = [None] * self.max_players
+        for i in range(self.max_players):
+            subframe = tk.Frame(self.frame, bg="white", relief=tk.RAISED, borderwidth=2)
+            subframe.grid(row=0, column=i, sticky="nsew", padx=2, pady=2)
+            subframe.grid_rowconfigure(0, weight=1)
+            subframe.grid_columnconfigure(0, weight=1)
+            self.subframes.append(subframe)
 
-        
         self.add_player()
         self.add_player()
         self.add_player()
 
         self.create_panels()
 
+    # ---------------- PANEL POOL ---------------- #
+
+    def _show_view(self, index, kind, builder):
+        """Show the `kind` panel of slot `index`, building it with builder(frame, index) the first time."""
+        view = self._views[index].get(kind)
+        if view is None:
+            view = tk.Frame(self.subframes[index], bg="white", relief=tk.RAISED, borderwidth=0)
+            view.grid(row=0, column=0, sticky="nsew")
+            view.grid_rowconfigure(0, weight=0)  # Top (name/button)
+            view.grid_rowconfigure(1, weight=1)  # Middle (content)
+            view.grid_rowconfigure(2, weight=0)  # Bottom (combobox/thinking)
+            builder(view, index)
+            view._original_bg = view.cget("bg")
+            self._views[index][kind] = view
+        shown = self._shown[index]
+        if shown != kind:
+            if shown is not None:
+                self._views[index][shown].grid_remove()
+            view.grid()
+            self._shown[index] = kind
+        # The panel's look (set by its builder) goes on the slot frame, which draws the border
+        self.subframes[index].config(relief=view.cget("relief"))
+        self.highlight_panel(index, False)
+        return view
+
     def create_panels(self):
-        """Create or update all player panels"""
-        # Clear existing frames
-        for widget in self.frame.winfo_children():
-            widget.destroy()
-        
-        self.subframes = []
-        self.comboboxes = []
-        self.player_widgets = []
-        
+        """Show the setup panels: players, the "Add Player" button and empty slots"""
         for i in range(self.max_players):
-            # Create subframe
-            subframe = tk.Frame(self.frame, bg="white", 
-                               relief=tk.RAISED, borderwidth=2)
-            subframe.grid(row=0, column=i, sticky="nsew", padx=2, pady=2)
-            self.subframes.append(subframe)
-            
-            # Configure subframe grid
-            subframe.grid_rowconfigure(0, weight=0)  # Top (name/button)
-            subframe.grid_rowconfigure(1, weight=1)  # Middle (content)
-            subframe.grid_rowconfigure(2, weight=0)  # Bottom (combobox/empty)
-            
             # CASE 1: This position has a player
             if i < len(self.controller.players):
-                player = self.controller.players[i]
-                self.create_player_panel(subframe, i)
-            
+                self._show_view(i, "player", self.create_player_panel)
+                self.refresh_player_panel(i)
+
             # CASE 2: Next available spot - "Add Player" button
             elif i == len(self.controller.players):
-                self.create_add_player_button(subframe, i)
-            
+                self._show_view(i, "add", self.create_add_player_button)
+
             # CASE 3: Future empty spots - blank frame
             else:
-                self.create_blank_frame(subframe, i)
+                self._show_view(i, "blank", self.create_blank_frame)
 
     def create_live_game_panles(self):
-        """Create panels to display information of players"""
-        for widget in self.frame.winfo_children():
-            widget.destroy()
-
-        self.subframes = []
-        self.comboboxes = []
-        self.player_widgets = []
-
+        """Show the panels with the tickets of every player"""
         for i in range(self.max_players):
-            subframe = tk.Frame(self.frame, bg="white", relief=tk.RAISED, borderwidth=2)
-            subframe.grid(row=0, column=i, sticky="nsew", padx=2, pady=2)
-            self.subframes.append(subframe)
-
-            # IMPORTANT: allow internal grid content to stretch horizontally
-            subframe.grid_columnconfigure(0, weight=1)
-            subframe.grid_columnconfigure(1, weight=0)
-
-            # Make the content row expandable (bars live on row=1 in panels)
-            subframe.grid_rowconfigure(0, weight=0)
-            subframe.grid_rowconfigure(1, weight=1)
-
             if i < len(self.controller.players):
-                if i == 0:
-                    self.create_mister_x_info_panel(subframe, i)
-                else:
-                    self.create_detective_info_panel(subframe, i)
+                builder = self.create_mister_x_info_panel if i == 0 else self.create_detective_info_panel
+                self._show_view(i, "info", builder)
+                self.refresh_info_panel(i)
             else:
-                self.create_blank_frame(subframe, i)
+                self._show_view(i, "blank", self.create_blank_frame)
 
     def create_detective_info_panel(self, frame, index):
         """Display available move tickets for a detective (Taxi/Bus/Tube)."""
-
-        # Allow this frame's column 0 to stretch
-        frame.grid_columnconfigure(0, weight=1)
-        frame.grid_rowconfigure(1, weight=1)
-
-        name_label = tk.Label(
-            frame,
-            text=self.players[index][0],
-            font=("Arial", 11, "bold"),
-            bg=self.colours[index],
-            fg="white"
-        )
-        name_label.grid(row=0, column=0, sticky="ew", padx=(10, 10), pady=(8, 0))
-
-        length = 150
-        trough_color = "#E6E6E6"
-        row_padding = 6
-        bar_thickness = 6
-
-        t1, t2, t3 = "Taxi", "Bus", "Tube"
-        c1, c2, c3 = "yellow", "green", "red"
-        m1, m2, m3 = 10, 8, 4
-
-        container = ttk.Frame(frame)
-        container.grid(row=1, column=0, sticky="nsew", padx=6, pady=(6, 6))
-        container.grid_columnconfigure(0, weight=1)
-
-        style = ttk.Style(container)
-
-        style1 = f"TaxiPB.{uuid.uuid4().hex}.Horizontal.TProgressbar"
-        style2 = f"BusPB.{uuid.uuid4().hex}.Horizontal.TProgressbar"
-        style3 = f"TubePB.{uuid.uuid4().hex}.Horizontal.TProgressbar"
-
-        for sname, col in [(style1, c1), (style2, c2), (style3, c3)]:
-            style.configure(
-                sname,
-                thickness=bar_thickness,
-                troughcolor=trough_color,
-                background=col,
-                bordercolor=trough_color,
-                lightcolor=col,
-                darkcolor=col,
-            )
-
-        p1 = StagedProgressBar.StagedProgress(
-            container, title=t1, stages=m1, length=length,
-            bar_color=c1, trough_color=trough_color, style=style1
-        )
-        p2 = StagedProgressBar.StagedProgress(
-            container, title=t2, stages=m2, length=length,
-            bar_color=c2, trough_color=trough_color, style=style2
-        )
-        p3 = StagedProgressBar.StagedProgress(
-            container, title=t3, stages=m3, length=length,
-            bar_color=c3, trough_color=trough_color, style=style3
-        )
-
-        # IMPORTANT: expand=True so they stretch with the container
-        p1.pack(fill="x", expand=True, pady=(0, row_padding))
-        p2.pack(fill="x", expand=True, pady=(0, row_padding))
-        p3.pack(fill="x", expand=True)
-
-        p1.set_stage(m1)
-        p2.set_stage(m2)
-        p3.set_stage(m3)
-
-        while len(self.player_widgets) <= index:
-            self.player_widgets.append({})
-
-        self.player_widgets[index]["ticket_bars"] = {"taxi": p1, "bus": p2, "tube": p3}
-        self.player_widgets[index]["ticket_max"] = {"taxi": m1, "bus": m2, "tube": m3}
-        return self.player_widgets[index]["ticket_bars"]
+        return self._create_info_panel(frame, index, self.DETECTIVE_TICKETS)
 
     def create_mister_x_info_panel(self, frame, index):
         """Display available move tickets for Mr X (Taxi/Bus/Tube/Black/X2)."""
+        return self._create_info_panel(frame, index, self.MISTER_X_TICKETS)
 
+    def _create_info_panel(self, frame, index, tickets):
+        # Allow this frame's column 0 to stretch
         frame.grid_columnconfigure(0, weight=1)
         frame.grid_rowconfigure(1, weight=1)
 
@@ -435,78 +980,86 @@ class PlayerHandler:
         row_padding = 6
         bar_thickness = 6
 
-        t1, t2, t3, t4, t5 = "Taxi", "Bus", "Tube", "Black ticket", "X2"
-        c1, c2, c3, c4, c5 = "yellow", "green", "red", "black", "orange"
-
-        m1, m2, m3 = 4, 3, 3
-        m4 = len(self.controller.players)
-        m5 = 2
-
         container = ttk.Frame(frame)
         container.grid(row=1, column=0, sticky="nsew", padx=6, pady=(6, 6))
         container.grid_columnconfigure(0, weight=1)
 
-        style = ttk.Style(container)
-
-        style1 = f"MrXTaxiPB.{uuid.uuid4().hex}.Horizontal.TProgressbar"
-        style2 = f"MrXBusPB.{uuid.uuid4().hex}.Horizontal.TProgressbar"
-        style3 = f"MrXTubePB.{uuid.uuid4().hex}.Horizontal.TProgressbar"
-        style4 = f"MrXBlackPB.{uuid.uuid4().hex}.Horizontal.TProgressbar"
-        style5 = f"MrXX2PB.{uuid.uuid4().hex}.Horizontal.TProgressbar"
-
-        for sname, col in [(style1, c1), (style2, c2), (style3, c3), (style4, c4), (style5, c5)]:
-            style.configure(
-                sname,
-                thickness=bar_thickness,
-                troughcolor=trough_color,
-                background=col,
-                bordercolor=trough_color,
-                lightcolor=col,
-                darkcolor=col,
+        maxima = self._ticket_maxima(index)
+        bars = {}
+        for n, (ticket, title, colour) in enumerate(tickets):
+            # One shared style per colour, however many panels and games there are
+            style = StagedProgressBar.progressbar_style(container, colour, trough_color, bar_thickness)
+            bar = StagedProgressBar.StagedProgress(
+                container, title=title, stages=maxima[ticket], length=length,
+                bar_color=colour, trough_color=trough_color, style=style
             )
+            # IMPORTANT: expand=True so they stretch with the container
+            bar.pack(fill="x", expand=True, pady=(0, row_padding if n < len(tickets) - 1 else 0))
+            bar.set_stage(maxima[ticket])
+            bars[ticket] = bar
+
+        widgets = self.player_widgets[index]
+        widgets["name"] = name_label
+        widgets["ticket_bars"] = bars
+        widgets["ticket_max"] = {ticket: maxima[ticket] for ticket in bars}
+        self.create_thinking_indicator(frame, index)
+        return bars
+
+    def _ticket_maxima(self, index):
+        """Starting tickets of player `index`; a ticket bar needs at least one stage."""
+        cards = Controll.start_cards(index, len(self.controller.players))
+        return {ticket: max(1, count) for ticket, count in cards}
+
+    def refresh_info_panel(self, index):
+        """Bring a reused info panel back to the start of a game."""
+        widgets = self.player_widgets[index]
+        widgets["name"].config(text=self.players[index][0])
+        maxima = self._ticket_maxima(index)
+        for ticket, bar in widgets["ticket_bars"].items():
+            if bar.stages != maxima[ticket]:
+                bar.set_stages(maxima[ticket])
+            # queued too, so it replaces any update of the previous game still pending
+            bar.queue_stage(maxima[ticket])
+            widgets["ticket_max"][ticket] = maxima[ticket]
+        self.hide_thinking(index)
+
+    def create_thinking_indicator(self, frame, index):
+        """Progress bar shown below the tickets while this player's agent is computing a move."""
+        bar = ttk.Progressbar(frame, mode="determinate", maximum=1.0, length=150)
+        bar.grid(row=2, column=0, sticky="ew", padx=10, pady=(0, 8))
+        bar.grid_remove()
+        self.player_widgets[index]["thinking"] = bar
+        return bar
+
+    def show_thinking(self, index, progress=None):
+        """`progress` is the fraction of the agent's budget used, None when unknown."""
+        if index >= len(self.player_widgets) or "thinking" not in self.player_widgets[index]:
+            return
+        bar = self.player_widgets[index]["thinking"]
+        if not bar.winfo_manager():
+            bar.grid()
+        if progress is None:
+            if str(bar.cget("mode")) != "indeterminate":
+                bar.configure(mode="indeterminate")
+                bar.start(50)
+        else:
+            if str(bar.cget("mode")) != "determinate":
+                bar.stop()
+                bar.configure(mode="determinate")
+            bar["value"] = min(1.0, progress)
 
-        p1 = StagedProgressBar.StagedProgress(container, title=t1, stages=m1, length=length,
-                                              bar_color=c1, trough_color=trough_color, style=style1)
-        p2 = StagedProgressBar.StagedProgress(container, title=t2, stages=m2, length=length,
-                                              bar_color=c2, trough_color=trough_color, style=style2)
-        p3 = StagedProgressBar.StagedProgress(container, title=t3, stages=m3, length=length,
-                                              bar_color=c3, trough_color=trough_color, style=style3)
-        p4 = StagedProgressBar.StagedProgress(container, title=t4, stages=m4, length=length,
-                                              bar_color=c4, trough_color=trough_color, style=style4)
-        p5 = StagedProgressBar.StagedProgress(container, title=t5, stages=m5, length=length,
-                                              bar_color=c5, trough_color=trough_color, style=style5)
-
-        p1.pack(fill="x", expand=True, pady=(0, row_padding))
-        p2.pack(fill="x", expand=True, pady=(0, row_padding))
-        p3.pack(fill="x", expand=True, pady=(0, row_padding))
-        p4.pack(fill="x", expand=True, pady=(0, row_padding))
-        p5.pack(fill="x", expand=True)
-
-        p1.set_stage(m1)
-        p2.set_stage(m2)
-        p3.set_stage(m3)
-        p4.set_stage(m4)
-        p5.set_stage(m5)
-
-        while len(self.player_widgets) <= index:
-            self.player_widgets.append({})
-
-        self.player_widgets[index]["ticket_bars"] = {
-            "taxi": p1,
-            "bus": p2,
-            "tube": p3,
-            "black": p4,
-            "x2": p5,
-        }
-        self.player_widgets[index]["ticket_max"] = {
-            "taxi": m1, "bus": m2, "tube": m3, "black": m4, "x2": m5
-        }
-        return self.player_widgets[index]["ticket_bars"]
+    def hide_thinking(self, index):
+        if index >= len(self.player_widgets) or "thinking" not in self.player_widgets[index]:
+            return
+        bar = self.player_widgets[index]["thinking"]
+        bar.stop()
+        bar["value"] = 0
+        bar.grid_remove()
 
     
     
     def create_player_panel(self, frame, index):
-        """Create a panel for an existing player"""
+        """Create the setup panel of a player slot; refresh_player_panel fills in the player"""
         # Top: Player name
         name_label = tk.Label(frame, text=self.players[index][0],
                              font=('Arial', 11, 'bold'),
@@ -525,42 +1078,13 @@ class PlayerHandler:
                              fg='black')
         info_label.grid(row=0, column=0, sticky="nw",padx= (2,0), pady=(2, 0))
 
-        var = self.starting_strings[index]  # must be a tk.StringVar (or IntVar, etc.)
-
-        # Remove an existing trace for this index (prevents double-calling after UI rebuild)
-        if not hasattr(self, "_pos_trace_ids"):
-            self._pos_trace_ids = {}
-
-        old_id = self._pos_trace_ids.get(index)
-        if old_id:
-            try:
-                var.trace_remove("write", old_id)
-            except tk.TclError:
-                pass  # trace might already be gone
-
-        # Add new trace; use lambda to bind the player index
-        trace_id = var.trace_add("write", lambda *_args, i=index: self.on_position_change(i))
-        self._pos_trace_ids[index] = trace_id
-        # Create entry widget
+        # Create entry widget; its variable is bound by refresh_player_panel
         name_entry = tk.Entry(info_frame, 
-                             textvariable=self.starting_strings[index], 
                              font=('calibre', 10, 'normal'),
                              state='disabled',  # Start disabled for RNG
                              width=8)
         name_entry.grid(row=0, column=1, sticky="w", padx=(5, 0), pady=(2, 0))
         
-        # Create radio variable for this player
-        if index not in self.radio_vars:
-            # Check if player has RNG value
-            current_val = self.starting_strings[index].get()
-            if current_val == "RNG":
-                self.radio_vars[index] = tk.IntVar(value=1)  # Random
-            else:
-                self.radio_vars[index] = tk.IntVar(value=2)  # Manual
-        else:
-            # Keep existing value
-            pass
-        
         # Radio buttons with correct callback
         radio_frame = tk.Frame(info_frame)
         radio_frame.grid(row=1, column=0, columnspan=2, sticky="w", pady=(5, 0))
@@ -569,7 +1093,6 @@ class PlayerHandler:
         radio_1 = tk.Radiobutton(
             radio_frame, 
             text="Random", 
-            variable=self.radio_vars[index], 
             value=1,
             command=lambda idx=index, entry=name_entry: self.__on_radial_selection(idx, entry)
         )
@@ -579,7 +1102,6 @@ class PlayerHandler:
         radio_2 = tk.Radiobutton(
             radio_frame, 
             text="Manual", 
-            variable=self.radio_vars[index], 
             value=2,
             command=lambda idx=index, entry=name_entry: self.__on_radial_selection(idx, entry)
         )
@@ -597,31 +1119,86 @@ class PlayerHandler:
                                values=options,
                                state="readonly",
                                font=('Arial', 9))
-        combobox.set(options[0])
         combobox.grid(row=2, column=0, sticky="ew", padx=10, pady=(0, 8))
+        self.comboboxes[index] = combobox
         
         # Bind events
         combobox.player_index = index
         combobox.bind("<<ComboboxSelected>>", 
                      lambda e, idx=index: self.on_agent_selection(idx))
         
-        # Add remove button for players (except first 2 if you want)
-        if index == (len(self.players) - 1) and index > 2:  # Can remove players added after initial 2
-            remove_btn = tk.Button(frame,
-                              text="X",
-                              font=('Arial', 10, 'bold'),
-                              bg="#FF6B6B",
-                              fg="white",
-                              activebackground="#FF3333",
-                              activeforeground="white",
-                              relief=tk.FLAT,
-                              borderwidth=0,
-                              padx=0,
-                              pady=0,
-                              width=2,
-                              height=1,
-                              command=lambda idx=index: self.delete_player())
-            remove_btn.grid(row=0, column=1, sticky="e", padx=(0, 10), pady=(8, 0))
+        # Remove button, only shown on the last player (see refresh_player_panel)
+        remove_btn = tk.Button(frame,
+                          text="X",
+                          font=('Arial', 10, 'bold'),
+                          bg="#FF6B6B",
+                          fg="white",
+                          activebackground="#FF3333",
+                          activeforeground="white",
+                          relief=tk.FLAT,
+                          borderwidth=0,
+                          padx=0,
+                          pady=0,
+                          width=2,
+                          height=1,
+                          command=lambda idx=index: self.delete_player())
+        remove_btn.grid(row=0, column=1, sticky="e", padx=(0, 10), pady=(8, 0))
+        remove_btn.grid_remove()
+
+        self.player_widgets[index]["setup"] = {
+            "name": name_label,
+            "entry": name_entry,
+            "radios": (radio_1, radio_2),
+            "remove": remove_btn,
+            "position_var": None,
+            "radio_var": None,
+        }
+
+    def refresh_player_panel(self, index):
+        """Point a (possibly reused) setup panel at the current state of player `index`."""
+        widgets = self.player_widgets[index]["setup"]
+        widgets["name"].config(text=self.players[index][0])
+
+        var = self.starting_strings[index]  # must be a tk.StringVar (or IntVar, etc.)
+        if widgets["position_var"] is not var:
+            # Move the trace over from the previous variable (prevents double-calling)
+            if not hasattr(self, "_pos_trace_ids"):
+                self._pos_trace_ids = {}
+
+            old_id = self._pos_trace_ids.get(index)
+            if old_id and widgets["position_var"] is not None:
+                try:
+                    widgets["position_var"].trace_remove("write", old_id)
+                except tk.TclError:
+                    pass  # trace might already be gone
+
+            # Add new trace; use lambda to bind the player index
+            trace_id = var.trace_add("write", lambda *_args, i=index: self.on_position_change(i))
+            self._pos_trace_ids[index] = trace_id
+            widgets["entry"].config(textvariable=var)
+            widgets["position_var"] = var
+
+        # Create radio variable for this player
+        if index not in self.radio_vars:
+            # Check if player has RNG value
+            if var.get() == "RNG":
+                self.radio_vars[index] = tk.IntVar(value=1)  # Random
+            else:
+                self.radio_vars[index] = tk.IntVar(value=2)  # Manual
+        radio_var = self.radio_vars[index]
+        if widgets["radio_var"] is not radio_var:
+            for radio in widgets["radios"]:
+                radio.config(variable=radio_var)
+            widgets["radio_var"] = radio_var
+        widgets["entry"].config(state='disabled' if radio_var.get() == 1 else 'normal')
+
+        self.comboboxes[index].set(self.controller.agent_choices[index])
+
+        # Can remove players added after the initial 3, last one first
+        if index == (len(self.players) - 1) and index > 2:
+            widgets["remove"].grid()
+        else:
+            widgets["remove"].grid_remove()
     
     def create_add_player_button(self, frame, index):
         """Create the 'Add Player' button in the next available spot"""
@@ -664,57 +1241,49 @@ class PlayerHandler:
     
     def add_player(self):
         self.controller.add_player()
-        number_of_players = len(self.controller.players)
-        if number_of_players < 7: 
-                self.starting_strings.append(tk.StringVar(value="RNG"))
+        self.sync_players()
         self.create_panels()
         self.map_obj.draw_full_state(self.controller.state)
 
 
     def delete_player(self):
         self.controller.delete_player()
-        number_of_players = len(self.players)
-        if number_of_players > 3:
-            # Remove the radio variable too
-            removed_index = len(self.players)
-            if removed_index in self.radio_vars:
-                del self.radio_vars[removed_index]
-            if removed_index in self.starting_strings:
-                del self.starting_strings[removed_index]
+        self.sync_players()
         self.create_panels()
         self.map_obj.draw_full_state(self.controller.state)
 
+    def sync_players(self):
+        """Give every player in controller.players a position and radio variable, and drop the rest."""
+        number_of_players = len(self.players)
+        del self.starting_strings[number_of_players:]
+        while len(self.starting_strings) < number_of_players:
+            self.starting_strings.append(tk.StringVar(value="RNG"))
+        for index in [i for i in self.radio_vars if i >= number_of_players]:
+            del self.radio_vars[index]
+
 
     def on_agent_selection(self, idx):
-        print(f"Selected combo {idx}")
+        choice = self.comboboxes[idx].get()
+        self.controller.set_agent(idx, choice)
 
                 
     def highlight_panel(self, panel_index, highlight=True, color="lightblue"):
         """Highlight panel by changing background color"""
         if 0 <= panel_index < len(self.subframes):
             frame = self.subframes[panel_index]
-            
-            if highlight:
-                # Store original color before changing
-                if not hasattr(frame, '_original_bg'):
-                    frame._original_bg = frame.cget('bg')
-                
-                # Change background color
-                frame.configure(bg=color)
-                
-                # Also highlight child widgets
-                for widget in frame.winfo_children():
-                    if isinstance(widget, tk.Frame):
-                        widget.configure(bg=color)
-            else:
-                # Restore original color
-                if hasattr(frame, '_original_bg'):
-                    frame.configure(bg=frame._original_bg)
-                    
-                    # Restore child frames
-                    for widget in frame.winfo_children():
-                        if isinstance(widget, tk.Frame):
-                            widget.configure(bg=frame._original_bg)
+            view = self._views[panel_index].get(self._shown[panel_index])
+            if view is None:
+                return
+
+            # Restore the colour the shown panel was built with
+            bg = color if highlight else view._original_bg
+            frame.configure(bg=bg)
+            view.configure(bg=bg)
+
+            # Also highlight child widgets
+            for widget in view.winfo_children():
+                if isinstance(widget, tk.Frame):
+                    widget.configure(bg=bg)
 
     def on_position_change(self, player_index: int, *_):
         """
@@ -754,17 +1323,20 @@ class PlayerHandler:
                 entry.insert(0, f"{random_num}")  # Default position
             print(f"Player {player_index}: Manual selected - entry enabled")
 
+    @span("ui.update_tickets")
     def update_tickets(self, state):
+        """
+        Show the tickets of `state`. The bar writes are queued and done by one
+        after_idle flush (bars that did not change are skipped), so several
+        states per frame during a fast replay only redraw once.
+        """
         tickets = state.player_cards
-        for player_index in range(0, len(self.players)):
-            bars = self.player_widgets[player_index]["ticket_bars"]
-            bars["taxi"].set_stage(tickets[player_index]["taxi"])
-            bars["bus"].set_stage(tickets[player_index]["bus"])
-            bars["tube"].set_stage(tickets[player_index]["tube"])
-            if player_index == 0:
-                bars["black"].set_stage(tickets[player_index]["black"])
-                bars["x2"].set_stage(tickets[player_index]["x2"])
-
+        for player_index in range(0, min(len(self.players), len(tickets))):
+            if self._shown[player_index] != "info":
+                continue
+            counts = dict(tickets[player_index])
+            for ticket, bar in self.player_widgets[player_index]["ticket_bars"].items():
+                bar.queue_stage(counts[ticket])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,255 @@
+"""
+Opt-in timers, counters and profiling for the controller, agents and Tk handlers.
+
+Functions are marked with @span("name"). While instrumentation is disabled
+the wrapper only checks one module global before calling through, so marked
+functions cost about one extra call. Once enable()d every call is timed into
+a per-span histogram (p50/p95/p99), and with tracing each call is also kept
+as a Chrome trace event; dump_trace() writes them for chrome://tracing or
+https://ui.perfetto.dev.
+
+    SY_INSTRUMENT=1 python Graphics.py     # start with instrumentation on
+
+cProfile captures are separate: start_profile() / stop_profile() profile the
+calling thread (the Tk thread when toggled from the Options menu).
+Everything that is only needed for those (cProfile, pstats, json) is
+imported on first use, since Controll imports this module.
+"""
+import functools
+import math
+import os
+import threading
+import time
+from collections import deque
+
+# Checked by every @span wrapper; everything else only runs when it is True
+_enabled = False
+_tracing = False
+
+_lock = threading.Lock()
+_spans = {}  # name -> _Histogram
+_counters = {}  # name -> int
+_trace = deque(maxlen=200_000)
+_trace_origin = time.perf_counter_ns()
+_profiler = None
+
+# Histogram resolution: 8 buckets per power of two, about 9% wide
+BUCKETS_PER_OCTAVE = 8
+
+
+class _Histogram:
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.buckets = {}
+
+    def add(self, ns):
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if ns > self.max:
+            self.max = ns
+        index = int(math.log2(ns) * BUCKETS_PER_OCTAVE) if ns > 0 else 0
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, q):
+        """Approximate q-quantile in ns (bucket midpoint, clamped to the observed range)."""
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                value = 2 ** ((index + 0.5) / BUCKETS_PER_OCTAVE)
+                return float(min(max(value, self.min), self.max))
+        return float(self.max)
+
+
+# ---------------- SWITCHES ---------------- #
+
+def enable(trace=True):
+    global _enabled, _tracing
+    _tracing = trace
+    _enabled = True
+
+
+def disable():
+    global _enabled, _tracing
+    _enabled = False
+    _tracing = False
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _trace.clear()
+
+
+# ---------------- RECORDING ---------------- #
+
+def _record(name, start, end):
+    duration = end - start
+    with _lock:
+        histogram = _spans.get(name)
+        if histogram is None:
+            histogram = _spans[name] = _Histogram()
+        histogram.add(duration)
+        if _tracing:
+            _trace.append((name, start, duration, threading.get_ident()))
+
+
+def span(name):
+    """Decorator timing every call of the function as span `name` while enabled."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(name, start, time.perf_counter_ns())
+        return wrapper
+    return decorate
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, self.start, time.perf_counter_ns())
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+def timer(name):
+    """Context manager timing a block as span `name` (a shared no-op while disabled)."""
+    return _Timer(name) if _enabled else _NO_TIMER
+
+
+def count(name, n=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+        if _tracing:
+            _trace.append((name, time.perf_counter_ns(), None, _counters[name]))
+
+
+# ---------------- REPORTING ---------------- #
+
+def snapshot():
+    """{"spans": {name: stats in ms}, "counters": {name: n}}"""
+    with _lock:
+        spans = {}
+        for name, h in _spans.items():
+            spans[name] = {
+                "count": h.count,
+                "total_ms": h.total / 1e6,
+                "mean_ms": h.total / h.count / 1e6,
+                "p50_ms": h.percentile(0.50) / 1e6,
+                "p95_ms": h.percentile(0.95) / 1e6,
+                "p99_ms": h.percentile(0.99) / 1e6,
+                "max_ms": h.max / 1e6,
+            }
+        return {"spans": spans, "counters": dict(_counters)}
+
+
+def report():
+    """Text table of every span, slowest total first, followed by the counters."""
+    data = snapshot()
+    lines = [f"{'span':34s} {'count':>8s} {'total ms':>10s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'max':>8s}"]
+    for name, s in sorted(data["spans"].items(), key=lambda item: -item[1]["total_ms"]):
+        lines.append(f"{name:34s} {s['count']:8d} {s['total_ms']:10.1f} {s['p50_ms']:8.2f} "
+                     f"{s['p95_ms']:8.2f} {s['p99_ms']:8.2f} {s['max_ms']:8.2f}")
+    for name, n in sorted(data["counters"].items()):
+        lines.append(f"{name:34s} {n:8d}")
+    return "\n".join(lines)
+
+
+def dump_trace(path):
+    """Write the recorded spans and counters as Chrome trace-event JSON."""
+    import json
+
+    pid = os.getpid()
+    with _lock:
+        records = list(_trace)
+    events = []
+    for name, start, duration, extra in records:
+        ts = (start - _trace_origin) / 1e3
+        if duration is None:
+            events.append({"name": name, "ph": "C", "ts": ts, "pid": pid, "args": {name: extra}})
+        else:
+            events.append({"name": name, "cat": name.split(".", 1)[0], "ph": "X", "ts": ts,
+                           "dur": duration / 1e3, "pid": pid, "tid": extra})
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return len(events)
+
+
+# ---------------- CPROFILE ---------------- #
+
+def profiling():
+    return _profiler is not None
+
+
+def start_profile():
+    """Start a cProfile capture of the calling thread."""
+    import cProfile
+
+    global _profiler
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    return _profiler
+
+
+def stop_profile(path=None, limit=25):
+    """Stop the capture; save it to `path` (pstats format) and return the top functions as text."""
+    import io
+    import pstats
+
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return ""
+    profiler.disable()
+    if path:
+        profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+if os.environ.get("SY_INSTRUMENT"):
+    enable()
@@ -0,0 +1,123 @@
+import math
+import threading
+from collections import OrderedDict
+
+
+class ImagePyramid:
+    """
+    Power-of-two downscales of the map: level k is the original shrunk by 2**k.
+
+    The levels are built in a background thread so opening the window is not
+    delayed; until then every request is served from the full image. Only
+    PIL work happens on that thread, never Tk calls.
+    """
+    def __init__(self, image, min_size=256, build_async=True):
+        self.levels = [image]
+        self.min_size = min_size
+        self.ready = threading.Event()
+        if build_async:
+            self._thread = threading.Thread(target=self._build, name="map-pyramid", daemon=True)
+            self._thread.start()
+        else:
+            self._thread = None
+            self._build()
+
+    def _build(self):
+        levels = [self.levels[0]]
+        current = self.levels[0]
+        while min(current.size) // 2 >= self.min_size:
+            current = current.reduce(2)
+            levels.append(current)
+        # Swap the whole list in at once so readers never see a half-built pyramid
+        self.levels = levels
+        self.ready.set()
+
+    @property
+    def size(self):
+        return self.levels[0].size
+
+    def level_for(self, scale):
+        """Coarsest level that still has at least `scale` x the original resolution."""
+        levels = self.levels
+        if scale >= 1 or len(levels) == 1:
+            return 0
+        return max(0, min(len(levels) - 1, int(math.floor(math.log2(1.0 / scale)))))
+
+    def render_region(self, left, top, right, bottom, out_size, resample=None):
+        """
+        Crop the box (left, top, right, bottom), given in original-image pixels,
+        from the best pyramid level and scale it to `out_size` (LANCZOS by default).
+        """
+        if resample is None:
+            from PIL import Image
+            resample = Image.Resampling.LANCZOS
+        width, height = out_size
+        full_w, full_h = self.levels[0].size
+        right = min(right, full_w)
+        bottom = min(bottom, full_h)
+        scale = width / max(1e-9, right - left)
+        level = self.level_for(scale)
+        factor = 2 ** level
+        source = self.levels[level]
+        box = (left / factor, top / factor, right / factor, bottom / factor)
+        return source.resize((width, height), resample, box=box)
+
+
+class TileCache:
+    """Least-recently-used cache for rendered tiles."""
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self._items = OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+
+    def put(self, key, item):
+        self._items[key] = item
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+def visible_tiles(display_size, offset, canvas_size, tile_size):
+    """
+    Tile indices (tx, ty) of the scaled map that intersect the canvas.
+
+    The scaled map is `display_size` pixels, its top-left corner sits at
+    `offset` on a canvas of `canvas_size`, and is cut into `tile_size` squares.
+    """
+    display_w, display_h = display_size
+    offset_x, offset_y = offset
+    canvas_w, canvas_h = canvas_size
+
+    left = max(0, -offset_x)
+    top = max(0, -offset_y)
+    right = min(display_w, canvas_w - offset_x)
+    bottom = min(display_h, canvas_h - offset_y)
+    if right <= left or bottom <= top:
+        return []
+
+    return [
+        (tx, ty)
+        for ty in range(top // tile_size, (bottom - 1) // tile_size + 1)
+        for tx in range(left // tile_size, (right - 1) // tile_size + 1)
+    ]
+
+
+def tile_box(tx, ty, tile_size, display_size, scale):
+    """((left, top, right, bottom) in original pixels, (w, h) in display pixels) of a tile."""
+    display_w, display_h = display_size
+    x0 = tx * tile_size
+    y0 = ty * tile_size
+    x1 = min(display_w, x0 + tile_size)
+    y1 = min(display_h, y0 + tile_size)
+    return (x0 / scale, y0 / scale, x1 / scale, y1 / scale), (x1 - x0, y1 - y0)
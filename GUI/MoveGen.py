@@ -0,0 +1,173 @@
+from Board import TICKET_TRANSPORTS, TRANSPORT_BITS, load_board
+from Controll import TICKET_FOR_TRANSPORT, DoubleMove, GameState, Move, TransportType
+
+# Mr X moves made before the detectives have run out of time
+MAX_TURNS = 24
+# Turns after which Mr X has to show where he is
+REVEAL_TURNS = (3, 8, 13, 18, 24)
+
+MR_X = 0
+DETECTIVES = 1
+
+BLACK_TICKET = TICKET_FOR_TRANSPORT[TransportType.BLACK]
+
+
+def occupancy(stations):
+    """Bitboard with one bit set per station id."""
+    bits = 0
+    for station in stations:
+        bits |= 1 << station
+    return bits
+
+
+def iter_bits(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def is_caught(state):
+    return state.player_locs[0] in state.player_locs[1:]
+
+
+def winner(state):
+    """MR_X, DETECTIVES, or None while the game is still running."""
+    if not state.victory_flag:
+        return None
+    if is_caught(state):
+        return DETECTIVES
+    # Game ended on Mr X's move before the time ran out: he had nowhere to go
+    if state.current_player == 0 and state.turn < MAX_TURNS:
+        return DETECTIVES
+    return MR_X
+
+
+class MoveGenerator:
+    """
+    Legal move generation over station bitboards.
+
+    For every station and ticket transport the reachable neighbours are
+    stored as one Python int with a bit per station id, so "where can this
+    player go" is an AND with the inverted detective occupancy followed by a
+    walk over the set bits.
+    """
+    def __init__(self, board=None):
+        self.board = board or load_board()
+        size = self.board.size
+
+        layers = {t: [0] * size for t in TICKET_TRANSPORTS}
+        black = [0] * size
+        for station in range(size):
+            for neighbour, mask in self.board.adjacency[station]:
+                bit = 1 << neighbour
+                black[station] |= bit
+                for transport in TICKET_TRANSPORTS:
+                    if mask & TRANSPORT_BITS[transport]:
+                        layers[transport][station] |= bit
+
+        self.layers = layers
+        self.black_layer = black
+        self._ticket_layers = tuple(
+            (transport, TICKET_FOR_TRANSPORT[transport], layers[transport])
+            for transport in TICKET_TRANSPORTS
+        )
+
+    def reachable(self, station, transport=None):
+        """Bitboard of neighbours of `station`; any edge when `transport` is None."""
+        if transport is None or transport == TransportType.BLACK:
+            return self.black_layer[station]
+        return self.layers[transport][station]
+
+    def _single_moves(self, player, station, counts, free, out):
+        for transport, ticket, layer in self._ticket_layers:
+            if counts.get(ticket, 0) > 0:
+                bits = layer[station] & free
+                while bits:
+                    low = bits & -bits
+                    out.append(Move(player, station, low.bit_length() - 1, transport))
+                    bits ^= low
+        if player == 0 and counts.get(BLACK_TICKET, 0) > 0:
+            bits = self.black_layer[station] & free
+            while bits:
+                low = bits & -bits
+                out.append(Move(player, station, low.bit_length() - 1, TransportType.BLACK))
+                bits ^= low
+        return out
+
+    def legal_moves(self, state):
+        """
+        Every legal move for `state.current_player`.
+
+        Detectives may not share a station, and Mr X may not step onto a
+        detective. Mr X also gets black-ticket moves and, while he holds an
+        x2 card and both legs fit before MAX_TURNS, every two-step DoubleMove.
+        An empty list means the player has to pass.
+        """
+        if state.victory_flag:
+            return []
+        player = state.current_player
+        station = state.player_locs[player]
+        free = ~occupancy(state.player_locs[1:])
+        counts = dict(state.player_cards[player])
+
+        moves = self._single_moves(player, station, counts, free, [])
+        if player == 0 and counts.get("x2", 0) > 0 and state.turn + 2 <= MAX_TURNS:
+            for first in moves[:]:
+                ticket = TICKET_FOR_TRANSPORT[first.type]
+                counts[ticket] -= 1
+                for second in self._single_moves(0, first.to_station, counts, free, []):
+                    moves.append(DoubleMove(first, second))
+                counts[ticket] += 1
+        return moves
+
+    def apply(self, state, move):
+        """
+        The GameState after `move`; `None` means the current player passes.
+
+        Tickets a detective spends go to Mr X. `turn` counts Mr X's moves
+        (a double move counts twice), and the game is flagged as over when
+        Mr X is caught, cannot move, or the last round has been played.
+        """
+        player = state.current_player
+        locs = list(state.player_locs)
+        cards = list(state.player_cards)
+        turn = state.turn
+
+        if move is None:
+            if player == 0:
+                return GameState(turn, state.player_locs, state.player_cards, 0, True)
+            legs = ()
+        elif isinstance(move, DoubleMove):
+            cards[0] = _spend(cards[0], "x2", -1)
+            legs = (move.first, move.second)
+        else:
+            legs = (move,)
+
+        for leg in legs:
+            ticket = TICKET_FOR_TRANSPORT[leg.type]
+            locs[player] = leg.to_station
+            cards[player] = _spend(cards[player], ticket, -1)
+            if player == 0:
+                turn += 1
+            else:
+                cards[0] = _spend(cards[0], ticket, 1)
+
+        next_player = (player + 1) % len(locs)
+        over = locs[0] in locs[1:] or (next_player == 0 and turn >= MAX_TURNS)
+        return GameState(turn, tuple(locs), tuple(cards), next_player, over)
+
+
+def _spend(row, ticket, delta):
+    return tuple((name, count + delta) if name == ticket else (name, count) for name, count in row)
+
+
+_generator = None
+
+
+def default_generator():
+    """Process-wide MoveGenerator over the default board."""
+    global _generator
+    if _generator is None:
+        _generator = MoveGenerator()
+    return _generator
@@ -0,0 +1,185 @@
+import json
+from array import array
+from bisect import bisect_left
+
+from Controll import DoubleMove, GameState, Move, TransportType
+from MoveGen import default_generator
+from StateCodec import pack, unpack
+
+RECORD_VERSION = 1
+KEYFRAME_INTERVAL = 16
+
+
+def move_to_json(move):
+    if move is None:
+        return None
+    if isinstance(move, DoubleMove):
+        return [move_to_json(move.first), move_to_json(move.second)]
+    return [move.player, move.from_station, move.to_station, move.type.value]
+
+
+def move_from_json(data):
+    if data is None:
+        return None
+    if isinstance(data[0], list):
+        return DoubleMove(move_from_json(data[0]), move_from_json(data[1]))
+    player, from_station, to_station, transport = data
+    return Move(player, from_station, to_station, TransportType(transport))
+
+
+def state_to_json(state):
+    return {
+        "turn": state.turn,
+        "player_locs": list(state.player_locs),
+        "player_cards": [[list(pair) for pair in row] for row in state.player_cards],
+        "current_player": state.current_player,
+        "victory_flag": state.victory_flag,
+    }
+
+
+def state_from_json(data):
+    return GameState(
+        turn=data["turn"],
+        player_locs=tuple(data["player_locs"]),
+        player_cards=tuple(tuple((name, count) for name, count in row) for row in data["player_cards"]),
+        current_player=data["current_player"],
+        victory_flag=data["victory_flag"],
+    )
+
+
+class GameRecord:
+    """
+    A played game: the starting state, every move, and a packed keyframe of
+    the full GameState every `keyframe_interval` moves.
+
+    state_at(ply) starts from the nearest keyframe at or before `ply` and
+    replays at most keyframe_interval - 1 moves, so seeking anywhere in a
+    game costs the same as seeking near the start.
+    """
+    def __init__(self, initial_state, keyframe_interval=KEYFRAME_INTERVAL, generator=None):
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be >= 1")
+        self.initial_state = initial_state
+        self.keyframe_interval = keyframe_interval
+        self.generator = generator or default_generator()
+        self.moves = []
+        self.keyframes = [pack(initial_state)]
+        self.turns = array('H', [initial_state.turn])  # turns[i]: turn after i moves
+        self._last_state = initial_state
+
+    def __len__(self):
+        return len(self.moves)
+
+    @property
+    def final_state(self):
+        return self._last_state
+
+    def append(self, move, state=None):
+        """Record `move`; `state` is the resulting state if the caller already has it."""
+        if state is None:
+            state = self.generator.apply(self._last_state, move)
+        self.moves.append(move)
+        self.turns.append(state.turn)
+        if len(self.moves) % self.keyframe_interval == 0:
+            self.keyframes.append(pack(state))
+        self._last_state = state
+        return state
+
+    def state_at(self, ply):
+        """GameState after the first `ply` moves."""
+        ply = max(0, min(len(self.moves), ply))
+        if ply == len(self.moves):
+            return self._last_state
+        keyframe = ply // self.keyframe_interval
+        state = unpack(self.keyframes[keyframe])
+        apply = self.generator.apply
+        for move in self.moves[keyframe * self.keyframe_interval:ply]:
+            state = apply(state, move)
+        return state
+
+    def ply_of_turn(self, turn):
+        """First ply at which the game has reached `turn`."""
+        return min(len(self.moves), bisect_left(self.turns, turn))
+
+    # ---------------- PERSISTENCE ---------------- #
+
+    def to_json(self):
+        return {
+            "version": RECORD_VERSION,
+            "keyframe_interval": self.keyframe_interval,
+            "initial_state": state_to_json(self.initial_state),
+            "moves": [move_to_json(m) for m in self.moves],
+            "keyframes": [format(k, "x") for k in self.keyframes],
+        }
+
+    @classmethod
+    def from_json(cls, data, generator=None):
+        if data.get("version") != RECORD_VERSION:
+            raise ValueError(f"unsupported game record version {data.get('version')!r}")
+        record = cls(state_from_json(data["initial_state"]), data["keyframe_interval"], generator)
+        keyframes = [int(k, 16) for k in data.get("keyframes", ())]
+        moves = [move_from_json(m) for m in data["moves"]]
+        if len(keyframes) != len(moves) // record.keyframe_interval + 1:
+            for move in moves:
+                record.append(move)
+            return record
+
+        # Stored keyframes: only the moves after the last one have to be simulated
+        record.moves = moves
+        record.keyframes = keyframes
+        state = unpack(keyframes[-1])
+        for move in moves[(len(keyframes) - 1) * record.keyframe_interval:]:
+            state = record.generator.apply(state, move)
+        record._last_state = state
+
+        # Only Mr X's moves advance the turn, so the turn index follows from the moves alone
+        turn = record.initial_state.turn
+        record.turns = array('H', [turn])
+        for move in moves:
+            if move is not None and move.player == 0:
+                turn += 2 if isinstance(move, DoubleMove) else 1
+            record.turns.append(turn)
+        return record
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f)
+
+    @classmethod
+    def load(cls, path, generator=None):
+        with open(path, "r") as f:
+            return cls.from_json(json.load(f), generator)
+
+
+class ReplayPlayer:
+    """Cursor over a GameRecord: step forward/back and jump to any ply or turn."""
+    def __init__(self, record):
+        self.record = record
+        self.ply = 0
+        self.state = record.initial_state
+
+    def __len__(self):
+        return len(self.record)
+
+    @property
+    def at_end(self):
+        return self.ply >= len(self.record)
+
+    def seek(self, ply):
+        ply = max(0, min(len(self.record), ply))
+        if ply == self.ply + 1:
+            # the common playback case: one move from where we are
+            self.state = self.record.generator.apply(self.state, self.record.moves[self.ply])
+        elif ply != self.ply:
+            self.state = self.record.state_at(ply)
+        self.ply = ply
+        return self.state
+
+    def seek_turn(self, turn):
+        return self.seek(self.record.ply_of_turn(turn))
+
+    def step_forward(self):
+        return self.seek(self.ply + 1)
+
+    def step_back(self):
+        return self.seek(self.ply - 1)
@@ -0,0 +1,211 @@
+"""
+Headless self-play: plays complete games between agents without tkinter or PIL.
+
+    python Simulator.py --games 10000 --players 6 --mrx greedy --detectives random --workers 8
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import Agents
+from Board import load_board
+from Controll import initial_state
+from GameLog import GameLogWriter
+from MoveGen import DETECTIVES, MR_X, winner
+
+# Name used on the command line / in agent specs -> agent class
+AGENT_TYPES = {
+    "random": Agents.RandomAgent,
+    "greedy": Agents.GreedyAgent,
+    "mcts": Agents.MCTSAgent,
+}
+
+# Hard stop for games that somehow never end (a full game is at most ~24 rounds)
+MAX_PLIES = 1000
+
+
+@dataclass
+class GameResult:
+    winner: int
+    turns: int
+    plies: int
+    final_state: object = None
+    start_locs: tuple = ()
+    # per player: seconds spent in decide(), one entry per move
+    latencies: list = field(default_factory=list)
+    moves: list = field(default_factory=list)
+
+
+def random_start(n_players, rng, board=None):
+    board = board or load_board()
+    return initial_state(rng.sample(board.stations, n_players))
+
+
+def play_game(agents, state, generator=None, record_moves=False):
+    """Play `state` to the end with one agent per player and return a GameResult."""
+    generator = generator or Agents.default_generator()
+    latencies = [[] for _ in agents]
+    moves = []
+    start_locs = state.player_locs
+    for agent in agents:
+        agent.reset(state)
+
+    plies = 0
+    while not state.victory_flag and plies < MAX_PLIES:
+        player = state.current_player
+        start = time.perf_counter()
+        move = agents[player].decide(state)
+        latencies[player].append(time.perf_counter() - start)
+
+        state = generator.apply(state, move)
+        for agent in agents:
+            agent.observe(move, state)
+        if record_moves:
+            moves.append(move)
+        plies += 1
+
+    result = winner(state)
+    return GameResult(
+        start_locs=start_locs,
+        winner=MR_X if result is None else result,
+        turns=state.turn,
+        plies=plies,
+        final_state=state,
+        latencies=latencies,
+        moves=moves,
+    )
+
+
+def make_agents(mrx, detectives, n_players, seed):
+    """Build agents from (type name, kwargs) specs; every agent gets its own seed."""
+    specs = [mrx] + [detectives] * (n_players - 1)
+    agents = []
+    for player, (name, kwargs) in enumerate(specs):
+        agents.append(AGENT_TYPES[name](player, seed=seed * 8 + player, **kwargs))
+    return agents
+
+
+def _run_chunk(task):
+    """Worker entry point: play the games with seeds in `task['seeds']`."""
+    board = load_board()
+    results = []
+    for seed in task["seeds"]:
+        rng = random.Random(seed)
+        agents = make_agents(task["mrx"], task["detectives"], task["players"], seed)
+        result = play_game(agents, random_start(task["players"], rng, board), record_moves=task["record"])
+        # The final state is not needed by the parent; keep the pickles small
+        result.final_state = None
+        results.append(result)
+    return results
+
+
+def summarise(results, elapsed=None):
+    games = len(results)
+    summary = {"games": games}
+    if games == 0:
+        return summary
+
+    lengths = sorted(r.turns for r in results)
+    mrx_wins = sum(1 for r in results if r.winner == MR_X)
+    summary["mrx_win_rate"] = mrx_wins / games
+    summary["detective_win_rate"] = (games - mrx_wins) / games
+    summary["mean_turns"] = sum(lengths) / games
+    summary["median_turns"] = lengths[games // 2]
+    summary["mean_plies"] = sum(r.plies for r in results) / games
+
+    for side, players in ((MR_X, lambda r: r.latencies[:1]), (DETECTIVES, lambda r: r.latencies[1:])):
+        samples = sorted(t for r in results for per_player in players(r) for t in per_player)
+        key = "mrx" if side == MR_X else "detective"
+        if samples:
+            summary[f"{key}_move_ms_mean"] = 1000 * sum(samples) / len(samples)
+            summary[f"{key}_move_ms_p50"] = 1000 * samples[len(samples) // 2]
+            summary[f"{key}_move_ms_p95"] = 1000 * samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    if elapsed:
+        summary["elapsed_s"] = elapsed
+        summary["games_per_second"] = games / elapsed
+    return summary
+
+
+def run_games(n_games, mrx=("random", {}), detectives=("random", {}), n_players=6,
+              workers=None, seed=0, chunk_size=None, log_path=None):
+    """
+    Play `n_games` games across a process pool and return (results, summary).
+
+    Game i is seeded with `seed + i`, so results do not depend on how games
+    are spread over workers. workers=1 runs in-process. With `log_path` every
+    game is appended to that binary GameLog as its chunk comes back.
+    """
+    workers = workers or os.cpu_count() or 1
+    seeds = [seed + i for i in range(n_games)]
+    if chunk_size is None:
+        # a few chunks per worker keeps every core busy until the end
+        chunk_size = max(1, n_games // (workers * 4))
+    tasks = [
+        {"seeds": seeds[i:i + chunk_size], "mrx": mrx, "detectives": detectives, "players": n_players,
+         "record": log_path is not None}
+        for i in range(0, n_games, chunk_size)
+    ]
+
+    log = GameLogWriter(log_path) if log_path is not None else None
+    start = time.perf_counter()
+    results = []
+    try:
+        if workers == 1:
+            _collect(map(_run_chunk, tasks), results, log)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                _collect(pool.map(_run_chunk, tasks), results, log)
+    finally:
+        if log is not None:
+            log.close()
+    elapsed = time.perf_counter() - start
+    return results, summarise(results, elapsed)
+
+
+def _collect(chunks, results, log):
+    for chunk in chunks:
+        for result in chunk:
+            if log is not None:
+                log.write_game(initial_state(result.start_locs), result.moves, result.winner, result.turns)
+                result.moves = []
+            results.append(result)
+
+
+def _agent_spec(name, budget):
+    kwargs = {}
+    if name == "mcts":
+        kwargs["time_budget"] = budget
+    return (name, kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless batch self-play")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--players", type=int, default=6, choices=range(2, 7))
+    parser.add_argument("--mrx", choices=sorted(AGENT_TYPES), default="greedy")
+    parser.add_argument("--detectives", choices=sorted(AGENT_TYPES), default="greedy")
+    parser.add_argument("--mcts-budget", type=float, default=0.1, help="seconds per MCTS move")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log", help="append every game to this binary game log")
+    args = parser.parse_args(argv)
+
+    _, summary = run_games(
+        args.games,
+        mrx=_agent_spec(args.mrx, args.mcts_budget),
+        detectives=_agent_spec(args.detectives, args.mcts_budget),
+        n_players=args.players,
+        workers=args.workers,
+        seed=args.seed,
+        log_path=args.log,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
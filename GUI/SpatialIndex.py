@@ -0,0 +1,189 @@
+import heapq
+import math
+
+import numpy as np
+
+
+class StationGrid:
+    """
+    Uniform grid buckets over station positions (original map pixels).
+
+    Every station lives in exactly one square cell of `cell_size` pixels, so a
+    radius query only has to look at the handful of cells around the point
+    instead of walking the whole stop list.
+    """
+    def __init__(self, nodes, cell_size=64):
+        if cell_size < 1:
+            raise ValueError("cell_size must be >= 1")
+
+        self.cell_size = int(cell_size)
+        self.buckets = {}  # (cell_x, cell_y) -> [Node, ...]
+
+        for node in nodes:
+            self.buckets.setdefault(self._cell(node.x, node.y), []).append(node)
+
+        if self.buckets:
+            cells_x = [c[0] for c in self.buckets]
+            cells_y = [c[1] for c in self.buckets]
+            self._min_cell = (min(cells_x), min(cells_y))
+            self._max_cell = (max(cells_x), max(cells_y))
+        else:
+            self._min_cell = self._max_cell = (0, 0)
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.buckets.values())
+
+    def _cell(self, x, y):
+        return (int(x) // self.cell_size, int(y) // self.cell_size)
+
+    def _ring(self, cx, cy, r):
+        """Yield the buckets whose cell is exactly `r` cells away (Chebyshev) from (cx, cy)."""
+        buckets = self.buckets
+        if r == 0:
+            bucket = buckets.get((cx, cy))
+            if bucket:
+                yield bucket
+            return
+        for i in range(cx - r, cx + r + 1):
+            for j in (cy - r, cy + r):
+                bucket = buckets.get((i, j))
+                if bucket:
+                    yield bucket
+        for j in range(cy - r + 1, cy + r):
+            for i in (cx - r, cx + r):
+                bucket = buckets.get((i, j))
+                if bucket:
+                    yield bucket
+
+    def _max_ring(self, cx, cy):
+        """Smallest ring radius that covers every occupied cell from (cx, cy)."""
+        return max(
+            abs(cx - self._min_cell[0]), abs(cx - self._max_cell[0]),
+            abs(cy - self._min_cell[1]), abs(cy - self._max_cell[1]),
+        )
+
+    def in_box(self, x, y, half_size):
+        """All stations inside the axis aligned box [x +- half_size] x [y +- half_size]."""
+        x_low, x_high = x - half_size, x + half_size
+        y_low, y_high = y - half_size, y + half_size
+        c_low = self._cell(x_low, y_low)
+        c_high = self._cell(x_high, y_high)
+
+        match = []
+        for i in range(c_low[0], c_high[0] + 1):
+            for j in range(c_low[1], c_high[1] + 1):
+                for node in self.buckets.get((i, j), ()):
+                    if x_low <= node.x <= x_high and y_low <= node.y <= y_high:
+                        match.append(node)
+        return match
+
+    def nearest(self, x, y, radius):
+        """Closest station within `radius` pixels of (x, y), or None."""
+        best = None
+        best_d2 = radius * radius
+        cx, cy = self._cell(x, y)
+        reach = int(math.ceil(radius / self.cell_size))
+
+        for r in range(reach + 1):
+            # Everything in ring r is at least (r - 1) cells away from the query.
+            if best is not None and ((r - 1) * self.cell_size) ** 2 > best_d2:
+                break
+            for bucket in self._ring(cx, cy, r):
+                for node in bucket:
+                    dx = node.x - x
+                    dy = node.y - y
+                    d2 = dx * dx + dy * dy
+                    if d2 <= best_d2:
+                        best, best_d2 = node, d2
+        return best
+
+    def k_nearest(self, x, y, k, radius=None):
+        """
+        Up to `k` stations ordered by distance from (x, y).
+        If `radius` is given, stations further away than that are ignored.
+        """
+        if k <= 0:
+            return []
+
+        limit_d2 = None if radius is None else radius * radius
+        cx, cy = self._cell(x, y)
+        last_ring = self._max_ring(cx, cy)
+        if radius is not None:
+            last_ring = min(last_ring, int(math.ceil(radius / self.cell_size)))
+
+        heap = []  # max-heap on distance: (-d2, tie, node)
+        for r in range(last_ring + 1):
+            if len(heap) == k and ((r - 1) * self.cell_size) ** 2 > -heap[0][0]:
+                break
+            for bucket in self._ring(cx, cy, r):
+                for node in bucket:
+                    dx = node.x - x
+                    dy = node.y - y
+                    d2 = dx * dx + dy * dy
+                    if limit_d2 is not None and d2 > limit_d2:
+                        continue
+                    item = (-d2, -node.id, node)
+                    if len(heap) < k:
+                        heapq.heappush(heap, item)
+                    elif item > heap[0]:
+                        heapq.heapreplace(heap, item)
+
+        return [node for _, _, node in sorted(heap, reverse=True)]
+
+
+class StationCoords:
+    """
+    Id-indexed station coordinates in two parallel int32 numpy columns.
+
+    The stop list is sorted by y, so ids can't index it directly; this table
+    turns "where is station n" into two array reads, and a batch of ids into
+    one vectorised scale and offset.
+    """
+    MISSING = -1
+
+    def __init__(self, nodes):
+        size = max((node.id for node in nodes), default=0) + 1
+        self.xs = np.full(size, self.MISSING, dtype=np.int32)
+        self.ys = np.full(size, self.MISSING, dtype=np.int32)
+        ids = np.fromiter((node.id for node in nodes), dtype=np.intp, count=len(nodes))
+        self.xs[ids] = np.fromiter((node.x for node in nodes), dtype=np.int32, count=len(nodes))
+        self.ys[ids] = np.fromiter((node.y for node in nodes), dtype=np.int32, count=len(nodes))
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __contains__(self, station_id):
+        return 0 <= station_id < len(self.xs) and self.xs[station_id] != self.MISSING
+
+    def get(self, station_id):
+        """(x, y) of the station in original map pixels, or None for unknown ids."""
+        if station_id not in self:
+            return None
+        return (int(self.xs[station_id]), int(self.ys[station_id]))
+
+    def canvas_columns(self, station_ids, scale_x, scale_y, offset_x=0, offset_y=0):
+        """
+        Columnar transform: (canvas_x, canvas_y, known) arrays for the ids.
+        Coordinates of unknown ids are meaningless; `known` masks them out.
+        """
+        ids = np.asarray(station_ids, dtype=np.intp).reshape(-1)
+        known = (ids >= 0) & (ids < len(self.xs))
+        ids = np.where(known, ids, 0)
+        xs = self.xs[ids]
+        ys = self.ys[ids]
+        known &= xs != self.MISSING
+        # astype truncates towards zero like int() did
+        canvas_x = (offset_x + xs * scale_x).astype(np.int64)
+        canvas_y = (offset_y + ys * scale_y).astype(np.int64)
+        return canvas_x, canvas_y, known
+
+    def to_canvas(self, station_ids, scale_x, scale_y, offset_x=0, offset_y=0):
+        """
+        Map a batch of station ids to integer canvas coordinates in one pass.
+        Unknown ids map to None so the result lines up with `station_ids`.
+        """
+        canvas_x, canvas_y, known = self.canvas_columns(station_ids, scale_x, scale_y, offset_x, offset_y)
+        return [
+            (x, y) if ok else None
+            for x, y, ok in zip(canvas_x.tolist(), canvas_y.tolist(), known.tolist())
+        ]
@@ -1,6 +1,86 @@
 import tkinter as tk
 from tkinter import ttk
-import uuid
+
+# (Tk interpreter, bar colour, trough colour, thickness) -> ttk style name.
+# ttk styles live as long as the interpreter, so bars of the same colour share one.
+_styles = {}
+
+
+def progressbar_style(widget, bar_color, trough_color="#D9D9D9", thickness=None):
+    """Name of the shared horizontal Progressbar style for these colours, created on first use."""
+    key = (widget.tk, bar_color, trough_color, thickness)
+    name = _styles.get(key)
+    if name is None:
+        name = f"Staged{len(_styles)}.Horizontal.TProgressbar"
+        options = dict(
+            background=bar_color,
+            troughcolor=trough_color,
+            bordercolor=trough_color,
+            lightcolor=bar_color,
+            darkcolor=bar_color,
+        )
+        if thickness is not None:
+            options["thickness"] = thickness
+        ttk.Style(widget).configure(name, **options)
+        _styles[key] = name
+    return name
+
+
+class StageBatch:
+    """
+    Deferred set_stage() calls of many StagedProgress bars.
+
+    Bars queue their new stage here; one after_idle callback then writes
+    every bar whose stage actually changed, so a burst of updates (a whole
+    GameState, or several states between two frames) costs one pass of Tcl
+    variable writes and a single redraw.
+    """
+    def __init__(self, widget):
+        self.widget = widget
+        self._pending = {}  # StagedProgress -> stage, latest request wins
+        self._job = None
+
+    def set_stage(self, bar, stage):
+        if bar.clamp(stage) == bar.stage:
+            self._pending.pop(bar, None)  # back to what is shown: nothing to write
+            return
+        self._pending[bar] = stage
+        if self._job is None:
+            self._job = self.widget.after_idle(self.flush)
+
+    def discard(self, bar):
+        """Forget the stage queued for `bar`, e.g. because it was just written directly."""
+        self._pending.pop(bar, None)
+
+    def flush(self):
+        """Apply every pending stage now."""
+        if self._job is not None:
+            try:
+                self.widget.after_cancel(self._job)
+            except tk.TclError:
+                pass
+            self._job = None
+        pending, self._pending = self._pending, {}
+        for bar, stage in pending.items():
+            try:
+                bar.set_stage(stage)
+            except tk.TclError:
+                pass  # the bar was destroyed in the meantime
+
+    def __len__(self):
+        return len(self._pending)
+
+
+# Tk interpreter -> its StageBatch
+_batches = {}
+
+
+def stage_batch(widget):
+    """The StageBatch shared by every bar in `widget`'s Tk interpreter."""
+    batch = _batches.get(widget.tk)
+    if batch is None:
+        batch = _batches[widget.tk] = StageBatch(widget.winfo_toplevel())
+    return batch
 
 
 def ensure_colour_friendly_theme(root: tk.Tk) -> None:
@@ -20,6 +100,7 @@ class StagedProgress(ttk.Frame):
     IMPORTANT:
     - Supports passing style="SomeStyle.Horizontal.TProgressbar" (your code does this).
       That 'style' is applied to the Progressbar, not the Frame.
+    - Without one the bar uses the shared progressbar_style() of its colours.
     """
     def __init__(
         self,
@@ -35,7 +116,7 @@ class StagedProgress(ttk.Frame):
         **kwargs
     ):
         # You pass style=... from your UI. That must NOT go to ttk.Frame.
-        progressbar_style = kwargs.pop("style", None)
+        style_name = kwargs.pop("style", None)
 
         super().__init__(parent, **kwargs)
 
@@ -43,6 +124,7 @@ class StagedProgress(ttk.Frame):
             raise ValueError("stages must be >= 1")
 
         self.stages = int(stages)
+        self.stage = 0  # mirrors self.var, so unchanged writes are skipped without asking Tcl
         self.var = tk.IntVar(value=0)
 
         self._bar_color = bar_color
@@ -55,13 +137,12 @@ class StagedProgress(ttk.Frame):
 
         # ---- Style ----
         # If caller provided a style name, use that as-is (your code configures thickness/colors).
-        # Otherwise create an internal style.
-        self._style = ttk.Style(self)
-        if progressbar_style is not None:
-            self._style_name = progressbar_style
+        # Otherwise use the shared style of our colours.
+        self._own_style = style_name is None
+        if self._own_style:
+            self._style_name = progressbar_style(self, bar_color, trough_color)
         else:
-            self._style_name = f"StagedPB.{uuid.uuid4().hex}.Horizontal.TProgressbar"
-            self._apply_style()
+            self._style_name = style_name
 
         # ---- Progressbar (col 1) ----
         self.bar = ttk.Progressbar(
@@ -88,42 +169,60 @@ class StagedProgress(ttk.Frame):
         self.columnconfigure(1, weight=1)
         self.columnconfigure(2, weight=0)
 
-    def _apply_style(self) -> None:
-        self._style.configure(
-            self._style_name,
-            background=self._bar_color,
-            troughcolor=self._trough_color,
-            bordercolor=self._trough_color,
-            lightcolor=self._bar_color,
-            darkcolor=self._bar_color,
-        )
-
     def set_colors(self, bar_color=None, trough_color=None) -> None:
-        # Only applies if using internal style; if an external style was passed in,
+        # Only applies if using the shared style; if an external style was passed in,
         # it should be configured by the caller.
         if bar_color is not None:
             self._bar_color = bar_color
         if trough_color is not None:
             self._trough_color = trough_color
 
-        # If style name looks like ours, we control it. Otherwise leave it alone.
-        if self._style_name.startswith("StagedPB."):
-            self._apply_style()
+        # Shared styles are never reconfigured: switch to the one of the new colours
+        if self._own_style:
+            self._style_name = progressbar_style(self, self._bar_color, self._trough_color)
+            self.bar.configure(style=self._style_name)
 
     def set_title(self, title: str) -> None:
         self.title_var.set(title)
 
     def _sync_value(self) -> None:
         if self.value_label is not None:
-            self.value_var.set(f"{self.var.get()}/{self.stages}")
+            self.value_var.set(f"{self.stage}/{self.stages}")
+
+    def set_stages(self, stages: int) -> None:
+        """Change the number of stages in place, clamping the current stage."""
+        if stages < 1:
+            raise ValueError("stages must be >= 1")
+        self.stages = int(stages)
+        self.bar.configure(maximum=self.stages)
+        stage = self.clamp(self.stage)
+        if stage != self.stage:
+            self.stage = stage
+            self.var.set(stage)
+        self._sync_value()
+
+    def clamp(self, stage: int) -> int:
+        return max(0, min(self.stages, int(stage)))
 
     def set_stage(self, stage: int) -> None:
-        stage = max(0, min(self.stages, int(stage)))
+        """Show `stage` now, replacing any queued one; nothing is written when it is already shown."""
+        # Otherwise the next flush would overwrite this with an older queued stage
+        batch = _batches.get(self.tk)
+        if batch is not None:
+            batch.discard(self)
+        stage = self.clamp(stage)
+        if stage == self.stage:
+            return
+        self.stage = stage
         self.var.set(stage)
         self._sync_value()
 
+    def queue_stage(self, stage: int) -> None:
+        """Like set_stage, but written by the shared after_idle flush (see StageBatch)."""
+        stage_batch(self).set_stage(self, stage)
+
     def next_stage(self) -> None:
-        self.set_stage(self.var.get() + 1)
+        self.set_stage(self.stage + 1)
 
     def reset(self) -> None:
         self.set_stage(0)
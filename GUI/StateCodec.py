@@ -0,0 +1,153 @@
+import random
+
+from Controll import TICKET_NAMES, GameState
+
+MAX_PLAYERS = 6
+
+# Bit widths of the packed fields, lowest bits first
+FLAG_BITS = 1
+PLAYER_BITS = 3
+COUNT_BITS = 3
+TURN_BITS = 7
+LOC_BITS = 8
+TICKET_BITS = 6
+
+_PLAYER_SHIFT = FLAG_BITS
+_COUNT_SHIFT = _PLAYER_SHIFT + PLAYER_BITS
+_TURN_SHIFT = _COUNT_SHIFT + COUNT_BITS
+_LOC_SHIFT = _TURN_SHIFT + TURN_BITS
+_TICKET_SHIFT = _LOC_SHIFT + MAX_PLAYERS * LOC_BITS
+PACKED_BITS = _TICKET_SHIFT + MAX_PLAYERS * len(TICKET_NAMES) * TICKET_BITS
+
+
+def _check(value, bits, what):
+    if not 0 <= value < (1 << bits):
+        raise ValueError(f"{what}={value} does not fit in {bits} bits")
+    return value
+
+
+def pack(state):
+    """
+    Encode a GameState as a single int (PACKED_BITS wide).
+
+    Layout from the lowest bit: victory flag, current player, player count,
+    turn, 6 x 8-bit locations, then 6 players x 5 tickets x 6-bit counts.
+    Ticket pairs must be in TICKET_NAMES order, which is what the controller
+    and the move generator produce.
+    """
+    n = len(state.player_locs)
+    if not 1 <= n <= MAX_PLAYERS or len(state.player_cards) != n:
+        raise ValueError(f"cannot pack a state with {n} players")
+
+    packed = int(bool(state.victory_flag))
+    packed |= _check(state.current_player, PLAYER_BITS, "current_player") << _PLAYER_SHIFT
+    packed |= n << _COUNT_SHIFT
+    packed |= _check(state.turn, TURN_BITS, "turn") << _TURN_SHIFT
+
+    shift = _LOC_SHIFT
+    for loc in state.player_locs:
+        packed |= _check(loc, LOC_BITS, "station") << shift
+        shift += LOC_BITS
+
+    shift = _TICKET_SHIFT
+    for row in state.player_cards:
+        if len(row) != len(TICKET_NAMES):
+            raise ValueError(f"unexpected ticket row {row!r}")
+        for (name, count), expected in zip(row, TICKET_NAMES):
+            if name != expected:
+                raise ValueError(f"ticket {name!r} out of order, expected {expected!r}")
+            packed |= _check(count, TICKET_BITS, name) << shift
+            shift += TICKET_BITS
+    return packed
+
+
+def unpack(packed):
+    """Inverse of pack()."""
+    n = (packed >> _COUNT_SHIFT) & ((1 << COUNT_BITS) - 1)
+    loc_mask = (1 << LOC_BITS) - 1
+    ticket_mask = (1 << TICKET_BITS) - 1
+
+    locs = tuple((packed >> (_LOC_SHIFT + i * LOC_BITS)) & loc_mask for i in range(n))
+    cards = []
+    shift = _TICKET_SHIFT
+    for _ in range(n):
+        row = []
+        for name in TICKET_NAMES:
+            row.append((name, (packed >> shift) & ticket_mask))
+            shift += TICKET_BITS
+        cards.append(tuple(row))
+
+    return GameState(
+        turn=(packed >> _TURN_SHIFT) & ((1 << TURN_BITS) - 1),
+        player_locs=locs,
+        player_cards=tuple(cards),
+        current_player=(packed >> _PLAYER_SHIFT) & ((1 << PLAYER_BITS) - 1),
+        victory_flag=bool(packed & 1),
+    )
+
+
+def to_bytes(packed):
+    return packed.to_bytes((PACKED_BITS + 7) // 8, "little")
+
+
+def from_bytes(data):
+    return int.from_bytes(data, "little")
+
+
+class Zobrist:
+    """
+    64-bit Zobrist hashing of GameStates.
+
+    Every (player, station), (player, ticket, count), turn, current player
+    and flag value owns a random key, and a state hashes to the XOR of the
+    keys it contains. update() only XORs out/in the fields that differ,
+    so hashing the child of a move costs a handful of XORs.
+    """
+    def __init__(self, seed=0x5C07):
+        rng = random.Random(seed)
+
+        def key():
+            return rng.getrandbits(64)
+
+        self.loc_keys = [[key() for _ in range(1 << LOC_BITS)] for _ in range(MAX_PLAYERS)]
+        self.ticket_keys = [
+            [[key() for _ in range(1 << TICKET_BITS)] for _ in TICKET_NAMES]
+            for _ in range(MAX_PLAYERS)
+        ]
+        self.turn_keys = [key() for _ in range(1 << TURN_BITS)]
+        self.player_keys = [key() for _ in range(MAX_PLAYERS)]
+        self.count_keys = [key() for _ in range(MAX_PLAYERS + 1)]
+        self.flag_key = key()
+
+    def hash(self, state):
+        h = self.turn_keys[state.turn] ^ self.player_keys[state.current_player]
+        h ^= self.count_keys[len(state.player_locs)]
+        if state.victory_flag:
+            h ^= self.flag_key
+        for player, loc in enumerate(state.player_locs):
+            h ^= self.loc_keys[player][loc]
+        for player, row in enumerate(state.player_cards):
+            keys = self.ticket_keys[player]
+            for i, (_, count) in enumerate(row):
+                h ^= keys[i][count]
+        return h
+
+    def update(self, h, before, after):
+        """Hash of `after` given `h` = hash(before), touching only the changed fields."""
+        if before.turn != after.turn:
+            h ^= self.turn_keys[before.turn] ^ self.turn_keys[after.turn]
+        if before.current_player != after.current_player:
+            h ^= self.player_keys[before.current_player] ^ self.player_keys[after.current_player]
+        if before.victory_flag != after.victory_flag:
+            h ^= self.flag_key
+        for player, (old, new) in enumerate(zip(before.player_locs, after.player_locs)):
+            if old != new:
+                h ^= self.loc_keys[player][old] ^ self.loc_keys[player][new]
+        for player, (old_row, new_row) in enumerate(zip(before.player_cards, after.player_cards)):
+            if old_row is new_row:
+                continue
+            keys = self.ticket_keys[player]
+            for i, ((_, old), (_, new)) in enumerate(zip(old_row, new_row)):
+                if old != new:
+                    h ^= keys[i][old] ^ keys[i][new]
+        return h
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# The GUI modules import each other as top-level modules, like Graphics.py does
+GUI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "GUI")
+if GUI_DIR not in sys.path:
+    sys.path.insert(0, GUI_DIR)
+
+
+@pytest.fixture
+def stops():
+    import Controll
+    return Controll.ReadStops(os.path.join(GUI_DIR, "station_locations.json"))
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    import Controll
+    # GameControll reads station_locations.json relative to the GUI directory
+    monkeypatch.chdir(GUI_DIR)
+    return Controll.GameControll()
@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+
+import pytest
+
+import Agents
+from AgentService import AgentService
+from Controll import initial_state
+from MoveGen import default_generator
+
+
+@pytest.fixture
+def state():
+    gen = default_generator()
+    return initial_state(random.Random(5).sample(gen.board.stations, 4))
+
+
+class StuckAgent(Agents.Agent):
+    """Ignores stop_event: decide() only returns once `release` is set."""
+    def __init__(self, player, publish=False):
+        super().__init__(player)
+        self.release = threading.Event()
+        self.publish = publish
+        self.active = 0
+        self.max_active = 0
+        self.calls = []
+
+    def _enter(self, name):
+        self.calls.append(name)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+
+    def decide(self, state):
+        self._enter("decide")
+        moves = self.generator.legal_moves(state)
+        if self.publish:
+            self.best_so_far = moves[-1]
+        self.release.wait()
+        self.active -= 1
+        return moves[0]
+
+    def observe(self, move, state):
+        self._enter("observe")
+        self.active -= 1
+
+
+def test_timed_out_agent_plays_the_move_it_published(state):
+    service = AgentService(timeout=0.05, grace=0.05)
+    agent = StuckAgent(0, publish=True)
+    request = service.run(agent, state)
+    assert request.fallback and request.timed_out
+    assert request.move == default_generator().legal_moves(state)[-1]
+    agent.release.set()
+
+
+def test_busy_agent_gets_no_new_request_until_its_decide_returns(state):
+    service = AgentService(timeout=0.05, grace=0.05)
+    agent = StuckAgent(0)
+    first = service.run(agent, state)
+    assert first.fallback and not first.done.is_set()
+    assert not service.is_idle(agent)
+    with pytest.raises(RuntimeError):
+        service.submit(agent, state)
+
+    threading.Timer(0.2, agent.release.set).start()
+    started = time.perf_counter()
+    second = service.run(agent, state)
+    assert time.perf_counter() - started >= 0.15
+    assert first.done.is_set()
+    assert not second.fallback
+    assert agent.max_active == 1
+    assert service.is_idle(agent)
+
+
+def test_waiting_for_a_busy_agent_honours_stop(state):
+    service = AgentService(timeout=0.05, grace=0.05)
+    agent = StuckAgent(0)
+    service.run(agent, state)
+    stop = threading.Event()
+    stop.set()
+    assert not service.wait_idle(agent, stop)
+    request = service.run(agent, state, stop)
+    assert request.cancelled and request.move is None
+    assert agent.calls == ["decide"]
+    agent.release.set()
+    assert service.wait_idle(agent)
+
+
+def test_connector_does_not_observe_while_an_agent_is_busy(state):
+    from ConnectionLayer import Connector
+
+    connector = Connector()
+    connector.service = AgentService(timeout=0.05, grace=0.05)
+    stuck = StuckAgent(1)
+    agents = [Agents.RandomAgent(0, seed=0), stuck, Agents.RandomAgent(2, seed=2), Agents.RandomAgent(3, seed=3)]
+    connector.play(agents, state)
+    time.sleep(0.4)
+    # Stuck in its first decide(): nothing else may run on the agent meanwhile
+    assert stuck.calls == ["observe", "decide"]
+    stuck.release.set()
+    connector._thread.join(30)
+    assert stuck.max_active == 1
+    assert connector.drain().finished
+
+
+def test_mcts_publishes_its_best_move_while_searching(state):
+    agent = Agents.MCTSAgent(0, seed=1, time_budget=None, iterations=Agents.PUBLISH_INTERVAL * 3)
+    agent.reset(state)
+    best = agent.decide(state)
+    assert agent.best_so_far == best
+    assert agent.last_stats["iterations"] == Agents.PUBLISH_INTERVAL * 3
+
+
+def test_stopped_mcts_returns_its_best_move_without_fallback(state):
+    service = AgentService(timeout=0.2, grace=1.0)
+    agent = Agents.MCTSAgent(0, seed=1, time_budget=30.0)
+    agent.reset(state)
+    request = service.run(agent, state)
+    assert request.timed_out and not request.fallback
+    assert agent.last_stats["stopped"]
+    assert request.move in default_generator().legal_moves(state)
@@ -0,0 +1,85 @@
+import random
+import threading
+
+import pytest
+
+from Agents import GreedyAgent, MCTSAgent, create_agent, move_key
+from Controll import initial_state
+from MoveGen import default_generator
+
+
+@pytest.fixture
+def start():
+    gen = default_generator()
+    return initial_state(random.Random(11).sample(gen.board.stations, 3))
+
+
+def as_keys(moves):
+    return {move_key(m) for m in moves}
+
+
+@pytest.mark.parametrize("player", [0, 1])
+def test_decide_with_iteration_budget_returns_legal_move(start, player):
+    gen = default_generator()
+    state = start
+    if player == 1:
+        state = gen.apply(state, gen.legal_moves(state)[0])
+    agent = MCTSAgent(player, seed=3, time_budget=None, iterations=200)
+    agent.reset(start)
+    move = agent.decide(state)
+
+    assert move_key(move) in as_keys(gen.legal_moves(state))
+    assert agent.last_stats["iterations"] == 200
+    assert agent.last_stats["stopped"] is False
+
+
+def test_subtree_is_reused_after_observe(start):
+    gen = default_generator()
+    agent = MCTSAgent(0, seed=3, time_budget=None, iterations=400)
+    agent.reset(start)
+    move = agent.decide(start)
+    assert agent.last_stats["reused_nodes"] == 0
+
+    state = gen.apply(start, move)
+    agent.observe(move, state)
+    # Both detectives answer with the reply the search explored most
+    while state.current_player != 0:
+        reply = max(gen.legal_moves(state),
+                    key=lambda m: getattr(agent.root.children.get(move_key(m)), "visits", -1))
+        state = gen.apply(state, reply)
+        agent.observe(reply, state)
+
+    agent.decide(state)
+    assert agent.last_stats["reused_nodes"] > 0
+
+
+def test_stop_event_ends_search(start):
+    agent = MCTSAgent(0, seed=3, time_budget=None, iterations=10 ** 6)
+    agent.reset(start)
+    agent.stop_event = threading.Event()
+    agent.stop_event.set()
+    move = agent.decide(start)
+
+    assert move_key(move) in as_keys(default_generator().legal_moves(start))
+    assert agent.last_stats["iterations"] < 10 ** 6
+    assert agent.last_stats["stopped"] is True
+
+
+@pytest.mark.parametrize("choice, cls", [
+    ("X Type1", MCTSAgent),
+    ("X Type2", GreedyAgent),
+    ("Type 1", MCTSAgent),
+    ("Type 2", GreedyAgent),
+])
+def test_create_agent_maps_combobox_choices(choice, cls):
+    player = 0 if choice.startswith("X") else 1
+    agent = create_agent(choice, player, seed=1)
+    assert type(agent) is cls
+    assert agent.player == player
+
+
+def test_create_agent_manual_and_unknown():
+    assert create_agent("Manual X", 0) is None
+    assert create_agent("Manual", 1) is None
+    with pytest.raises(ValueError):
+        create_agent("Type 3", 1)
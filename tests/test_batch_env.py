@@ -0,0 +1,154 @@
+import random
+
+import numpy as np
+import pytest
+
+from BatchEnv import DOUBLE, KINDS, NO_WINNER, PASS, BatchEnv
+from Controll import DoubleMove, initial_state
+from MoveGen import default_generator, winner
+
+
+def sample_states(n_games=60, seed=0):
+    """Every state of `n_games` random MoveGen games, Mr X preferring double moves now and then."""
+    gen = default_generator()
+    rng = random.Random(seed)
+    states = []
+    for _ in range(n_games):
+        state = initial_state(rng.sample(gen.board.stations, 5))
+        while True:
+            states.append(state)
+            if state.victory_flag:
+                break
+            moves = gen.legal_moves(state)
+            doubles = [m for m in moves if isinstance(m, DoubleMove)]
+            move = rng.choice(doubles if doubles and rng.random() < 0.3 else moves) if moves else None
+            state = gen.apply(state, move)
+    return states
+
+
+@pytest.fixture(scope="module")
+def states():
+    return sample_states()
+
+
+def test_legal_mask_matches_movegen(states):
+    gen = default_generator()
+    env = BatchEnv.from_states(states)
+    mask = env.legal_mask()
+    plane = env.n_actions // 2
+    for game, state in enumerate(states):
+        moves = gen.legal_moves(state)
+        singles = {env.encode(m)[0] for m in moves if not isinstance(m, DoubleMove)}
+        firsts = {env.encode(m)[0] for m in moves if isinstance(m, DoubleMove)}
+        legal = set(np.flatnonzero(mask[game]).tolist())
+        assert {a for a in legal if a < plane} == singles
+        assert {a for a in legal if a >= plane} == firsts
+
+
+def test_second_legs_match_movegen_double_moves(states):
+    gen = default_generator()
+    rng = random.Random(1)
+    checked = 0
+    for state in states:
+        doubles = [m for m in gen.legal_moves(state) if isinstance(m, DoubleMove)]
+        if not doubles:
+            continue
+        first = rng.choice(doubles).first
+        env = BatchEnv.from_states([state])
+        first_action, _ = env.encode(DoubleMove(first, first))
+        env.step([first_action])
+        assert env.pending[0] and env.current[0] == 0
+        expected = {env.encode(m)[1] for m in doubles if m.first == first}
+        assert set(np.flatnonzero(env.legal_mask()[0]).tolist()) == expected
+        with pytest.raises(ValueError):
+            env.to_state(0)
+        checked += 1
+    assert checked > 20
+
+
+def test_step_matches_movegen_apply_and_winner(states):
+    gen = default_generator()
+    rng = random.Random(2)
+    running = [s for s in states if not s.victory_flag]
+    moves = []
+    for state in running:
+        options = gen.legal_moves(state)
+        moves.append(rng.choice(options) if options else None)
+
+    # Double moves take two steps, so they get an environment of their own
+    for double in (False, True):
+        picked = [(s, m) for s, m in zip(running, moves) if isinstance(m, DoubleMove) == double]
+        assert picked
+        env = BatchEnv.from_states([s for s, _ in picked])
+        actions = np.array([env.encode(m) for _, m in picked])
+        for leg in range(actions.shape[1]):
+            env.step(actions[:, leg])
+        assert not env.pending.any()
+        for game, (state, move) in enumerate(picked):
+            expected = gen.apply(state, move)
+            assert env.to_state(game) == expected
+            result = winner(expected)
+            assert env.winner[game] == (NO_WINNER if result is None else result)
+
+
+def test_random_games_finish_with_movegen_winners():
+    gen = default_generator()
+    env = BatchEnv.random(256, players=5, seed=3)
+    rng = np.random.default_rng(3)
+    steps = 0
+    while not env.done.all():
+        env.step(env.random_actions(rng))
+        steps += 1
+        assert steps < 1000
+    for game, state in enumerate(env.to_states()):
+        assert state.victory_flag and gen.legal_moves(state) == []
+        assert env.winner[game] == winner(state)
+
+
+def test_no_double_move_in_the_last_round():
+    from MoveGen import MAX_TURNS
+
+    env = BatchEnv.random(64, players=4, seed=5)
+    env.turn[:32] = MAX_TURNS - 1
+    env.turn[32:] = MAX_TURNS - 2
+    doubles = env.legal_mask()[:, env.n_actions // 2:].any(axis=1)
+    assert not doubles[:32].any()
+    assert doubles[32:].all()
+
+
+def test_decode_round_trips_encode(states):
+    gen = default_generator()
+    env = BatchEnv.from_states(states[:200])
+    for game, state in enumerate(states[:200]):
+        for move in gen.legal_moves(state):
+            if not isinstance(move, DoubleMove):
+                assert env.decode(game, env.encode(move)[0]) == move
+    assert env.decode(0, PASS) is None
+
+
+def test_illegal_actions_are_rejected_without_changes(states):
+    env = BatchEnv.from_states([s for s in states if not s.victory_flag][:10])
+    before = env.to_states()
+    mask = env.legal_mask()
+    actions = [int(np.flatnonzero(row)[0]) if row.any() else PASS for row in mask]
+    game = next(i for i, a in enumerate(actions) if a != PASS)
+    illegal = np.flatnonzero(~mask[game])
+    for bad in (int(illegal[0]), PASS, env.n_actions, -7):
+        broken = list(actions)
+        broken[game] = bad
+        with pytest.raises(ValueError, match=f"game {game}"):
+            env.step(broken)
+        assert env.to_states() == before
+    with pytest.raises(ValueError):
+        env.step(actions[:-1])
+
+
+def test_constructor_checks_shapes():
+    with pytest.raises(ValueError):
+        BatchEnv([[1]], [[[0] * 5]], [0], [0], [False])
+    with pytest.raises(ValueError):
+        BatchEnv([[1, 2]], [[[0] * 4] * 2], [0], [0], [False])
+    with pytest.raises(ValueError):
+        BatchEnv.from_states([])
+    assert len(KINDS) * 2 * default_generator().board.size == BatchEnv.random(1).n_actions
+    assert DOUBLE == 1
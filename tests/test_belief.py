@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from Belief import MrXTracker
+from Board import TRANSPORT_BITS, load_board
+from Controll import DoubleMove, GameState, Move, TransportType
+from MoveGen import REVEAL_TURNS
+
+TAXI, BUS, TUBE, BOAT, BLACK = (TransportType.TAXI, TransportType.BUS, TransportType.TUBE,
+                                TransportType.BOAT, TransportType.BLACK)
+
+
+@pytest.fixture(scope="module")
+def board():
+    return load_board()
+
+
+def brute_force(board, probs, transport, detectives):
+    """One Mr X move spread uniformly over the matching edges of every station, detectives ruled out."""
+    out = np.zeros_like(probs)
+    for station in np.flatnonzero(probs):
+        if transport in (BOAT, BLACK):
+            targets = [n for n, _ in board.adjacency[station]]
+        else:
+            targets = [n for n, mask in board.adjacency[station] if mask & TRANSPORT_BITS[transport]]
+        for target in targets:
+            out[target] += probs[station] / len(targets)
+    out[list(detectives)] = 0.0
+    return out / out.sum() if out.sum() > 0 else out
+
+
+@pytest.mark.parametrize("transport", [TAXI, BUS, TUBE, BOAT, BLACK])
+def test_advance_matches_neighbour_expansion(board, transport):
+    tracker = MrXTracker(board)
+    detectives = (13, 26, 29, 34, 50)
+    expected = tracker.probs.copy()
+    for _ in range(3):
+        tracker.advance(transport, detectives)
+        expected = brute_force(board, expected, transport, detectives)
+        np.testing.assert_allclose(tracker.probs, expected, atol=1e-12)
+    assert tracker.probs.sum() == pytest.approx(1.0)
+
+
+def test_detective_stations_are_removed(board):
+    tracker = MrXTracker(board)
+    tracker.reset(excluded=(13, 26))
+    assert not tracker.possible[[13, 26]].any()
+
+    detectives = (1, 8, 9)
+    tracker.advance(TAXI, detectives)
+    assert not tracker.possible[list(detectives)].any()
+    assert tracker.probs.sum() == pytest.approx(1.0)
+
+    # A detective's move rules out the station they moved to
+    locs = (1, 8, 9, 13)
+    tracker.observe(Move(3, 9, 20, TAXI), GameState(4, locs[:3] + (20,), (), 0, False))
+    assert not tracker.possible[20]
+
+
+def test_reveal_collapses_on_either_leg_of_a_double_move(board):
+    tracker = MrXTracker(board)
+    reveal = REVEAL_TURNS[0]
+    detectives = (100, 101, 102)
+
+    # First leg lands on the reveal turn: the second leg spreads out from there
+    move = DoubleMove(Move(0, 1, 8, TAXI), Move(0, 8, 18, TAXI))
+    tracker.observe(move, GameState(reveal + 1, (18,) + detectives, (), 1, False))
+    expected = np.zeros_like(tracker.probs)
+    expected[8] = 1.0
+    expected = brute_force(board, expected, TAXI, detectives)
+    np.testing.assert_allclose(tracker.probs, expected, atol=1e-12)
+
+    # Second leg lands on the reveal turn: Mr X is known exactly
+    tracker.reset()
+    move = DoubleMove(Move(0, 1, 8, TAXI), Move(0, 8, 18, TAXI))
+    tracker.observe(move, GameState(reveal, (18,) + detectives, (), 1, False))
+    assert tracker.candidates().tolist() == [18]
@@ -0,0 +1,142 @@
+import json
+
+import numpy as np
+import pytest
+
+from Board import GRAPH_PATH, TRANSPORT_BITS, Board, load_board, parse_graph
+from Controll import TransportType
+
+TAXI = TRANSPORT_BITS[TransportType.TAXI]
+BUS = TRANSPORT_BITS[TransportType.BUS]
+TUBE = TRANSPORT_BITS[TransportType.TUBE]
+
+
+def test_symmetric_graph_has_no_anomalies():
+    edges, anomalies = parse_graph({"_comment": "x", "1": {"2": 1, "3": 6}, "2": {"1": 1}, "3": {"1": 6}}, strict=True)
+    assert anomalies == []
+    assert edges == {1: {2: TAXI, 3: BUS | TUBE}, 2: {1: TAXI}, 3: {1: BUS | TUBE}}
+
+
+def test_conflicting_weight_codes_are_merged_and_reported():
+    raw = {"1": {"8": 1}, "8": {"1": 4}}
+    edges, anomalies = parse_graph(raw)
+    assert edges == {1: {8: TAXI | TUBE}, 8: {1: TAXI | TUBE}}
+    assert anomalies == [
+        "station 1 -> 8: weight code 1, but 8 -> 1 has 4",
+        "station 8 -> 1: weight code 4, but 1 -> 8 has 1",
+    ]
+    with pytest.raises(ValueError, match="1 -> 8"):
+        parse_graph(raw, strict=True)
+
+
+def test_one_sided_edge_is_symmetrised_and_reported():
+    edges, anomalies = parse_graph({"3": {"23": 2}})
+    assert edges == {3: {23: BUS}, 23: {3: BUS}}
+    assert anomalies == ["station 3 -> 23: weight code 2, but 23 -> 3 is not listed"]
+    with pytest.raises(ValueError):
+        parse_graph({"3": {"23": 2}}, strict=True)
+
+
+@pytest.mark.parametrize("raw, fragment", [
+    ({"5": {"5": 1}}, "self-loop"),
+    ({"5": {"6": 117}, "6": {"5": 1}}, "unknown weight code 117"),
+    ({"x": {}}, "invalid station entry"),
+    ({"5": {"y": 1}}, "invalid neighbour"),
+    ({"_comment": 3}, "_comment must be a string"),
+])
+def test_malformed_entries(raw, fragment):
+    _, anomalies = parse_graph(raw)
+    assert any(fragment in message for message in anomalies)
+    with pytest.raises(ValueError, match=fragment):
+        parse_graph(raw, strict=True)
+
+
+def test_board_csr_matches_parsed_edges():
+    with open(GRAPH_PATH) as f:
+        edges, anomalies = parse_graph(json.load(f))
+    board = Board(edges, anomalies=anomalies)
+    for station in range(board.size):
+        row = dict(board.adjacency[station])
+        assert row == edges.get(station, {})
+        for neighbour, mask in row.items():
+            # Undirected: every edge is stored both ways with the same mask
+            assert dict(board.adjacency[neighbour])[station] == mask
+    assert board.anomalies == anomalies
+
+
+def test_real_graph_reports_its_inconsistent_edges():
+    with open(GRAPH_PATH) as f:
+        raw = json.load(f)
+    _, anomalies = parse_graph(raw)
+    # 88 -> 1 has an unknown code, so that pair is reported once as such
+    assert len([message for message in anomalies if "unknown weight code" in message]) == 1
+    assert len([message for message in anomalies if "but" in message]) == 51
+    with pytest.raises(ValueError):
+        parse_graph(raw, strict=True)
+
+
+# ---------------- CACHE ---------------- #
+
+def cached_copy(tmp_path):
+    """A copy of graph.json in tmp_path (so load_board doesn't return its memoised board) and its cache path."""
+    graph = tmp_path / "graph.json"
+    with open(GRAPH_PATH, "rb") as f:
+        graph.write_bytes(f.read())
+    return str(graph), str(tmp_path / "graph.board.bin")
+
+
+def same_board(a, b):
+    return (a.adjacency == b.adjacency and a.anomalies == b.anomalies and a.graph_hash == b.graph_hash
+            and np.array_equal(a.station_mask, b.station_mask))
+
+
+def test_cache_round_trip(tmp_path):
+    import Board as board_module
+
+    graph, cache = cached_copy(tmp_path)
+    parsed = load_board(graph, cache_path=cache)
+    digest = bytes.fromhex(parsed.graph_hash)
+    assert same_board(board_module._read_cache(cache, digest), parsed)
+    assert board_module._read_cache(cache, bytes(32)) is None
+
+
+def test_cache_from_another_parser_version_is_ignored(tmp_path, monkeypatch):
+    import Board as board_module
+
+    graph, cache = cached_copy(tmp_path)
+    digest = bytes.fromhex(load_board(graph, cache_path=cache).graph_hash)
+    monkeypatch.setattr(board_module, "PARSER_VERSION", board_module.PARSER_VERSION + 1)
+    assert board_module._read_cache(cache, digest) is None
+
+
+@pytest.mark.parametrize("tail", [b'["station 35: self-lo', b"\xff\xfe", b"{}"])
+def test_corrupt_cache_tail_is_reparsed(tmp_path, monkeypatch, tail):
+    import Board as board_module
+
+    graph, cache = cached_copy(tmp_path)
+    parsed = load_board(graph, cache_path=cache)
+    with open(cache, "rb") as f:
+        data = f.read()
+    end = board_module.CACHE_HEADER_SIZE + 4 * (parsed.size + 1) + 5 * parsed.edge_count
+    with open(cache, "wb") as f:
+        f.write(data[:end] + tail)
+    assert board_module._read_cache(cache, bytes.fromhex(parsed.graph_hash)) is None
+
+    monkeypatch.setattr(board_module, "_boards", {})
+    assert same_board(load_board(graph, cache_path=cache), parsed)
+    # ...and the cache was rewritten
+    assert board_module._read_cache(cache, bytes.fromhex(parsed.graph_hash)) is not None
+
+
+def test_failed_cache_write_leaves_no_temporary_file(tmp_path, monkeypatch):
+    import Board as board_module
+
+    graph, cache = cached_copy(tmp_path)
+    board = load_board(graph, cache_path=None)
+
+    def fail(*args):
+        raise OSError("disk full")
+    monkeypatch.setattr(board_module.os, "replace", fail)
+    with pytest.raises(OSError):
+        board_module._write_cache(cache, board)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["graph.json"]
@@ -0,0 +1,75 @@
+import random
+import threading
+
+import Agents
+from ConnectionLayer import Connector
+from Controll import initial_state
+from MoveGen import default_generator
+
+
+def test_full_queue_coalesces_oldest_updates_and_keeps_every_move():
+    connector = Connector(maxsize=4)
+    for i in range(10):
+        connector.publish(f"state {i}", moves=(i,), finished=(i == 2))
+        assert len(connector._events) <= 4
+    assert connector.stats["published"] == 10
+    assert connector.stats["coalesced"] == 6
+    assert connector.state == "state 9"
+
+    update = connector.drain()
+    assert update.state == "state 9"
+    assert update.moves == tuple(range(10))
+    assert update.finished
+    assert connector.stats["coalesced"] == 6 + 3
+    assert connector.drain() is None
+
+
+def test_queue_keeps_order_when_not_full():
+    connector = Connector(maxsize=32)
+    for i in range(5):
+        connector.publish(i, moves=(i,))
+    assert [event.state for event in connector._events] == list(range(5))
+    assert connector.stats["coalesced"] == 0
+
+
+def test_publish_after_stop_is_dropped():
+    connector = Connector()
+    stop = threading.Event()
+    connector.publish("kept", stop=stop)
+    stop.set()
+    connector.publish("dropped", stop=stop)
+    assert connector.drain().state == "kept"
+    assert connector.state == "kept"
+
+
+def test_engine_plays_a_game_to_the_end():
+    gen = default_generator()
+    state = initial_state(random.Random(3).sample(gen.board.stations, 4))
+    agents = [Agents.RandomAgent(i, seed=i) for i in range(4)]
+    connector = Connector(maxsize=2)
+    connector.play(agents, state).join(30)
+    assert not connector.running
+
+    update = connector.drain()
+    assert update.finished
+    # Replaying the coalesced moves reproduces the final state
+    replayed = state
+    for move in update.moves:
+        replayed = gen.apply(replayed, move)
+    assert replayed == update.state
+    assert connector.stats["published"] == len(update.moves) + 1
+
+
+def test_manual_moves_are_validated():
+    gen = default_generator()
+    state = initial_state(random.Random(4).sample(gen.board.stations, 3))
+    connector = Connector()
+    connector.play([None, None, None], state)
+    try:
+        move = gen.legal_moves(state)[0]
+        other = gen.legal_moves(gen.apply(state, move))[0]
+        assert not connector.process_move(other)
+        assert connector.process_move(move)
+    finally:
+        connector.stop()
+    assert not connector.running
@@ -0,0 +1,106 @@
+import math
+import warnings
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+import GameLog
+from Controll import DoubleMove, initial_state
+from Dataset import GameDataset, export_dataset
+from Distances import UNREACHABLE, load_distances
+from MoveGen import DETECTIVES, MR_X, default_generator
+from Simulator import run_games
+
+
+@pytest.fixture(scope="module")
+def logged(tmp_path_factory):
+    """(dataset, games read back from the log) for a few seeded self-play games."""
+    tmp = tmp_path_factory.mktemp("dataset")
+    log_path = str(tmp / "games.sylog")
+    run_games(8, mrx=("greedy", {}), detectives=("random", {}), n_players=5, workers=1, seed=7,
+              log_path=log_path)
+    board = default_generator().board
+    export_dataset(log_path, str(tmp / "games.ds"), board)
+    return GameDataset(str(tmp / "games.ds")), list(GameLog.iter_games(log_path, board.graph_hash))
+
+
+def rows(game):
+    """(turn, player, locs) after every leg of every move, as the exporter lays them out."""
+    locs = list(game.player_locs)
+    turn, player = 0, MR_X
+    for move in game.moves:
+        if move is None:
+            legs = [(player, locs[player], False)]
+        elif isinstance(move, DoubleMove):
+            legs = [(move.player, move.first.to_station, True), (move.player, move.second.to_station, True)]
+        else:
+            legs = [(move.player, move.to_station, True)]
+        for mover, station, moved in legs:
+            locs[mover] = station
+            if mover == MR_X and moved:
+                turn += 1
+            yield turn, mover, tuple(locs)
+        player = (mover + 1) % len(locs)
+
+
+def test_row_counts(logged):
+    dataset, games = logged
+    legs = sum(len(list(rows(game))) for game in games)
+
+    assert len(dataset) == len(games) == 8
+    assert dataset.meta["moves"] == legs
+    assert len(dataset.moves("player")) == len(dataset.moves("locs")) == legs
+    assert int(np.sum(dataset.games("move_count"))) == legs
+
+
+def test_win_rate_by_start(logged):
+    dataset, games = logged
+    expected = defaultdict(list)
+    for game in games:
+        expected[game.player_locs[0]].append(game.winner == MR_X)
+
+    stations, counts, rate = dataset.win_rate_by_start()
+    assert stations.tolist() == sorted(expected)
+    assert counts.tolist() == [len(expected[s]) for s in sorted(expected)]
+    np.testing.assert_allclose(rate, [sum(expected[s]) / len(expected[s]) for s in sorted(expected)])
+
+
+@pytest.mark.parametrize("side", [MR_X, DETECTIVES])
+def test_distance_by_turn(logged, side):
+    dataset, games = logged
+    table = load_distances(default_generator().board).table()
+    per_turn = defaultdict(list)
+    for game in games:
+        for turn, mover, locs in rows(game):
+            if (mover == MR_X) != (side == MR_X):
+                continue
+            if mover == MR_X:
+                distance = min(int(table[d, locs[0]]) for d in locs[1:])
+            else:
+                distance = int(table[locs[mover], locs[0]])
+            if distance != UNREACHABLE:
+                per_turn[turn].append(distance)
+
+    turns, counts, mean = dataset.distance_by_turn(side)
+    assert turns.tolist() == sorted(per_turn)
+    assert counts.tolist() == [len(per_turn[t]) for t in sorted(per_turn)]
+    np.testing.assert_allclose(mean, [sum(per_turn[t]) / len(per_turn[t]) for t in sorted(per_turn)])
+
+
+def test_distance_at_end_skips_unreachable_games(tmp_path):
+    board = default_generator().board
+    table = load_distances(board).table()
+    detectives = (1, 8)
+    cut_off = next(s for s in board.stations if all(table[d, s] == UNREACHABLE for d in detectives))
+
+    log_path = str(tmp_path / "cut_off.sylog")
+    with GameLog.GameLogWriter(log_path, board.graph_hash) as log:
+        log.write_game(initial_state((cut_off,) + detectives), [], MR_X, 0)
+    export_dataset(log_path, str(tmp_path / "cut_off.ds"), board)
+    dataset = GameDataset(str(tmp_path / "cut_off.ds"))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert math.isnan(dataset.distance_at_end())
+        assert math.isnan(dataset.distance_at_end(DETECTIVES))
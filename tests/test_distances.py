@@ -0,0 +1,48 @@
+import numpy as np
+
+import Distances
+from Board import load_board
+from Distances import UNREACHABLE, build_tables, load_distances
+
+
+def test_cache_round_trip(tmp_path):
+    path = tmp_path / "distances.bin"
+    built = load_distances(cache_path=str(path))
+    assert isinstance(built.tables, np.memmap)
+    loaded = load_distances(cache_path=str(path))
+    assert np.array_equal(loaded.tables, build_tables(load_board()))
+
+
+def test_cache_is_rebuilt_for_another_parser_version(tmp_path, monkeypatch):
+    path = tmp_path / "distances.bin"
+    load_distances(cache_path=str(path))
+    digest = bytes.fromhex(load_board().graph_hash)
+    assert Distances._read_cache(str(path), digest) is not None
+
+    monkeypatch.setattr(Distances, "PARSER_VERSION", Distances.PARSER_VERSION + 1)
+    assert Distances._read_cache(str(path), digest) is None
+    load_distances(cache_path=str(path))
+    assert Distances._read_cache(str(path), digest) is not None
+
+
+def test_distances_match_breadth_first_search():
+    board = load_board()
+    tables = load_distances(cache_path=None)
+    source = board.stations[0]
+    frontier, seen, depth = [source], {source: 0}, 0
+    while frontier:
+        depth += 1
+        frontier = [n for s in frontier for n, _ in board.adjacency[s] if n not in seen]
+        for n in frontier:
+            seen.setdefault(n, depth)
+    for station in board.stations:
+        assert tables.distance(source, station) == seen.get(station, UNREACHABLE)
+
+
+def test_failed_cache_write_leaves_no_temporary_file(tmp_path, monkeypatch):
+    def fail(*args):
+        raise OSError("disk full")
+    monkeypatch.setattr(Distances.os, "replace", fail)
+    tables = load_distances(cache_path=str(tmp_path / "distances.bin"))
+    assert not isinstance(tables.tables, np.memmap)
+    assert list(tmp_path.iterdir()) == []
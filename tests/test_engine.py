@@ -0,0 +1,125 @@
+import os
+import random
+import sys
+
+import pytest
+
+from Agents import move_key
+from Controll import GameState, initial_state
+from MoveGen import MR_X, default_generator, winner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENGINE_DIR = os.path.join(ROOT, "ENGINE")
+if ENGINE_DIR not in sys.path:
+    sys.path.insert(0, ENGINE_DIR)
+
+# Built with: cd ENGINE && python setup.py build_ext --inplace
+engine = pytest.importorskip("engine")
+
+
+@pytest.fixture(scope="module")
+def board():
+    return engine.Board.load(os.path.join(ROOT, "graph.json"))
+
+
+def random_games(n, seed):
+    """Python MoveGen states of `n` seeded random games, every state of every game."""
+    gen = default_generator()
+    rng = random.Random(seed)
+    for _ in range(n):
+        state = initial_state(rng.sample(gen.board.stations, rng.randint(2, 6)))
+        while True:
+            moves = gen.legal_moves(state)
+            move = rng.choice(moves) if moves else None
+            yield state, moves, move
+            if state.victory_flag:
+                break
+            state = gen.apply(state, move)
+
+
+def test_board_matches_python_board(board):
+    py_board = default_generator().board
+    assert board.size == py_board.size
+    assert sorted(board.stations) == sorted(py_board.stations)
+
+
+def test_rules_match_movegen(board):
+    gen = default_generator()
+    states = 0
+    for state, moves, move in random_games(60, seed=21):
+        native = engine.GameState.from_python(state)
+        assert engine.winner(native) == winner(state)
+
+        native_moves = [m.to_python() for m in engine.legal_moves(board, native)]
+        assert sorted(map(move_key, native_moves), key=repr) == sorted(map(move_key, moves), key=repr)
+
+        if not state.victory_flag:
+            after = engine.apply(native, engine.Move.from_python(move, native))
+            assert after.to_python() == gen.apply(state, move)
+        states += 1
+    assert states > 1000
+
+
+def test_game_state_round_trip():
+    gen = default_generator()
+    state = initial_state((13, 26, 29, 34))
+    for move in (gen.legal_moves(state)[0], None):
+        state = gen.apply(state, move)
+
+    native = engine.GameState.from_python(state)
+    assert native.turn == state.turn
+    assert list(native.player_locs) == list(state.player_locs)
+    assert native.current_player == state.current_player
+    back = native.to_python()
+    assert isinstance(back, GameState)
+    assert back == state
+    assert engine.GameState.from_python(back) == native
+
+
+# ---------------- BATCH ---------------- #
+
+BATCH_FIELDS = ["game", "winner", "turns", "plies", "mrx_station", "caught"]
+
+
+def test_run_batch_is_independent_of_threads(board):
+    native = engine.Engine(board, [engine.Agent.random(board) for _ in range(5)])
+    rng = random.Random(8)
+    starts = [initial_state(rng.sample(default_generator().board.stations, 5)) for _ in range(64)]
+
+    single = native.run_batch(starts, threads=1, seed=3)
+    threaded = native.run_batch(starts, threads=4, seed=3)
+    assert single.dtype.names == tuple(BATCH_FIELDS)
+    assert single.tolist() == threaded.tolist()
+    assert single["game"].tolist() == list(range(64))
+    assert set(single["winner"].tolist()) <= {0, 1}
+
+    assert native.run_batch(starts, threads=1, seed=4).tolist() != single.tolist()
+    assert (native.run_random_batch(64, threads=1, seed=3).tolist()
+            == native.run_random_batch(64, threads=4, seed=3).tolist())
+
+
+def test_run_batch_with_python_agents(board):
+    gen = default_generator()
+
+    def first_move(state):
+        moves = gen.legal_moves(state)
+        return moves[0] if moves else None
+
+    agents = [engine.Agent(first_move, python_types=True) for _ in range(3)]
+    native = engine.Engine(board, agents)
+    assert not native.native
+    starts = [initial_state(s) for s in ((13, 26, 29), (50, 91, 117), (138, 155, 174), (1, 8, 9))]
+
+    single = native.run_batch(starts, threads=1, seed=0)
+    threaded = native.run_batch(starts, threads=4, seed=0)
+    assert single.tolist() == threaded.tolist()
+
+    for row, start in zip(single, starts):
+        state, plies = start, 0
+        while not state.victory_flag:
+            state = gen.apply(state, first_move(state))
+            plies += 1
+        assert row["plies"] == plies
+        assert row["turns"] == state.turn
+        assert row["mrx_station"] == state.player_locs[0]
+        assert row["winner"] == (MR_X if winner(state) is None else winner(state))
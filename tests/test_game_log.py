@@ -0,0 +1,111 @@
+import gc
+import random
+import warnings
+
+import pytest
+
+import GameLog
+from Controll import DoubleMove, initial_state
+from GameLog import NO_WINNER, GameLogWriter, count_games, iter_games, record_from_game
+from MoveGen import default_generator, winner
+
+OTHER_HASH = "00" * 32
+
+
+def random_games(n, seed=0):
+    """(initial_state, moves, final_state) of `n` random games with double moves and passes."""
+    gen = default_generator()
+    rng = random.Random(seed)
+    games = []
+    for _ in range(n):
+        state = start = initial_state(rng.sample(gen.board.stations, rng.randint(2, 6)))
+        moves = []
+        while not state.victory_flag:
+            options = gen.legal_moves(state)
+            doubles = [m for m in options if isinstance(m, DoubleMove)]
+            move = rng.choice(doubles if doubles and rng.random() < 0.2 else options) if options else None
+            moves.append(move)
+            state = gen.apply(state, move)
+        games.append((start, moves, state))
+    return games
+
+
+def test_write_iter_round_trip(tmp_path):
+    path = str(tmp_path / "games.sylog")
+    games = random_games(30)
+    with GameLogWriter(path) as log:
+        for start, moves, final in games:
+            log.write_game(start, moves, winner(final), final.turn)
+
+    logged = list(iter_games(path, default_generator().board.graph_hash))
+    assert len(logged) == len(games)
+    assert any(isinstance(m, DoubleMove) for _, moves, _ in games for m in moves)
+    for game, (start, moves, final) in zip(logged, games):
+        assert game.initial_state == start
+        assert game.moves == moves
+        assert game.winner == winner(final)
+        assert game.turns == final.turn
+        assert record_from_game(game).final_state == final
+
+
+def test_appending_and_unfinished_games(tmp_path):
+    path = str(tmp_path / "games.sylog")
+    (start, moves, final), second = random_games(2, seed=1)
+    with GameLogWriter(path) as log:
+        log.write_game(start, moves, winner(final), final.turn)
+    with GameLogWriter(path) as log:
+        log.write_game(second[0], second[1])
+        log.begin_game(start)
+        log.write_move(moves[0])
+        log.flush()
+        # The game being written is not reported yet
+        assert count_games(path) == 2
+    games = list(iter_games(path))
+    assert games[1].winner == NO_WINNER
+    assert games[1].offset > games[0].offset
+
+
+def test_replacing_a_log(tmp_path):
+    path = str(tmp_path / "games.sylog")
+    start, moves, final = random_games(1, seed=2)[0]
+    for _ in range(3):
+        with GameLogWriter(path, append=False) as log:
+            log.write_game(start, moves, winner(final), final.turn)
+    assert count_games(path) == 1
+
+
+def test_header_mismatch_raises_and_closes_the_file(tmp_path):
+    path = str(tmp_path / "games.sylog")
+    GameLogWriter(path).close()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        with pytest.raises(ValueError, match="different graph.json"):
+            GameLogWriter(path, OTHER_HASH)
+        gc.collect()
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
+    with pytest.raises(ValueError, match="different graph.json"):
+        list(iter_games(path, OTHER_HASH))
+
+
+def test_rejects_foreign_and_truncated_files(tmp_path):
+    path = tmp_path / "bad.sylog"
+    path.write_bytes(b"SYLOG")
+    with pytest.raises(ValueError, match="truncated"):
+        GameLog.check_header(str(path))
+    path.write_bytes(b"NOTLOG" + bytes(34))
+    with pytest.raises(ValueError, match="not a version"):
+        list(iter_games(str(path)))
+
+
+def test_controller_save_replaces_the_log(tmp_path, controller):
+    for _ in range(3):
+        controller.add_player()
+    controller.start_game()
+    gen = default_generator()
+    for _ in range(6):
+        controller.record_move(gen.legal_moves(controller.state)[0])
+    path = str(tmp_path / "saved.sylog")
+    assert controller.save_game(path)
+    assert controller.save_game(path)
+    assert count_games(path) == 1
+    assert controller.replay_game(path).record.moves == controller.record.moves
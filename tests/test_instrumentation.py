@@ -0,0 +1,82 @@
+import json
+import time
+
+import pytest
+
+import Instrumentation
+from Instrumentation import BUCKETS_PER_OCTAVE, span
+
+# Widest a reported percentile may be off from the true value: one histogram bucket
+BUCKET = 2 ** (1 / BUCKETS_PER_OCTAVE)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake perf_counter_ns advanced by hand, so recorded durations are exact."""
+    now = [time.perf_counter_ns()]
+    monkeypatch.setattr(Instrumentation.time, "perf_counter_ns", lambda: now[0])
+    yield now
+    Instrumentation.disable()
+    Instrumentation.reset()
+
+
+def test_percentiles_and_trace(clock, tmp_path):
+    @span("test.work")
+    def work(ms):
+        clock[0] += ms * 1_000_000
+        return ms
+
+    Instrumentation.reset()
+    Instrumentation.enable(trace=True)
+    durations = list(range(1, 101))  # 1..100 ms
+    for ms in reversed(durations):
+        assert work(ms) == ms
+    Instrumentation.count("test.items", 3)
+
+    stats = Instrumentation.snapshot()["spans"]["test.work"]
+    assert stats["count"] == 100
+    assert stats["total_ms"] == pytest.approx(sum(durations))
+    assert stats["max_ms"] == pytest.approx(100)
+    # the rank of each quantile is q * (n - 1): elements 49, 94 and 98 of the sorted durations
+    for key, exact in (("p50_ms", 50), ("p95_ms", 95), ("p99_ms", 99)):
+        assert exact / BUCKET <= stats[key] <= exact * BUCKET, key
+    assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+
+    path = tmp_path / "trace.json"
+    assert Instrumentation.dump_trace(str(path)) == 101
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+    spans = [e for e in events if e["ph"] == "X"]
+    assert len(spans) == 100
+    for event in spans:
+        assert event["name"] == "test.work" and event["cat"] == "test"
+        assert isinstance(event["ts"], (int, float)) and isinstance(event["tid"], int)
+    assert sorted(e["dur"] for e in spans) == [ms * 1000.0 for ms in durations]
+    counters = [e for e in events if e["ph"] == "C"]
+    assert counters == [{"name": "test.items", "ph": "C", "ts": counters[0]["ts"],
+                         "pid": spans[0]["pid"], "args": {"test.items": 3}}]
+
+
+def test_disabled_span_calls_straight_through(clock, monkeypatch):
+    def no_clock():
+        raise AssertionError("timed while disabled")
+    monkeypatch.setattr(Instrumentation.time, "perf_counter_ns", no_clock)
+
+    @span("test.disabled")
+    def work(a, b=2):
+        """Docstring kept."""
+        if a is None:
+            raise KeyError("a")
+        return a + b
+
+    Instrumentation.disable()
+    Instrumentation.reset()
+    assert work(1, b=3) == 4
+    with pytest.raises(KeyError):
+        work(None)
+    with Instrumentation.timer("test.block"):
+        pass
+    Instrumentation.count("test.items")
+
+    assert work.__name__ == "work" and work.__doc__ == "Docstring kept."
+    assert Instrumentation.snapshot() == {"spans": {}, "counters": {}}
@@ -0,0 +1,178 @@
+import random
+
+from Board import TRANSPORT_BITS, Board
+from Controll import DoubleMove, GameState, Move, TransportType, initial_state
+from MoveGen import DETECTIVES, MAX_TURNS, MR_X, MoveGenerator, default_generator, winner
+
+TAXI, BUS, TUBE, BOAT, BLACK = (TransportType.TAXI, TransportType.BUS, TransportType.TUBE,
+                                TransportType.BOAT, TransportType.BLACK)
+
+
+def line_board():
+    """1 -taxi- 2 -taxi/bus- 3 -tube- 4 -boat- 5"""
+    bits = TRANSPORT_BITS
+    edges = {
+        1: {2: bits[TAXI]},
+        2: {1: bits[TAXI], 3: bits[TAXI] | bits[BUS]},
+        3: {2: bits[TAXI] | bits[BUS], 4: bits[TUBE]},
+        4: {3: bits[TUBE], 5: bits[BOAT]},
+        5: {4: bits[BOAT]},
+    }
+    return MoveGenerator(Board(edges))
+
+
+def cards(taxi=0, bus=0, tube=0, black=0, x2=0):
+    return (("taxi", taxi), ("bus", bus), ("tube", tube), ("black", black), ("x2", x2))
+
+
+def state(locs, player_cards, current=0, turn=0, over=False):
+    return GameState(turn, tuple(locs), tuple(player_cards), current, over)
+
+
+def as_set(moves):
+    out = set()
+    for move in moves:
+        if isinstance(move, DoubleMove):
+            out.add((move.first.to_station, move.first.type, move.second.to_station, move.second.type))
+        else:
+            out.add((move.to_station, move.type))
+    return out
+
+
+def detective_tickets(s):
+    return sum(count for row in s.player_cards[1:] for _, count in row)
+
+
+def test_single_moves_need_tickets_and_skip_detectives():
+    gen = line_board()
+    s = state([2, 1, 5], [cards(taxi=1, bus=1), cards(taxi=1), cards()])
+    # Station 1 is held by a detective
+    assert as_set(gen.legal_moves(s)) == {(3, TAXI), (3, BUS)}
+    s = state([2, 1, 5], [cards(bus=1), cards(taxi=1), cards()])
+    assert as_set(gen.legal_moves(s)) == {(3, BUS)}
+
+
+def test_black_tickets_cover_boats_for_mr_x_only():
+    gen = line_board()
+    s = state([4, 1, 2], [cards(black=1), cards(black=1, tube=1), cards()])
+    assert as_set(gen.legal_moves(s)) == {(3, BLACK), (5, BLACK)}
+    detective = state([4, 3, 1], [cards(), cards(black=1, tube=1), cards()], current=1)
+    assert as_set(gen.legal_moves(detective)) == {(4, TUBE)}
+
+
+def test_detectives_cannot_share_a_station():
+    gen = line_board()
+    s = state([5, 2, 3], [cards(), cards(taxi=5, bus=5), cards()], current=1)
+    assert as_set(gen.legal_moves(s)) == {(1, TAXI)}
+
+
+def test_double_moves_need_x2_and_enough_tickets():
+    gen = line_board()
+    single = state([1, 5], [cards(taxi=1), cards()])
+    assert as_set(gen.legal_moves(single)) == {(2, TAXI)}
+
+    # One taxi ticket can't pay for both legs 1 -> 2 -> 1/3
+    one_taxi = state([1, 5], [cards(taxi=1, bus=1, x2=1), cards()])
+    assert as_set(gen.legal_moves(one_taxi)) == {(2, TAXI), (2, TAXI, 3, BUS)}
+
+    two_taxis = state([1, 5], [cards(taxi=2, x2=1), cards()])
+    assert as_set(gen.legal_moves(two_taxis)) == {(2, TAXI), (2, TAXI, 1, TAXI), (2, TAXI, 3, TAXI)}
+
+
+def test_no_double_move_past_the_last_round():
+    gen = line_board()
+    s = state([1, 5], [cards(taxi=2, x2=1), cards()], turn=MAX_TURNS - 2)
+    assert any(isinstance(m, DoubleMove) for m in gen.legal_moves(s))
+    last = state([1, 5], [cards(taxi=2, x2=1), cards()], turn=MAX_TURNS - 1)
+    assert as_set(gen.legal_moves(last)) == {(2, TAXI)}
+
+
+def test_finished_game_has_no_moves():
+    gen = line_board()
+    assert gen.legal_moves(state([1, 5], [cards(taxi=3), cards()], over=True)) == []
+
+
+def test_detective_tickets_go_to_mr_x():
+    gen = line_board()
+    s = state([5, 2, 1], [cards(), cards(taxi=2, bus=1), cards()], current=1, turn=4)
+    after = gen.apply(s, Move(1, 2, 3, BUS))
+    assert after.player_locs == (5, 3, 1)
+    assert after.player_cards[1] == cards(taxi=2)
+    assert after.player_cards[0] == cards(bus=1)
+    assert after.current_player == 2
+    assert after.turn == 4
+    assert not after.victory_flag
+
+
+def test_double_move_counts_two_turns_and_spends_x2():
+    gen = line_board()
+    s = state([1, 5], [cards(taxi=2, x2=1), cards()], turn=2)
+    after = gen.apply(s, DoubleMove(Move(0, 1, 2, TAXI), Move(0, 2, 3, TAXI)))
+    assert after.turn == 4
+    assert after.player_locs[0] == 3
+    assert after.player_cards[0] == cards()
+    assert after.current_player == 1
+
+
+def test_pass_moves_to_next_player_or_ends_the_game_for_mr_x():
+    gen = line_board()
+    s = state([5, 1, 3], [cards(), cards(), cards()], current=1, turn=3)
+    after = gen.apply(s, None)
+    assert after.current_player == 2 and not after.victory_flag
+    stuck = gen.apply(state([5, 1], [cards(), cards()], turn=3), None)
+    assert stuck.victory_flag
+    assert winner(stuck) == DETECTIVES
+
+
+def test_winner():
+    gen = line_board()
+    assert winner(state([1, 3], [cards(taxi=1), cards()])) is None
+
+    caught = gen.apply(state([1, 2], [cards(), cards(taxi=1)], current=1, turn=5), Move(1, 2, 1, TAXI))
+    assert caught.victory_flag
+    assert winner(caught) == DETECTIVES
+
+    # The detectives' last move after Mr X's final turn ends the game in his favour
+    last = gen.apply(state([1, 4], [cards(), cards(tube=1)], current=1, turn=MAX_TURNS), Move(1, 4, 3, TUBE))
+    assert last.victory_flag
+    assert winner(last) == MR_X
+
+
+def test_mr_x_moves_onto_reveal_turns_like_the_tracker_expects():
+    from Belief import MrXTracker
+    from MoveGen import REVEAL_TURNS
+
+    gen = line_board()
+    tracker = MrXTracker(gen.board)
+    s = state([1, 5], [cards(taxi=2, x2=1), cards()], turn=REVEAL_TURNS[0] - 2)
+    move = DoubleMove(Move(0, 1, 2, TAXI), Move(0, 2, 3, TAXI))
+    after = gen.apply(s, move)
+    tracker.observe(move, after)
+    # The second leg lands on the reveal turn, so the belief collapses onto it
+    assert after.turn == REVEAL_TURNS[0]
+    assert list(tracker.candidates()) == [3]
+
+
+def test_random_games_stay_consistent():
+    gen = default_generator()
+    rng = random.Random(11)
+    for _ in range(40):
+        s = initial_state(rng.sample(gen.board.stations, 5))
+        while not s.victory_flag:
+            moves = gen.legal_moves(s)
+            player = s.current_player
+            for move in moves:
+                assert move.player == player
+                assert move.from_station == s.player_locs[player]
+                if player != 0:
+                    assert move.to_station not in s.player_locs[1:]
+            move = rng.choice(moves) if moves else None
+            after = gen.apply(s, move)
+            # Detective tickets are handed to Mr X, never created
+            if player != 0 and move is not None:
+                assert detective_tickets(after) == detective_tickets(s) - 1
+            assert all(count >= 0 for row in after.player_cards for _, count in row)
+            s = after
+        assert winner(s) in (MR_X, DETECTIVES)
+        assert s.turn <= MAX_TURNS
+
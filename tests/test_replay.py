@@ -0,0 +1,113 @@
+import random
+
+import pytest
+
+from Controll import initial_state
+from MoveGen import default_generator
+from Replay import GameRecord, ReplayPlayer
+
+
+def play_random_game(seed, players=5, keyframe_interval=4):
+    gen = default_generator()
+    rng = random.Random(seed)
+    state = initial_state(rng.sample(gen.board.stations, players))
+    record = GameRecord(state, keyframe_interval)
+    states = [state]
+    while not state.victory_flag:
+        moves = gen.legal_moves(state)
+        state = record.append(rng.choice(moves) if moves else None)
+        states.append(state)
+    return record, states
+
+
+@pytest.mark.parametrize("keyframe_interval", [1, 4, 16])
+def test_keyframe_seek_equals_linear_replay(keyframe_interval):
+    record, states = play_random_game(1, keyframe_interval=keyframe_interval)
+    assert len(record) == len(states) - 1
+    assert record.final_state == states[-1]
+    for ply in range(len(states)):
+        assert record.state_at(ply) == states[ply]
+    assert record.state_at(-5) == states[0]
+    assert record.state_at(len(states) + 5) == states[-1]
+
+
+def test_replay_player_steps_and_jumps():
+    record, states = play_random_game(2)
+    player = ReplayPlayer(record)
+    rng = random.Random(0)
+    for _ in range(200):
+        ply = rng.randrange(len(states))
+        assert player.seek(ply) == states[ply]
+        if not player.at_end:
+            assert player.step_forward() == states[ply + 1]
+        assert player.step_back() == states[max(0, player.ply)]
+    for turn in range(states[-1].turn + 1):
+        state = player.seek_turn(turn)
+        assert state.turn >= turn
+        assert player.ply == 0 or states[player.ply - 1].turn < turn
+
+
+def test_json_round_trip(tmp_path):
+    record, states = play_random_game(3)
+    path = tmp_path / "game.json"
+    record.save(str(path))
+    loaded = GameRecord.load(str(path))
+    assert loaded.moves == record.moves
+    assert list(loaded.turns) == list(record.turns)
+    assert loaded.final_state == record.final_state
+    assert [loaded.state_at(ply) for ply in range(len(states))] == states
+
+
+def test_replay_with_more_players_than_the_setup(tmp_path, controller):
+    for _ in range(3):
+        controller.add_player()
+    players, random_locs, agent_choices = controller.players, controller.random_locs, controller.agent_choices
+
+    record, states = play_random_game(4, players=6)
+    path = tmp_path / "six.json"
+    record.save(str(path))
+    replay = controller.replay_game(str(path))
+
+    # Same list objects (the PlayerHandler holds on to them), now with six players
+    assert controller.players is players and len(players) == 6
+    assert controller.random_locs is random_locs and random_locs == list(states[0].player_locs)
+    assert controller.agent_choices is agent_choices and len(agent_choices) == 6
+    assert [loc for _, loc in players] == list(states[0].player_locs)
+    assert replay.state == states[0]
+
+    controller.delete_player()
+    assert len(players) == 5
+
+
+def test_player_handler_follows_a_larger_replay(tmp_path, controller):
+    tk = pytest.importorskip("tkinter")
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    try:
+        import Graphics
+        import StagedProgressBar
+
+        class MapStub:
+            colours = ["black", "blue", "red", "green", "purple", "orange"]
+
+            def draw_full_state(self, state):
+                pass
+
+        handler = Graphics.PlayerHandler(root, controller, MapStub())
+        record, _ = play_random_game(4, players=6)
+        path = tmp_path / "six.json"
+        record.save(str(path))
+        controller.replay_game(str(path))
+        handler.sync_players()
+        handler.create_live_game_panles()
+        handler.update_tickets(record.final_state)
+        StagedProgressBar.stage_batch(root).flush()
+        assert len(handler.starting_strings) == 6
+        for index in range(6):
+            counts = dict(record.final_state.player_cards[index])
+            for ticket, bar in handler.player_widgets[index]["ticket_bars"].items():
+                assert bar.stage == bar.clamp(counts[ticket])
+    finally:
+        root.destroy()
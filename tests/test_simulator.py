@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+from MoveGen import MR_X, default_generator, winner
+from Simulator import make_agents, play_game, random_start, run_games, summarise
+
+
+def per_game(results):
+    return [(r.start_locs, r.winner, r.turns, r.plies) for r in results]
+
+
+def test_results_do_not_depend_on_workers():
+    kwargs = dict(mrx=("greedy", {}), detectives=("random", {}), n_players=4, seed=40)
+    serial, _ = run_games(6, workers=1, **kwargs)
+    pooled, _ = run_games(6, workers=2, chunk_size=2, **kwargs)
+    assert per_game(serial) == per_game(pooled)
+
+
+def test_summarise_counts_wins_like_winner():
+    board = default_generator().board
+    results = []
+    for seed in range(12):
+        agents = make_agents(("random", {}), ("greedy", {}), 4, seed)
+        results.append(play_game(agents, random_start(4, random.Random(seed), board)))
+
+    mrx_wins = sum(1 for r in results if winner(r.final_state) in (MR_X, None))
+    assert 0 < mrx_wins < len(results)
+
+    summary = summarise(results)
+    assert summary["games"] == len(results)
+    assert summary["mrx_win_rate"] == pytest.approx(mrx_wins / len(results))
+    assert summary["detective_win_rate"] == pytest.approx(1 - mrx_wins / len(results))
+    assert summary["mean_turns"] == pytest.approx(sum(r.final_state.turn for r in results) / len(results))
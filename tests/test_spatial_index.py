@@ -0,0 +1,94 @@
+import math
+import random
+
+import pytest
+
+from SpatialIndex import StationGrid
+
+
+def brute_in_box(stops, x, y, half_size):
+    return [
+        node for node in stops
+        if x - half_size <= node.x <= x + half_size and y - half_size <= node.y <= y + half_size
+    ]
+
+
+def brute_by_distance(stops, x, y):
+    return sorted(stops, key=lambda n: ((n.x - x) ** 2 + (n.y - y) ** 2, n.id))
+
+
+def query_points(stops, n=300, seed=7):
+    rng = random.Random(seed)
+    max_x = max(node.x for node in stops) + 50
+    max_y = max(node.y for node in stops) + 50
+    points = [(node.x + rng.randint(-30, 30), node.y + rng.randint(-30, 30)) for node in rng.sample(stops, 100)]
+    points += [(rng.randint(-50, max_x), rng.randint(-50, max_y)) for _ in range(n - len(points))]
+    return points
+
+
+@pytest.mark.parametrize("cell_size", [1, 23, 64, 500])
+def test_in_box_matches_brute_force(stops, cell_size):
+    grid = StationGrid(stops, cell_size)
+    assert len(grid) == len(stops)
+    for x, y in query_points(stops):
+        expected = {node.id for node in brute_in_box(stops, x, y, 23)}
+        assert {node.id for node in grid.in_box(x, y, 23)} == expected
+
+
+@pytest.mark.parametrize("cell_size", [16, 64])
+def test_nearest_matches_brute_force(stops, cell_size):
+    grid = StationGrid(stops, cell_size)
+    for x, y in query_points(stops):
+        for radius in (5, 23, 200):
+            found = grid.nearest(x, y, radius)
+            ordered = brute_by_distance(stops, x, y)
+            best = ordered[0]
+            if math.hypot(best.x - x, best.y - y) > radius:
+                assert found is None
+            else:
+                assert found is not None
+                assert (found.x - x) ** 2 + (found.y - y) ** 2 == (best.x - x) ** 2 + (best.y - y) ** 2
+
+
+def test_k_nearest_matches_brute_force(stops):
+    grid = StationGrid(stops, 64)
+    for x, y in query_points(stops, n=120):
+        assert [n.id for n in grid.k_nearest(x, y, 7)] == [n.id for n in brute_by_distance(stops, x, y)[:7]]
+        within = [n.id for n in brute_by_distance(stops, x, y) if (n.x - x) ** 2 + (n.y - y) ** 2 <= 100 ** 2]
+        assert [n.id for n in grid.k_nearest(x, y, 50, radius=100)] == within[:50]
+
+
+def test_select_station_matches_original(controller):
+    import Controll
+
+    for x, y in query_points(controller.stopList, n=200):
+        expected = [node.id for node in brute_in_box(controller.stopList, x, y, Controll.SELECT_RADIUS)]
+        assert [node.id for node in controller.select_station(x, y)] == expected
+
+
+def test_empty_grid_and_bad_cell_size():
+    grid = StationGrid([])
+    assert len(grid) == 0
+    assert grid.nearest(10, 10, 50) is None
+    assert grid.k_nearest(10, 10, 3) == []
+    with pytest.raises(ValueError):
+        StationGrid([], cell_size=0)
+
+
+def test_station_coords_to_canvas_matches_scalar_transform(stops):
+    from SpatialIndex import StationCoords
+
+    coords = StationCoords(stops)
+    by_id = {node.id: node for node in stops}
+    ids = [node.id for node in stops] + [-1, 0, len(coords), 10_000]
+    result = coords.to_canvas(ids, 0.43, 0.61, 12, -8)
+    assert len(result) == len(ids)
+    for station, point in zip(ids, result):
+        node = by_id.get(station)
+        if node is None:
+            assert point is None
+            assert coords.get(station) is None
+        else:
+            assert point == (int(12 + node.x * 0.43), int(-8 + node.y * 0.61))
+            assert coords.get(station) == (node.x, node.y)
+    assert coords.to_canvas([], 1.0, 1.0) == []
@@ -0,0 +1,132 @@
+import pytest
+
+from StagedProgressBar import StageBatch
+
+
+class FakeWidget:
+    """Just the after_idle/after_cancel part of a Tk widget."""
+    def __init__(self):
+        self.jobs = {}
+        self._next = 0
+
+    def after_idle(self, callback):
+        self._next += 1
+        self.jobs[self._next] = callback
+        return self._next
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def idle(self):
+        jobs, self.jobs = self.jobs, {}
+        for callback in jobs.values():
+            callback()
+
+
+class FakeBar:
+    def __init__(self, stages=10, stage=0, log=None):
+        self.stages = stages
+        self.stage = stage
+        self.log = log if log is not None else []
+
+    def clamp(self, stage):
+        return max(0, min(self.stages, int(stage)))
+
+    def set_stage(self, stage):
+        stage = self.clamp(stage)
+        if stage != self.stage:
+            self.stage = stage
+            self.log.append((self, stage))
+
+
+@pytest.fixture
+def widget():
+    return FakeWidget()
+
+
+def test_burst_of_updates_is_one_flush_with_the_latest_values(widget):
+    batch = StageBatch(widget)
+    log = []
+    bars = [FakeBar(log=log) for _ in range(3)]
+    for stage in range(1, 6):
+        for bar in bars:
+            batch.set_stage(bar, stage)
+    assert len(widget.jobs) == 1
+    assert len(batch) == 3
+    assert log == []
+
+    widget.idle()
+    assert [(bar, 5) for bar in bars] == log
+    assert len(batch) == 0
+    assert widget.jobs == {}
+
+
+def test_unchanged_values_are_skipped(widget):
+    batch = StageBatch(widget)
+    bar = FakeBar(stage=4)
+    batch.set_stage(bar, 4)
+    assert len(batch) == 0
+    # Queued and then set back to what is shown: nothing left to write
+    batch.set_stage(bar, 7)
+    batch.set_stage(bar, 4)
+    widget.idle()
+    assert bar.log == []
+    # Values past the ends are clamped before comparing
+    batch.set_stage(bar, 40)
+    widget.idle()
+    assert bar.stage == 10
+    batch.set_stage(bar, 99)
+    assert len(batch) == 0
+
+
+def test_bars_are_written_in_the_order_they_were_first_queued(widget):
+    batch = StageBatch(widget)
+    log = []
+    a, b, c = FakeBar(log=log), FakeBar(log=log), FakeBar(log=log)
+    batch.set_stage(b, 1)
+    batch.set_stage(a, 1)
+    batch.set_stage(c, 1)
+    batch.set_stage(b, 2)
+    widget.idle()
+    assert log == [(b, 2), (a, 1), (c, 1)]
+
+
+def test_explicit_flush_cancels_the_idle_job(widget):
+    batch = StageBatch(widget)
+    bar = FakeBar()
+    batch.set_stage(bar, 3)
+    batch.flush()
+    assert bar.stage == 3
+    assert widget.jobs == {}
+    batch.set_stage(bar, 5)
+    assert len(widget.jobs) == 1
+
+
+def test_discarded_bar_is_not_overwritten(widget):
+    batch = StageBatch(widget)
+    bar = FakeBar()
+    batch.set_stage(bar, 2)
+    # Written directly (StagedProgress.set_stage discards its queued stage)
+    batch.discard(bar)
+    bar.set_stage(8)
+    widget.idle()
+    assert bar.stage == 8
+
+
+def test_direct_set_stage_wins_over_a_queued_one():
+    tk = pytest.importorskip("tkinter")
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    try:
+        from StagedProgressBar import StagedProgress, stage_batch
+
+        bar = StagedProgress(root, stages=10)
+        bar.queue_stage(3)
+        bar.set_stage(7)
+        root.update()
+        stage_batch(bar).flush()
+        assert bar.stage == 7 and bar.var.get() == 7
+    finally:
+        root.destroy()
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from Controll import GameState, initial_state
+from MoveGen import default_generator
+from StateCodec import MAX_PLAYERS, PACKED_BITS, Zobrist, from_bytes, pack, to_bytes, unpack
+
+
+def random_walk(seed, games=20):
+    """Every state of `games` random games, with the state before it."""
+    gen = default_generator()
+    rng = random.Random(seed)
+    for _ in range(games):
+        state = initial_state(rng.sample(gen.board.stations, rng.randint(2, MAX_PLAYERS)))
+        while not state.victory_flag:
+            moves = gen.legal_moves(state)
+            after = gen.apply(state, rng.choice(moves) if moves else None)
+            yield state, after
+            state = after
+
+
+def test_pack_unpack_round_trip():
+    seen = set()
+    for _, state in random_walk(3):
+        packed = pack(state)
+        assert 0 <= packed < 1 << PACKED_BITS
+        assert unpack(packed) == state
+        assert from_bytes(to_bytes(packed)) == packed
+        seen.add(packed)
+    assert len(seen) > 100
+
+
+@pytest.mark.parametrize("state", [
+    GameState(0, (), (), 0, False),
+    GameState(128, (1, 2), initial_state((1, 2)).player_cards, 0, False),
+    GameState(0, (256, 2), initial_state((1, 2)).player_cards, 0, False),
+    GameState(0, (1, 2), (initial_state((1, 2)).player_cards[0],), 0, False),
+    GameState(0, (1,), ((("bus", 1), ("taxi", 1), ("tube", 1), ("black", 0), ("x2", 0)),), 0, False),
+    GameState(0, (1,), ((("taxi", 64), ("bus", 1), ("tube", 1), ("black", 0), ("x2", 0)),), 0, False),
+])
+def test_pack_rejects_unrepresentable_states(state):
+    with pytest.raises(ValueError):
+        pack(state)
+
+
+def test_zobrist_update_matches_full_hash():
+    zobrist = Zobrist()
+    for before, after in random_walk(5):
+        h = zobrist.hash(before)
+        assert zobrist.update(h, before, after) == zobrist.hash(after)
+        # XOR-ing the same change back restores the parent's hash
+        assert zobrist.update(zobrist.hash(after), after, before) == h
+
+
+def test_zobrist_distinguishes_states_and_is_seeded():
+    states = {pack(state): state for _, state in random_walk(9, games=10)}
+    hashes = {Zobrist().hash(state) for state in states.values()}
+    assert len(hashes) == len(states)
+    state = next(iter(states.values()))
+    assert Zobrist(seed=1).hash(state) == Zobrist(seed=1).hash(state)
+    assert Zobrist(seed=1).hash(state) != Zobrist(seed=2).hash(state)